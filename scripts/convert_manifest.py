@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# ==============================================================================
+# convert_manifest.py
+#
+# Converte manifestos entre o formato JSON (*_manifest.json) e o formato
+# compacto SQLite (*_manifest.sqlite) lido de forma preguiçosa por llm_core.
+#
+# Uso:
+#   python scripts/convert_manifest.py [MANIFEST_JSON ...] [--all] [--to-json SQLITE -o OUT.json]
+#
+# Sem argumentos, converte o *_manifest.json mais recente em scripts/data/.
+# ==============================================================================
+
+import argparse
+import sys
+from pathlib import Path
+
+_project_root_dir_for_script = Path(__file__).resolve().parent.parent
+if str(_project_root_dir_for_script) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_script))
+
+from scripts.llm_core import config as core_config
+from scripts.llm_core import context as core_context
+from scripts.llm_core import manifest_store
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Converte manifestos JSON <-> SQLite (formato compacto com carregamento preguiçoso)."
+    )
+    parser.add_argument(
+        "manifests",
+        nargs="*",
+        help="Arquivos *_manifest.json a converter (padrão: o mais recente em scripts/data/).",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Converte todos os *_manifest.json de scripts/data/.",
+    )
+    parser.add_argument(
+        "--to-json",
+        dest="to_json",
+        type=str,
+        default=None,
+        help="Converte o SQLite informado de volta para JSON (requer -o).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        type=str,
+        default=None,
+        help="Caminho de saída (JSON para --to-json, SQLite caso contrário).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    if args.to_json:
+        if not args.output_path:
+            print("Erro: --to-json requer -o/--output.", file=sys.stderr)
+            return 1
+        output = manifest_store.convert_sqlite_to_json(
+            Path(args.to_json), Path(args.output_path)
+        )
+        print(f"Manifesto JSON reconstruído em: {output}")
+        return 0
+
+    if args.all:
+        manifest_paths = sorted(
+            core_config.MANIFEST_DATA_DIR.glob("*_manifest.json"), reverse=True
+        )
+    elif args.manifests:
+        manifest_paths = [Path(p) for p in args.manifests]
+    else:
+        latest = core_context.find_latest_manifest_json(core_config.MANIFEST_DATA_DIR)
+        manifest_paths = [latest] if latest else []
+
+    if not manifest_paths:
+        print("Erro: Nenhum manifesto JSON encontrado para converter.", file=sys.stderr)
+        return 1
+    if args.output_path and len(manifest_paths) > 1:
+        print(
+            "Erro: -o/--output só pode ser usado com um único manifesto.",
+            file=sys.stderr,
+        )
+        return 1
+
+    for manifest_path in manifest_paths:
+        output = manifest_store.convert_json_to_sqlite(
+            manifest_path, Path(args.output_path) if args.output_path else None
+        )
+        print(f"  {manifest_path.name} -> {output.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
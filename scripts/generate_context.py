@@ -20,7 +20,7 @@
 #   - PHP CLI
 # Dependencies Opcionais:
 #   - gh (GitHub CLI)
-#   - jq
+#   - jq (apenas com --use-jq; por padrão o JSON é processado em Python)
 #   - tree
 #   - cloc
 #   - composer
@@ -31,8 +31,11 @@
 # ==============================================================================
 
 import argparse
+import contextvars
 import datetime
 import fnmatch  # Para glob patterns mais simples
+import glob
+import hashlib
 import json
 import os
 import platform
@@ -42,25 +45,45 @@ import shutil
 import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any, Callable, Set
+from typing import List, Tuple, Optional, Dict, Any, Callable, Set, Union
+
+# Adiciona o diretório raiz do projeto ao sys.path para importar llm_core
+_project_root_dir_for_script = Path(__file__).resolve().parent.parent
+if str(_project_root_dir_for_script) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_script))
+
+from scripts.llm_core import utils as core_utils
 
 # --- Configuration Constants (Globally Accessible) ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_OUTPUT_BASE_DIR = BASE_DIR / "context_llm/code"
+# Blobs endereçados por conteúdo (sha256), compartilhados via hard links pelos
+# diretórios de contexto <timestamp>/ do mesmo diretório base
+BLOB_STORE_DIR_NAME = ".blobs"
+BLOB_HASH_CHUNK_SIZE = 1024 * 1024
+# Cache de estágios: fingerprint das entradas -> saídas da execução anterior
+STAGE_CACHE_FILE_NAME = ".stage_cache.json"
+STAGE_FINGERPRINT_COMMAND_TIMEOUT = 30
+# run_command(stream_to_file=True): bytes finais de stdout/stderr mantidos em memória
+RUN_COMMAND_TAIL_BYTES = 64 * 1024
 EMPTY_TREE_COMMIT = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
 PHPSTAN_BIN = BASE_DIR / "vendor/bin/phpstan"
 ARTISAN_CMD = ["php", str(BASE_DIR / "artisan")]
 PINT_BIN = BASE_DIR / "vendor/bin/pint"
 GH_ISSUE_JSON_FIELDS = (
-    "number,title,body,author,state,stateReason,assignees,labels,comments"
+    "number,title,body,author,state,stateReason,assignees,labels,comments,updatedAt"
 )
 DEFAULT_TREE_DEPTH = 3
 CLOC_EXCLUDE_REGEX = r"(vendor|node_modules|storage|public/build|\.git|\.idea|\.vscode|\.fleet|context_llm)"
 TREE_IGNORE_PATTERN = "vendor|node_modules|storage/framework|storage/logs|public/build|.git|.idea|.vscode|.fleet|context_llm"
 DEFAULT_GH_ISSUE_LIST_LIMIT = 500
+DEFAULT_GH_ISSUE_WORKERS = 8
 DEFAULT_GIT_TAG_LIMIT = 10
 DEFAULT_GH_RUN_LIST_LIMIT = 10
 DEFAULT_GH_PR_LIST_LIMIT = 20
@@ -83,9 +106,23 @@ DUSK_OUTPUT_FILE_NAME = "dusk_test_results.txt"
 DUSK_INFO_FILE_NAME = "dusk_test_info.txt"
 PYTEST_OUTPUT_FILE_NAME = "pytest_results.txt"
 
+# Scheduler de estágios: quantos estágios rodam ao mesmo tempo (--jobs) e
+# quantos estágios de cada classe de recurso podem compartilhá-lo.
+DEFAULT_STAGE_JOBS = min(4, os.cpu_count() or 1)
+STAGE_RESOURCE_LIMITS: Dict[str, int] = {
+    "db": 1,  # Banco de testes/artisan: um estágio por vez
+    "network": 4,  # Chamadas gh/API
+    "cpu": max(1, (os.cpu_count() or 2) // 2),  # Análise estática, testes, cloc
+}
+
 # --- Variáveis de Estado ---
 overall_exit_code = 0
 bg_processes: List[subprocess.Popen] = []
+# Buffer de log do estágio em execução (ver _StageOutputRouter); propagado a
+# threads auxiliares de um estágio via contextvars.copy_context().
+_stage_output_chunks: contextvars.ContextVar[Optional[List[Tuple[Any, str]]]] = (
+    contextvars.ContextVar("stage_output_chunks", default=None)
+)
 
 
 # --- Find Commands (Helper) ---
@@ -136,6 +173,7 @@ def suggest_install(cmd_name: str, pkg_name: Optional[str] = None) -> str:
 def write_warning_to_file(output_file: Path, warning_message: str):
     try:
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        break_hard_link(output_file)
         output_file.write_text(warning_message, encoding="utf-8")
         # Log only the first line of the warning to keep console cleaner
         print(f"    {warning_message.splitlines()[0]}")
@@ -146,6 +184,49 @@ def write_warning_to_file(output_file: Path, warning_message: str):
         )
 
 
+def link_or_copy_file(source_file: Path, dest_file: Path, copy: bool = False) -> str:
+    """
+    Cria dest_file como hard link de source_file (sem custo de cópia); se o
+    sistema de arquivos não suportar, ou com copy=True (arquivo que um estágio
+    ativo pode reescrever), copia. Retorna "link" ou "copy".
+    """
+    dest_file.parent.mkdir(parents=True, exist_ok=True)
+    if dest_file.exists() or dest_file.is_symlink():
+        dest_file.unlink()
+    if not copy:
+        try:
+            os.link(source_file, dest_file)
+            return "link"
+        except OSError:
+            pass
+    shutil.copy2(source_file, dest_file)
+    return "copy"
+
+
+def break_hard_link(output_file: Path) -> None:
+    """
+    Remove output_file antes de reescrevê-lo se ele for um hard link (saída
+    reaproveitada de outra execução ou blob): escrever no lugar alteraria o
+    conteúdo de todos os snapshots que compartilham o inode.
+    """
+    try:
+        if output_file.stat().st_nlink > 1:
+            output_file.unlink()
+    except OSError:
+        pass
+
+
+def matches_stage_outputs(
+    file_name: str, stages_config: Dict[str, Dict[str, Any]]
+) -> bool:
+    """Indica se file_name casa com algum 'outputs' dos estágios informados."""
+    return any(
+        fnmatch.fnmatch(file_name, pattern)
+        for stage_config_data in stages_config.values()
+        for pattern in stage_config_data.get("outputs", [])
+    )
+
+
 def run_command(
     cmd_list: List[str],
     output_file: Path,
@@ -153,12 +234,30 @@ def run_command(
     check: bool = False,
     shell: bool = False,
     timeout: Optional[int] = 300,
+    stream_to_file: bool = False,
 ) -> Tuple[int, str, str]:
+    """
+    Executa o comando e grava o stdout em output_file. Com stream_to_file=True
+    o stdout vai direto do processo para o arquivo (sem passar pela memória) e
+    stdout/stderr retornados contêm apenas os últimos RUN_COMMAND_TAIL_BYTES;
+    use para saídas grandes (diffs, listagens, testes) que não são processadas.
+    """
     cmd_str = (
         shlex.join(cmd_list) if not shell else " ".join(map(shlex.quote, cmd_list))
     )
     print(f"    Executando: {cmd_str}...")
     start_time = time.monotonic()
+    if stream_to_file:
+        return _run_command_streaming(
+            cmd_list if not shell else cmd_str,
+            cmd_str,
+            output_file,
+            cwd,
+            check,
+            shell,
+            timeout,
+            start_time,
+        )
     try:
         output_file.parent.mkdir(parents=True, exist_ok=True)
         process = subprocess.run(
@@ -187,6 +286,7 @@ def run_command(
         if output_content and not output_content.endswith("\n"):
             output_content += "\n"
 
+        break_hard_link(output_file)
         output_file.write_text(output_content, encoding="utf-8")
         print(f"    Output salvo em: {output_file.name} ({duration:.2f}s)")
         return exit_code, stdout.strip(), stderr.strip()
@@ -223,6 +323,91 @@ def run_command(
         return 1, "", str(e)
 
 
+def _read_tail(file_obj) -> str:
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(max(0, size - RUN_COMMAND_TAIL_BYTES))
+    return file_obj.read().decode("utf-8", errors="replace")
+
+
+def _run_command_streaming(
+    cmd: Union[List[str], str],
+    cmd_str: str,
+    output_file: Path,
+    cwd: Path,
+    check: bool,
+    shell: bool,
+    timeout: Optional[int],
+    start_time: float,
+) -> Tuple[int, str, str]:
+    try:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        break_hard_link(output_file)
+        with open(output_file, "w+b") as stdout_f, tempfile.TemporaryFile() as stderr_f:
+            process = subprocess.Popen(
+                cmd, stdout=stdout_f, stderr=stderr_f, cwd=cwd, shell=shell
+            )
+            try:
+                exit_code = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+            duration = time.monotonic() - start_time
+            stdout_tail = _read_tail(stdout_f)
+            stderr_tail = _read_tail(stderr_f)
+            if exit_code != 0 and check:
+                raise subprocess.CalledProcessError(
+                    exit_code, cmd, output=stdout_tail, stderr=stderr_tail
+                )
+            if exit_code != 0:
+                warning_msg = f"AVISO: Comando finalizado com código {exit_code} em {duration:.2f}s. Stderr: {stderr_tail.strip()}"
+                print(f"    {warning_msg}", file=sys.stderr)
+                stdout_f.seek(0, os.SEEK_END)
+                stdout_f.write(
+                    f"\n\n--- COMMAND FAILED (Exit Code: {exit_code}) ---\nStderr:\n".encode(
+                        "utf-8"
+                    )
+                )
+                stderr_f.seek(0)
+                shutil.copyfileobj(stderr_f, stdout_f)
+            if stdout_f.tell() > 0:
+                stdout_f.seek(-1, os.SEEK_END)
+                if stdout_f.read(1) != b"\n":
+                    stdout_f.write(b"\n")
+        print(f"    Output salvo em: {output_file.name} ({duration:.2f}s, streaming)")
+        return exit_code, stdout_tail.strip(), stderr_tail.strip()
+
+    except FileNotFoundError:
+        error_msg = (
+            f"Comando não encontrado: {cmd[0] if isinstance(cmd, list) else cmd_str}"
+        )
+        print(f"    ERRO: {error_msg}", file=sys.stderr)
+        write_warning_to_file(output_file, f"ERRO: {error_msg}\n")
+        return 1, "", error_msg
+    except subprocess.TimeoutExpired:
+        error_msg = f"Comando excedeu o tempo limite de {timeout} segundos: {cmd_str}"
+        print(f"    ERRO: {error_msg}", file=sys.stderr)
+        write_warning_to_file(output_file, f"ERRO: {error_msg}\n")
+        return 1, "", error_msg
+    except subprocess.CalledProcessError as e:
+        error_msg = f"Comando falhou (Exit Code: {e.returncode})"
+        print(f"    ERRO: {error_msg}. Stderr: {e.stderr.strip()}", file=sys.stderr)
+        write_warning_to_file(
+            output_file,
+            f"ERRO: {error_msg}\nStderr:\n{e.stderr}\nStdout:\n{e.output}\n",
+        )
+        return e.returncode, e.output.strip(), e.stderr.strip()
+    except Exception as e:
+        error_msg = f"Erro inesperado ao executar '{cmd_str}': {e}"
+        print(f"    ERRO: {error_msg}", file=sys.stderr)
+        traceback.print_exc(file=sys.stderr)
+        write_warning_to_file(
+            output_file, f"ERRO: {error_msg}\n{traceback.format_exc()}\n"
+        )
+        return 1, "", str(e)
+
+
 def find_second_latest_context_dir(output_base_path: Path) -> Optional[Path]:
     """Encontra o segundo diretório de contexto mais recente."""
     if not output_base_path.is_dir():
@@ -325,7 +510,7 @@ def collect_python_env_info(
 
     if PIP_CMD:
         run_command([PIP_CMD, "--version"], pip_version_file)
-        run_command([PIP_CMD, "freeze"], pip_freeze_file)
+        run_command([PIP_CMD, "freeze"], pip_freeze_file, stream_to_file=True)
     else:
         warning_msg_pip = suggest_install("pip3 or pip", "python3-pip")
         write_warning_to_file(pip_version_file, warning_msg_pip)
@@ -366,16 +551,27 @@ def collect_git_info(
         "commit %H%nAuthor: %an <%ae>%nDate:   %ad%n%n%w(0,4)%s%n%n%w(0,4,4)%b%n"
     )
     run_command(
-        ["git", "log", f"--pretty=format:{git_log_format}"], output_dir / "git_log.txt"
+        ["git", "log", f"--pretty=format:{git_log_format}"],
+        output_dir / "git_log.txt",
+        stream_to_file=True,
     )
     run_command(
         ["git", "diff", f"{EMPTY_TREE_COMMIT}..HEAD"],
         output_dir / "git_diff_empty_tree_to_head.txt",
+        stream_to_file=True,
+    )
+    run_command(
+        ["git", "diff", "--cached"],
+        output_dir / "git_diff_cached.txt",
+        stream_to_file=True,
+    )
+    run_command(
+        ["git", "diff"], output_dir / "git_diff_unstaged.txt", stream_to_file=True
     )
-    run_command(["git", "diff", "--cached"], output_dir / "git_diff_cached.txt")
-    run_command(["git", "diff"], output_dir / "git_diff_unstaged.txt")
     run_command(["git", "status"], output_dir / "git_status.txt")
-    run_command(["git", "ls-files"], output_dir / "git_ls_files.txt")
+    run_command(
+        ["git", "ls-files"], output_dir / "git_ls_files.txt", stream_to_file=True
+    )
     tags_file = output_dir / "git_recent_tags.txt"
     exit_code, stdout, _ = run_command(
         ["git", "tag", "--sort=-creatordate"], tags_file, check=False
@@ -479,7 +675,9 @@ def collect_gh_project_info(
         "--format",
         "json",
     ]
-    exit_code, stdout_gh, stderr_gh = run_command(cmd_list, status_file, check=False)
+    exit_code, _, stderr_gh = run_command(
+        cmd_list, status_file, check=False, stream_to_file=True
+    )
 
     if exit_code != 0:
         print(
@@ -498,6 +696,134 @@ def collect_gh_project_info(
         )
         return
 
+    if getattr(cli_args, "use_jq", False):
+        _summarize_project_items_with_jq(status_file, summary_file, cli_args)
+        return
+
+    print(
+        f"  Gerando resumo de status dos itens (campo '{cli_args.gh_project_status_field}')..."
+    )
+    try:
+        # Lê o JSON direto do arquivo gravado pelo gh (sem cópia via pipe)
+        with open(status_file, "r", encoding="utf-8") as f:
+            project_data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        error_msg_json = f"Falha ao ler o JSON de gh project item-list: {e}"
+        print(f"  ERRO: {error_msg_json}", file=sys.stderr)
+        write_warning_to_file(
+            summary_file, json.dumps({"error": error_msg_json}) + "\n"
+        )
+        return
+    if not project_data:
+        error_msg_empty = "Comando gh project item-list retornou vazio ou nulo. Não é possível gerar resumo."
+        print(f"  AVISO: {error_msg_empty}", file=sys.stderr)
+        write_warning_to_file(
+            summary_file, json.dumps({"error": error_msg_empty}) + "\n"
+        )
+        return
+    try:
+        summary = summarize_project_items(
+            project_data, cli_args.gh_project_status_field
+        )
+    except (AttributeError, TypeError) as e:
+        error_msg_schema = f"Formato inesperado em gh project item-list: {e}"
+        print(f"  ERRO: {error_msg_schema}", file=sys.stderr)
+        write_warning_to_file(
+            summary_file, json.dumps({"error": error_msg_schema}) + "\n"
+        )
+        return
+    summary_file.write_text(
+        json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+    print(f"  Resumo gerado em {summary_file.name} ({len(summary)} itens).")
+
+
+def _field_values(item: Dict[str, Any], field_name: str) -> List[Dict[str, Any]]:
+    return [
+        field_value
+        for field_value in item.get("fieldValues") or []
+        if isinstance(field_value, dict)
+        and (field_value.get("field") or {}).get("name") == field_name
+    ]
+
+
+def _first_truthy(values: List[Any], default: Any) -> Any:
+    # Equivale a 'try (...) // default' do jq: primeiro valor não nulo/false
+    return next((value for value in values if value not in (None, False)), default)
+
+
+def summarize_project_items(
+    project_data: Dict[str, Any], status_field_name: str
+) -> List[Dict[str, Any]]:
+    """
+    Projeção de 'gh project item-list --format json' no esquema do resumo
+    (type, number, title, status, assignees, labels, milestone, repository),
+    equivalente ao filtro jq usado com --use-jq. Itens sem 'fieldValues'
+    (formato atual do gh) usam os campos de nível superior do item.
+    """
+    summary: List[Dict[str, Any]] = []
+    for item in project_data.get("items") or []:
+        content = item.get("content") or {}
+        item_type = item.get("type")
+        if "fieldValues" in item:
+            status = _first_truthy(
+                [fv.get("value") for fv in _field_values(item, status_field_name)],
+                "N/A",
+            )
+            assignees = [
+                user.get("login")
+                for fv in _field_values(item, "Assignees")
+                for user in fv.get("users") or []
+            ]
+            labels = [
+                label.get("name")
+                for fv in _field_values(item, "Labels")
+                for label in fv.get("labels") or []
+            ]
+            milestone = _first_truthy(
+                [
+                    (fv.get("milestone") or {}).get("title")
+                    for fv in _field_values(item, "Milestone")
+                ],
+                "",
+            )
+            repository = _first_truthy(
+                [
+                    (fv.get("repository") or {}).get("nameWithOwner")
+                    for fv in _field_values(item, "Repository")
+                ],
+                "",
+            )
+        else:
+            status = _first_truthy(
+                [item.get(status_field_name.lower()), item.get(status_field_name)],
+                "N/A",
+            )
+            assignees = list(item.get("assignees") or [])
+            labels = list(item.get("labels") or [])
+            milestone = _first_truthy([(item.get("milestone") or {}).get("title")], "")
+            repository = _first_truthy([item.get("repository")], "")
+            if item_type is None:
+                item_type = content.get("type")
+        summary.append(
+            {
+                "type": item_type,
+                "number": content.get("number"),
+                "title": content.get("title"),
+                "status": status,
+                "assignees": ", ".join(sorted({a for a in assignees if a})),
+                "labels": ", ".join(sorted({l for l in labels if l})),
+                "milestone": milestone,
+                "repository": repository,
+            }
+        )
+    return summary
+
+
+def _summarize_project_items_with_jq(
+    status_file: Path, summary_file: Path, cli_args: argparse.Namespace
+):
+    """Caminho opcional (--use-jq): gera o resumo com o filtro jq original."""
     if not command_exists("jq"):
         warning_msg_jq = suggest_install("jq")
         print(
@@ -507,12 +833,6 @@ def collect_gh_project_info(
         write_warning_to_file(summary_file, warning_msg_jq)
         return
 
-    if not stdout_gh or stdout_gh.strip() == "null" or stdout_gh.strip() == "":
-        error_msg_jq = "Comando gh project item-list retornou vazio ou nulo. Não é possível gerar resumo."
-        print(f"  AVISO: {error_msg_jq}", file=sys.stderr)
-        write_warning_to_file(summary_file, json.dumps({"error": error_msg_jq}) + "\n")
-        return
-
     print(
         f"  Gerando resumo de status dos itens (usando jq e campo '{cli_args.gh_project_status_field}')..."
     )
@@ -523,8 +843,8 @@ def collect_gh_project_info(
             number: .content.number,
             title: .content.title,
             status: (try (.fieldValues[] | select(.field.name == "{shlex.quote(cli_args.gh_project_status_field)}") | .value) // "N/A"),
-            assignees: [ .fieldValues[] | select(.field.name == "Assignees") | .users[].login ] | unique | join(", ") // "",
-            labels: [ .fieldValues[] | select(.field.name == "Labels") | .labels[].name ] | unique | join(", ") // "",
+            assignees: ([ .fieldValues[] | select(.field.name == "Assignees") | .users[].login ] | unique | join(", ") // ""),
+            labels: ([ .fieldValues[] | select(.field.name == "Labels") | .labels[].name ] | unique | join(", ") // ""),
             milestone: (try (.fieldValues[] | select(.field.name == "Milestone") | .milestone.title) // ""),
             repository: (try (.fieldValues[] | select(.field.name == "Repository") | .repository.nameWithOwner) // "")
         }}
@@ -532,8 +852,7 @@ def collect_gh_project_info(
     """
     try:
         jq_process = subprocess.run(
-            ["jq", jq_filter],
-            input=stdout_gh,
+            ["jq", jq_filter, str(status_file)],
             text=True,
             check=True,
             capture_output=True,
@@ -550,13 +869,6 @@ def collect_gh_project_info(
             summary_file,
             f"ERRO: {error_msg_jq_run}\nStderr:\n{e.stderr}\nStdout:\n{e.stdout}\n",
         )
-    except FileNotFoundError:
-        warning_msg_jq = suggest_install("jq")
-        print(
-            f"  {warning_msg_jq.splitlines()[0]} Não foi possível gerar o resumo {summary_file.name}.",
-            file=sys.stderr,
-        )
-        write_warning_to_file(summary_file, warning_msg_jq)
     except Exception as e:
         error_msg_jq_unexpected = f"Erro inesperado ao processar com jq: {e}"
         print(f"  ERRO: {error_msg_jq_unexpected}", file=sys.stderr)
@@ -628,11 +940,11 @@ def collect_dependency_info(
     composer_file = output_dir / "composer_show.txt"
     npm_file = output_dir / "npm_list_depth0.txt"
     if command_exists("composer"):
-        run_command(["composer", "show"], composer_file)
+        run_command(["composer", "show"], composer_file, stream_to_file=True)
     else:
         write_warning_to_file(composer_file, suggest_install("composer"))
     if command_exists("npm"):
-        run_command(["npm", "list", "--depth=0"], npm_file)
+        run_command(["npm", "list", "--depth=0"], npm_file, stream_to_file=True)
     else:
         write_warning_to_file(npm_file, suggest_install("npm"))
 
@@ -649,6 +961,7 @@ def collect_structure_info(
         run_command(
             ["tree", "-L", str(cli_args.tree_depth), "-a", "-I", TREE_IGNORE_PATTERN],
             tree_file,
+            stream_to_file=True,
         )
     else:
         write_warning_to_file(tree_file, suggest_install("tree"))
@@ -656,6 +969,7 @@ def collect_structure_info(
         run_command(
             ["cloc", ".", "--fullpath", f"--not-match-d={CLOC_EXCLUDE_REGEX}"],
             cloc_file,
+            stream_to_file=True,
         )
     else:
         write_warning_to_file(cloc_file, suggest_install("cloc", "cloc"))
@@ -706,12 +1020,14 @@ def collect_github_issue_details(
         )
         write_warning_to_file(issues_dir / "github_issues_skipped.log", warning_msg)
         return
-    if not command_exists("jq"):
+    use_jq = getattr(cli_args, "use_jq", False)
+    if use_jq and not command_exists("jq"):
         warning_msg_jq = suggest_install("jq")
         print(
-            f"  {warning_msg_jq.splitlines()[0]} Coleta de issues pode falhar ou ser incompleta.",
+            f"  {warning_msg_jq.splitlines()[0]} Usando o filtro interno (Python).",
             file=sys.stderr,
         )
+        use_jq = False
 
     print(f"  Issues serão salvas em: {issues_dir.relative_to(BASE_DIR)}")
     print(
@@ -726,14 +1042,17 @@ def collect_github_issue_details(
         "--limit",
         str(cli_args.issue_limit),
         "--json",
-        "number,stateReason",
+        "number,stateReason,updatedAt",
     ]
     try:
         list_process = subprocess.run(
             list_cmd, capture_output=True, text=True, check=True, cwd=BASE_DIR
         )
-        if command_exists("jq"):
-            jq_filter = '[.[] | select(.stateReason != "NOT_PLANNED") | .number]'
+        issue_updated_at: Dict[int, Optional[str]] = {}
+        if use_jq:
+            jq_filter = (
+                '[.[] | select(.stateReason != "NOT_PLANNED") | {number, updatedAt}]'
+            )
             jq_process = subprocess.run(
                 ["jq", "-c", jq_filter],
                 input=list_process.stdout,
@@ -741,24 +1060,19 @@ def collect_github_issue_details(
                 check=True,
                 capture_output=True,
             )
-            issue_numbers = json.loads(jq_process.stdout)
+            for issue_data in json.loads(jq_process.stdout):
+                issue_updated_at[issue_data["number"]] = issue_data.get("updatedAt")
         else:
-            print("    AVISO: Tentando parse simples sem jq (pode ser menos preciso).")
-            issue_numbers = []
-            raw_issues = json.loads(list_process.stdout)
-            for issue_data in raw_issues:
-                if (
-                    isinstance(issue_data, dict)
-                    and issue_data.get("stateReason") != "NOT_PLANNED"
-                ):
-                    if "number" in issue_data and isinstance(issue_data["number"], int):
-                        issue_numbers.append(issue_data["number"])
+            issue_updated_at = filter_planned_issues(json.loads(list_process.stdout))
+        issue_numbers = list(issue_updated_at)
 
     except (
         subprocess.CalledProcessError,
         FileNotFoundError,
         json.JSONDecodeError,
         ValueError,
+        KeyError,
+        TypeError,
     ) as e:
         print(f"  AVISO: Falha ao listar/filtrar issues: {e}", file=sys.stderr)
         write_warning_to_file(
@@ -775,31 +1089,152 @@ def collect_github_issue_details(
         )
         return
 
-    print(f"  Encontradas {len(issue_numbers)} issues para baixar detalhes...")
-    downloaded_count = 0
-    for issue_number in issue_numbers:
-        print(f"    Coletando detalhes da Issue #{issue_number}...")
-        issue_output_file = issues_dir / f"github_issue_{issue_number}_details.json"
-        view_cmd = [
-            "gh",
-            "issue",
-            "view",
-            str(issue_number),
-            "--json",
-            GH_ISSUE_JSON_FIELDS,
-        ]
-        exit_code, _, stderr_view = run_command(
-            view_cmd, issue_output_file, check=False
+    print(f"  Encontradas {len(issue_numbers)} issues.")
+    reused_issue_numbers: Set[int] = set()
+    previous_context_dir = find_second_latest_context_dir(issues_dir.parent)
+    if previous_context_dir:
+        reused_issue_numbers = reuse_unchanged_github_issues(
+            issue_updated_at, previous_context_dir, issues_dir, cli_args.verbose
         )
-        if exit_code == 0:
-            downloaded_count += 1
-        else:
+        print(
+            f"  {len(reused_issue_numbers)} issues inalteradas (updatedAt) reaproveitadas de '{previous_context_dir.name}'."
+        )
+
+    issues_to_download = [
+        issue_number
+        for issue_number in issue_numbers
+        if issue_number not in reused_issue_numbers
+    ]
+    issue_workers = max(
+        1, getattr(cli_args, "issue_workers", DEFAULT_GH_ISSUE_WORKERS) or 1
+    )
+    print(
+        f"  Baixando detalhes de {len(issues_to_download)} issues ({issue_workers} downloads simultâneos)..."
+    )
+    downloaded_count = download_github_issues(
+        issues_to_download, issues_dir, issue_workers
+    )
+    print(
+        f"  Coleta de {downloaded_count + len(reused_issue_numbers)}/{len(issue_numbers)} issues concluída ({len(reused_issue_numbers)} reaproveitadas, {downloaded_count} baixadas)."
+    )
+
+
+def load_issue_updated_at_from_snapshot(context_dir: Path) -> Dict[int, str]:
+    """Lê {número: updatedAt} dos github_issue_*_details.json de um snapshot anterior."""
+    updated_at_by_number: Dict[int, str] = {}
+    for details_file in context_dir.glob("github_issue_*_details.json"):
+        try:
+            issue_data = json.loads(details_file.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue  # Download que falhou no snapshot anterior: baixa de novo
+        if not isinstance(issue_data, dict):
+            continue
+        number, updated_at = issue_data.get("number"), issue_data.get("updatedAt")
+        if (
+            isinstance(number, int)
+            and updated_at
+            and details_file.name == f"github_issue_{number}_details.json"
+        ):
+            updated_at_by_number[number] = updated_at
+    return updated_at_by_number
+
+
+def reuse_unchanged_github_issues(
+    issue_updated_at: Dict[int, Optional[str]],
+    previous_context_dir: Path,
+    issues_dir: Path,
+    verbose: bool = False,
+) -> Set[int]:
+    """
+    Reaproveita (hard link ou cópia) os detalhes das issues cujo updatedAt
+    atual é igual ao gravado no snapshot anterior. Retorna os números reaproveitados.
+    """
+    previous_updated_at = load_issue_updated_at_from_snapshot(previous_context_dir)
+    reused: Set[int] = set()
+    for issue_number, updated_at in issue_updated_at.items():
+        if not updated_at or previous_updated_at.get(issue_number) != updated_at:
+            continue
+        file_name = f"github_issue_{issue_number}_details.json"
+        try:
+            method = link_or_copy_file(
+                previous_context_dir / file_name, issues_dir / file_name
+            )
+        except OSError as e:
             print(
-                f"    AVISO: Falha ao coletar detalhes da Issue #{issue_number} (Código: {exit_code}).",
+                f"    AVISO: Não foi possível reaproveitar a Issue #{issue_number}: {e}",
                 file=sys.stderr,
             )
-        time.sleep(0.2)
-    print(f"  Coleta de {downloaded_count}/{len(issue_numbers)} issues concluída.")
+            continue
+        reused.add(issue_number)
+        if verbose:
+            print(f"    Issue #{issue_number} inalterada ({method}): {file_name}")
+    return reused
+
+
+def filter_planned_issues(raw_issues: List[Any]) -> Dict[int, Optional[str]]:
+    """
+    {número: updatedAt} das issues de 'gh issue list --json', excluindo as
+    fechadas como 'not planned' (equivale ao filtro jq usado com --use-jq).
+    """
+    issue_updated_at: Dict[int, Optional[str]] = {}
+    for issue_data in raw_issues or []:
+        if (
+            isinstance(issue_data, dict)
+            and issue_data.get("stateReason") != "NOT_PLANNED"
+            and isinstance(issue_data.get("number"), int)
+        ):
+            issue_updated_at[issue_data["number"]] = issue_data.get("updatedAt")
+    return issue_updated_at
+
+
+def _download_github_issue(issue_number: int, issues_dir: Path) -> int:
+    print(f"    Coletando detalhes da Issue #{issue_number}...")
+    issue_output_file = issues_dir / f"github_issue_{issue_number}_details.json"
+    view_cmd = [
+        "gh",
+        "issue",
+        "view",
+        str(issue_number),
+        "--json",
+        GH_ISSUE_JSON_FIELDS,
+    ]
+    exit_code, _, _ = run_command(view_cmd, issue_output_file, check=False)
+    if exit_code != 0:
+        print(
+            f"    AVISO: Falha ao coletar detalhes da Issue #{issue_number} (Código: {exit_code}).",
+            file=sys.stderr,
+        )
+    # Pausa por worker para não disparar o limite secundário da API do GitHub
+    time.sleep(0.2)
+    return exit_code
+
+
+def download_github_issues(
+    issue_numbers: List[int], issues_dir: Path, max_workers: int
+) -> int:
+    """
+    Baixa 'gh issue view' de cada issue com até max_workers chamadas
+    simultâneas, gravando github_issue_{N}_details.json. Retorna quantas
+    issues foram baixadas com sucesso.
+    """
+    if max_workers <= 1 or len(issue_numbers) <= 1:
+        return sum(
+            1
+            for issue_number in issue_numbers
+            if _download_github_issue(issue_number, issues_dir) == 0
+        )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            # copy_context: os logs dos workers vão para o buffer do estágio
+            executor.submit(
+                contextvars.copy_context().run,
+                _download_github_issue,
+                issue_number,
+                issues_dir,
+            )
+            for issue_number in issue_numbers
+        ]
+        return sum(1 for future in futures if future.result() == 0)
 
 
 def _run_phpstan_stage(
@@ -813,6 +1248,7 @@ def _run_phpstan_stage(
         run_command(
             [str(PHPSTAN_BIN), "analyse", "--no-progress", "--memory-limit=2G"],
             phpstan_file,
+            stream_to_file=True,
         )
     else:
         warning_msg = suggest_install("PHPStan/Larastan", "larastan/larastan --dev")
@@ -857,8 +1293,16 @@ def run_tests(  # PHPUnit
     print(f"[{step_num}/{total_steps}] Executando testes PHPUnit (php artisan test)...")
     phpunit_output_file = output_dir / PHPUNIT_OUTPUT_FILE_NAME
     if ARTISAN_FILE.is_file() and command_exists("php"):
+        test_args, processes = core_utils.phpunit_parallel_args(
+            getattr(cli_args, "phpunit_processes", 1) if cli_args else 1
+        )
+        if processes > 1:
+            print(f"  Modo paralelo: {processes} processos (paratest).")
         exit_code, _, stderr = run_command(
-            ARTISAN_CMD + ["test", "--env=testing"], phpunit_output_file, check=False
+            ARTISAN_CMD + ["test", "--env=testing"] + test_args,
+            phpunit_output_file,
+            check=False,
+            stream_to_file=True,
         )
         try:
             with open(phpunit_output_file, "a", encoding="utf-8") as f:
@@ -914,7 +1358,11 @@ def _run_dusk_tests_internal(output_dir: Path, step_num: int, total_steps: int):
             file=sys.stderr,
         )
     exit_code, _, stderr = run_command(
-        ARTISAN_CMD + ["dusk"], dusk_output_file, check=False, timeout=1200
+        ARTISAN_CMD + ["dusk"],
+        dusk_output_file,
+        check=False,
+        timeout=1200,
+        stream_to_file=True,
     )
     try:
         with open(dusk_output_file, "a", encoding="utf-8") as f:
@@ -985,7 +1433,9 @@ def run_python_tests(
         print(f"  {warning_msg}", file=sys.stderr)
         return
     test_cmd = [PYTHON_CMD, "-m", "pytest", "--live", "-v", "tests/python"]
-    exit_code, stdout, stderr = run_command(test_cmd, pytest_output_file, check=False)
+    exit_code, stdout, stderr = run_command(
+        test_cmd, pytest_output_file, check=False, stream_to_file=True
+    )
     try:
         if pytest_output_file.exists():
             with open(pytest_output_file, "a", encoding="utf-8") as f:
@@ -1012,6 +1462,21 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_env_info,
         "description": "Environment information (OS, PHP, Node)",
         "needs_cli_args": False,
+        "fingerprint": {
+            # Entradas baratas: rodar 'php -m' etc. aqui duplicaria o estágio
+            "files": [
+                "/etc/os-release",
+                "/etc/lsb-release",
+                "/etc/php/*/cli/php.ini",
+                "/etc/php/*/cli/conf.d/*.ini",
+                "/usr/local/etc/php/php.ini",
+                "/usr/local/etc/php/conf.d/*.ini",
+            ],
+            "binaries": ["php", "node", "npm"],
+            "uname": True,
+        },
+        "depends_on": [],
+        "resources": [],
         "outputs": [
             "env_uname.txt",
             "env_distro_info.txt",
@@ -1025,6 +1490,26 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_python_env_info,
         "description": "Python environment details",
         "needs_cli_args": False,
+        "fingerprint": {
+            "files": [
+                "requirements.txt",
+                "requirements-dev.txt",
+                "Pipfile",
+                "pyproject.toml",
+            ],
+            "binaries": [PYTHON_CMD, PIP_CMD],
+            "commands": [
+                # mtime dos site-packages muda a cada pacote instalado/removido
+                [
+                    PYTHON_CMD,
+                    "-c",
+                    "import os, site; print([(p, os.stat(p).st_mtime_ns) for p in site.getsitepackages() if os.path.isdir(p)])",
+                ],
+            ],
+            "env_vars": ["VIRTUAL_ENV"],
+        },
+        "depends_on": [],
+        "resources": [],
         "outputs": [
             "env_python_version.txt",
             "env_python_which.txt",
@@ -1041,6 +1526,8 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_git_info,
         "description": "Git repository information (log, diffs, status)",
         "needs_cli_args": True,
+        "depends_on": [],
+        "resources": [],
         "outputs": [
             "git_log.txt",
             "git_diff_empty_tree_to_head.txt",
@@ -1055,6 +1542,8 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_gh_info,
         "description": "GitHub general info (repo, actions, PRs, releases)",
         "needs_cli_args": True,
+        "depends_on": [],
+        "resources": ["network"],
         "outputs": [
             "gh_run_list.txt",
             "gh_workflow_list.txt",
@@ -1072,12 +1561,16 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_gh_project_info,
         "description": "GitHub Project items status",
         "needs_cli_args": True,
+        "depends_on": [],
+        "resources": ["network"],
         "outputs": ["gh_project_items_status.json", "gh_project_items_summary.json"],
     },
     "artisan": {
         "func": collect_artisan_info,
         "description": "Laravel Artisan command outputs",
         "needs_cli_args": False,
+        "depends_on": [],
+        "resources": ["db"],
         "outputs": [
             "artisan_route_list.json",
             "artisan_route_list.txt",
@@ -1100,18 +1593,44 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": collect_dependency_info,
         "description": "Project dependencies (Composer, NPM, Pip)",
         "needs_cli_args": False,
+        "fingerprint": {
+            "files": [
+                "composer.json",
+                "composer.lock",
+                "vendor/composer/installed.json",
+                "package.json",
+                "package-lock.json",
+                "node_modules/.package-lock.json",
+            ],
+            "binaries": ["composer", "npm"],
+        },
+        "depends_on": [],
+        "resources": [],
         "outputs": ["composer_show.txt", "npm_list_depth0.txt"],
     },
     "structure": {
         "func": collect_structure_info,
         "description": "Project structure (tree, cloc)",
         "needs_cli_args": True,
+        "fingerprint": {
+            "commands": [
+                ["git", "ls-files", "-s"],
+                ["git", "status", "--porcelain", "--untracked-files=all"],
+                ["git", "diff", "HEAD"],
+            ],
+            "binaries": ["tree", "cloc"],
+            "args": ["tree_depth"],
+        },
+        "depends_on": [],
+        "resources": ["cpu"],
         "outputs": ["project_tree_L*.txt", "project_cloc.txt"],
     },
     "github_issues": {
         "func": collect_github_issue_details,
         "description": "Details of specific GitHub issues",
         "needs_cli_args": True,
+        "depends_on": [],
+        "resources": ["network"],
         "outputs": [
             "github_issue_*_details.json",
             "github_issues_skipped.log",
@@ -1123,36 +1642,48 @@ STAGES_CONFIG: Dict[str, Dict[str, Any]] = {
         "func": copy_project_files,
         "description": "Copies plans and meta-prompts",
         "needs_cli_args": False,
+        "depends_on": [],
+        "resources": [],
         "outputs": ["*.txt"],
     },
     "phpstan": {
         "func": _run_phpstan_stage,
         "description": "PHPStan static analysis results",
         "needs_cli_args": False,
+        "depends_on": [],
+        "resources": ["cpu"],
         "outputs": ["phpstan_analysis.txt"],
     },
     "pint": {
         "func": _run_pint_stage,
         "description": "Pint code style check results",
         "needs_cli_args": False,
+        "depends_on": [],
+        "resources": ["cpu"],
         "outputs": ["pint_test_results.txt"],
     },
     "phpunit": {
         "func": run_tests,
         "description": "PHPUnit test results",
-        "needs_cli_args": False,
+        "needs_cli_args": True,
+        "depends_on": [],
+        "resources": ["db", "cpu"],
         "outputs": [PHPUNIT_OUTPUT_FILE_NAME],
     },
     "dusk": {
         "func": _run_dusk_suite_stage,
         "description": "Dusk browser test results and info",
         "needs_cli_args": False,
+        "depends_on": ["phpunit"],
+        "resources": ["db", "cpu"],
         "outputs": [DUSK_OUTPUT_FILE_NAME, DUSK_INFO_FILE_NAME],
     },
     "pytest": {
         "func": run_python_tests,
         "description": "Pytest (Python tests) results",
         "needs_cli_args": False,
+        "depends_on": [],
+        "resources": ["cpu", "network"],
         "outputs": [PYTEST_OUTPUT_FILE_NAME],
     },
 }
@@ -1160,6 +1691,242 @@ NUM_COLLECTION_STAGES = len(STAGES_CONFIG)
 NUM_FINALIZATION_STEPS = 3
 
 
+class _StageOutputRouter:
+    """
+    Substitui sys.stdout/sys.stderr durante a execução paralela: o que um
+    estágio escreve vai para o buffer dele (em ordem, com o stream de destino);
+    o resto segue direto para o stream original.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def write(self, text: str) -> int:
+        chunks = _stage_output_chunks.get()
+        if chunks is None:
+            return self._target.write(text)
+        chunks.append((self._target, text))
+        return len(text)
+
+    def flush(self) -> None:
+        if _stage_output_chunks.get() is None:
+            self._target.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+def _stage_ready(
+    stage_name: str,
+    stage_config_data: Dict[str, Any],
+    active_stage_names: Set[str],
+    finished: Set[str],
+    resources_in_use: Dict[str, int],
+) -> bool:
+    for dependency in stage_config_data.get("depends_on", []):
+        # Dependências não selecionadas nesta execução não bloqueiam o estágio
+        if dependency in active_stage_names and dependency not in finished:
+            return False
+    return all(
+        resources_in_use.get(resource, 0) < STAGE_RESOURCE_LIMITS.get(resource, 1)
+        for resource in stage_config_data.get("resources", [])
+    )
+
+
+def schedule_stages(
+    active_stages_config: Dict[str, Dict[str, Any]],
+    max_jobs: int,
+    run_stage: Callable[[str, Dict[str, Any]], Any],
+) -> Dict[str, Any]:
+    """
+    Executa run_stage(nome, config) para cada estágio respeitando 'depends_on'
+    (entre os estágios ativos), os limites de STAGE_RESOURCE_LIMITS por classe
+    de recurso e no máximo max_jobs estágios simultâneos. Estágios prontos são
+    iniciados na ordem de STAGES_CONFIG. Retorna {nome: resultado}; exceções
+    de run_stage são propagadas ao final.
+    """
+    active_stage_names = set(active_stages_config)
+    pending = list(active_stages_config)
+    finished: Set[str] = set()
+    results: Dict[str, Any] = {}
+    resources_in_use: Dict[str, int] = {}
+    running: Dict[Future, str] = {}
+    max_jobs = max(1, max_jobs)
+
+    with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+        while pending or running:
+            for stage_name in list(pending):
+                if len(running) >= max_jobs:
+                    break
+                stage_config_data = active_stages_config[stage_name]
+                if not _stage_ready(
+                    stage_name,
+                    stage_config_data,
+                    active_stage_names,
+                    finished,
+                    resources_in_use,
+                ):
+                    continue
+                for resource in stage_config_data.get("resources", []):
+                    resources_in_use[resource] = resources_in_use.get(resource, 0) + 1
+                pending.remove(stage_name)
+                running[executor.submit(run_stage, stage_name, stage_config_data)] = (
+                    stage_name
+                )
+            if not running:
+                # Dependência circular ou recurso com limite 0: roda o próximo em série
+                stage_name = pending.pop(0)
+                results[stage_name] = run_stage(
+                    stage_name, active_stages_config[stage_name]
+                )
+                finished.add(stage_name)
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage_name = running.pop(future)
+                for resource in active_stages_config[stage_name].get("resources", []):
+                    resources_in_use[resource] -= 1
+                finished.add(stage_name)
+                results[stage_name] = future.result()
+    return results
+
+
+def _binary_fingerprint(binary: Optional[str]) -> str:
+    """Caminho real, mtime_ns, size e inode do executável no PATH (sem executá-lo)."""
+    resolved = shutil.which(binary) if binary else None
+    if not resolved:
+        return "<ausente>"
+    real_path = os.path.realpath(resolved)
+    try:
+        stat_result = os.stat(real_path)
+    except OSError:
+        return f"{real_path}:<erro stat>"
+    return f"{real_path}:{stat_result.st_mtime_ns}:{stat_result.st_size}:{stat_result.st_ino}"
+
+
+def compute_stage_fingerprint(
+    stage_config_data: Dict[str, Any], cli_args: Optional[argparse.Namespace]
+) -> Optional[str]:
+    """
+    sha256 das entradas declaradas em stage_config_data["fingerprint"]:
+    conteúdo dos arquivos ('files', globs relativos a BASE_DIR), caminho e
+    stat dos executáveis ('binaries', troca/atualização de ferramentas sem
+    executá-las), os.uname() ('uname'), saída dos comandos ('commands'),
+    variáveis de ambiente ('env_vars') e argumentos de CLI ('args'). None se
+    o estágio não declara fingerprint (nunca é cacheado).
+    """
+    spec = stage_config_data.get("fingerprint")
+    if not spec:
+        return None
+    digest = hashlib.sha256()
+    for pattern in spec.get("files", []):
+        matches = sorted(glob.glob(str(BASE_DIR / pattern), recursive=True))
+        if not matches:
+            digest.update(f"file:{pattern}:<ausente>\n".encode("utf-8"))
+        for match in matches:
+            if os.path.isfile(match):
+                digest.update(
+                    f"file:{match}:{_file_sha256(Path(match))}\n".encode("utf-8")
+                )
+    for binary in spec.get("binaries", []):
+        digest.update(f"bin:{binary}:{_binary_fingerprint(binary)}\n".encode("utf-8"))
+    if spec.get("uname"):
+        digest.update(f"uname:{tuple(os.uname())}\n".encode("utf-8"))
+    for cmd_list in spec.get("commands", []):
+        if not all(cmd_list):  # Ex: PYTHON_CMD/PIP_CMD não encontrados
+            digest.update(f"cmd:{cmd_list}:<indisponível>\n".encode("utf-8"))
+            continue
+        try:
+            process = subprocess.run(
+                cmd_list,
+                capture_output=True,
+                cwd=BASE_DIR,
+                timeout=STAGE_FINGERPRINT_COMMAND_TIMEOUT,
+            )
+            digest.update(f"cmd:{cmd_list}:{process.returncode}\n".encode("utf-8"))
+            digest.update(process.stdout)
+            digest.update(process.stderr)
+        except (OSError, subprocess.SubprocessError) as e:
+            digest.update(f"cmd:{cmd_list}:<erro {type(e).__name__}>\n".encode("utf-8"))
+    for env_var in spec.get("env_vars", []):
+        digest.update(f"env:{env_var}={os.environ.get(env_var)}\n".encode("utf-8"))
+    for arg_name in spec.get("args", []):
+        digest.update(
+            f"arg:{arg_name}={getattr(cli_args, arg_name, None)}\n".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+def load_stage_cache(output_base_dir: Path) -> Dict[str, Dict[str, Any]]:
+    cache_file = output_base_dir / STAGE_CACHE_FILE_NAME
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_stage_cache(output_base_dir: Path, cache: Dict[str, Dict[str, Any]]):
+    cache_file = output_base_dir / STAGE_CACHE_FILE_NAME
+    try:
+        cache_file.write_text(json.dumps(cache, indent=2) + "\n", encoding="utf-8")
+    except OSError as e:
+        print(
+            f"  AVISO: Não foi possível salvar o cache de estágios '{cache_file}': {e}",
+            file=sys.stderr,
+        )
+
+
+def _stage_output_files(stage_config_data: Dict[str, Any], run_dir: Path) -> List[str]:
+    """Nomes dos arquivos de run_dir que casam com os 'outputs' do estágio."""
+    if not run_dir.is_dir():
+        return []
+    return sorted(
+        item.name
+        for item in run_dir.iterdir()
+        if item.is_file()
+        and any(
+            fnmatch.fnmatch(item.name, pattern)
+            for pattern in stage_config_data.get("outputs", [])
+        )
+    )
+
+
+def restore_cached_stage(
+    cache_entry: Optional[Dict[str, Any]],
+    fingerprint: Optional[str],
+    output_base_dir: Path,
+    output_dir_current_run: Path,
+    writer_stages: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """
+    Se o fingerprint bate com o da entrada de cache e todos os arquivos
+    registrados ainda existem no diretório de origem, vincula-os (hard link ou
+    cópia) no diretório atual e retorna o nome do diretório de origem.
+    Arquivos que casam com os 'outputs' de writer_stages (estágios que ainda
+    vão rodar) são copiados, nunca vinculados.
+    """
+    if not fingerprint or not cache_entry:
+        return None
+    if cache_entry.get("fingerprint") != fingerprint:
+        return None
+    source_dir = output_base_dir / str(cache_entry.get("run_dir", ""))
+    files = cache_entry.get("files") or []
+    if (
+        not files
+        or source_dir == output_dir_current_run
+        or not all((source_dir / name).is_file() for name in files)
+    ):
+        return None
+    for name in files:
+        link_or_copy_file(
+            source_dir / name,
+            output_dir_current_run / name,
+            copy=matches_stage_outputs(name, writer_stages or {}),
+        )
+    return source_dir.name
+
+
 def run_all_collections(
     output_dir_current_run: Path, timestamp: str, args: argparse.Namespace
 ):
@@ -1177,7 +1944,6 @@ def run_all_collections(
     )
 
     effective_total_collection_steps = len(active_stages_config)
-    current_collection_step = 0
 
     executed_stage_names: List[str] = []
     copied_stage_names: List[str] = []
@@ -1253,10 +2019,17 @@ def run_all_collections(
                     for source_file in files_to_copy_from_previous:
                         dest_file = output_dir_current_run / source_file.name
                         try:
-                            shutil.copy2(source_file, dest_file)
+                            # Cópia própria se um estágio ativo pode reescrever o arquivo
+                            copy_method = link_or_copy_file(
+                                source_file,
+                                dest_file,
+                                copy=matches_stage_outputs(
+                                    source_file.name, active_stages_config
+                                ),
+                            )
                             if args.verbose:
                                 print(
-                                    f"      Copiado (fallback): {source_file.name} -> {dest_file.name}"
+                                    f"      Copiado (fallback, {copy_method}): {source_file.name} -> {dest_file.name}"
                                 )
                             copied_any_for_this_stage = True
                         except Exception as e_copy:
@@ -1289,14 +2062,70 @@ def run_all_collections(
         print(
             f"\n--- Executando {effective_total_collection_steps} estágios selecionados ---"
         )
-    for stage_name, stage_config_data in active_stages_config.items():
-        current_collection_step += 1
-        print(
-            f"\n[{current_collection_step}/{effective_total_collection_steps}] Executando estágio: {stage_name} ({stage_config_data['description']})..."
-        )
+    # Numeração dos passos segue a ordem de STAGES_CONFIG, mesmo em paralelo
+    stage_step_numbers: Dict[str, int] = {
+        name: index for index, name in enumerate(active_stages_config.keys(), start=1)
+    }
+
+    # Cache de estágios: reutiliza saídas anteriores se o fingerprint não mudou
+    output_base_dir = output_dir_current_run.parent
+    use_stage_cache = not getattr(args, "no_stage_cache", False)
+    stage_cache = load_stage_cache(output_base_dir) if use_stage_cache else {}
+    stage_fingerprints: Dict[str, str] = {}
+    cached_stage_sources: Dict[str, str] = {}
+    stages_to_execute: Dict[str, Dict[str, Any]] = dict(active_stages_config)
+    if use_stage_cache:
+        for stage_name, stage_config_data in active_stages_config.items():
+            fingerprint = compute_stage_fingerprint(stage_config_data, args)
+            if fingerprint is None:
+                continue
+            stage_fingerprints[stage_name] = fingerprint
+            try:
+                cache_source = restore_cached_stage(
+                    stage_cache.get(stage_name),
+                    fingerprint,
+                    output_base_dir,
+                    output_dir_current_run,
+                    {
+                        name: config
+                        for name, config in active_stages_config.items()
+                        if name != stage_name
+                    },
+                )
+            except OSError as e:
+                print(
+                    f"  AVISO: Falha ao reutilizar cache do estágio '{stage_name}': {e}",
+                    file=sys.stderr,
+                )
+                cache_source = None
+            if cache_source:
+                cached_stage_sources[stage_name] = cache_source
+                del stages_to_execute[stage_name]
+                print(
+                    f"\n[{stage_step_numbers[stage_name]}/{effective_total_collection_steps}] Estágio: {stage_name} ({stage_config_data['description']}) -> cached (fingerprint inalterado, saídas de '{cache_source}')."
+                )
+
+    max_stage_jobs = max(1, getattr(args, "jobs", DEFAULT_STAGE_JOBS) or 1)
+    parallel_stages = max_stage_jobs > 1 and len(stages_to_execute) > 1
+    stage_output_lock = threading.Lock()
+    live_stdout = sys.stdout
+
+    def _run_stage(stage_name: str, stage_config_data: Dict[str, Any]) -> bool:
+        current_collection_step = stage_step_numbers[stage_name]
+        stage_header = f"\n[{current_collection_step}/{effective_total_collection_steps}] Executando estágio: {stage_name} ({stage_config_data['description']})..."
+        if parallel_stages:
+            _stage_output_chunks.set([])
+            if args.verbose:
+                with stage_output_lock:
+                    live_stdout.write(
+                        f"  -> Iniciando estágio em paralelo: {stage_name}\n"
+                    )
+        print(stage_header)
+        stage_start_time = time.monotonic()
 
         func_to_call: Callable = stage_config_data["func"]
 
+        succeeded = False
         try:
             if stage_config_data["needs_cli_args"]:
                 func_to_call(
@@ -1311,13 +2140,69 @@ def run_all_collections(
                     current_collection_step,
                     effective_total_collection_steps,
                 )
-            executed_stage_names.append(stage_name)
+            succeeded = True
         except Exception as e_stage:
             print(
                 f"    ERRO INESPERADO no estágio '{stage_name}': {e_stage}",
                 file=sys.stderr,
             )
             traceback.print_exc(file=sys.stderr)
+        finally:
+            if parallel_stages:
+                print(
+                    f"  Estágio '{stage_name}' concluído em {time.monotonic() - stage_start_time:.2f}s."
+                )
+                chunks = _stage_output_chunks.get()
+                _stage_output_chunks.set(None)
+                # Despeja o log do estágio de uma vez para não intercalar saídas
+                with stage_output_lock:
+                    for target_stream, text in chunks:
+                        target_stream.write(text)
+                    for target_stream in {stream for stream, _ in chunks}:
+                        target_stream.flush()
+        return succeeded
+
+    if parallel_stages:
+        print(
+            f"  Scheduler de estágios: até {max_stage_jobs} estágios em paralelo (limites por recurso: {STAGE_RESOURCE_LIMITS})."
+        )
+        original_stdout, original_stderr = sys.stdout, sys.stderr
+        sys.stdout = _StageOutputRouter(original_stdout)
+        sys.stderr = _StageOutputRouter(original_stderr)
+        try:
+            stage_results = schedule_stages(
+                stages_to_execute, max_stage_jobs, _run_stage
+            )
+        finally:
+            sys.stdout, sys.stderr = original_stdout, original_stderr
+    else:
+        stage_results = {
+            stage_name: _run_stage(stage_name, stage_config_data)
+            for stage_name, stage_config_data in stages_to_execute.items()
+        }
+    executed_stage_names.extend(
+        stage_name
+        for stage_name in active_stages_config
+        if stage_results.get(stage_name)
+    )
+
+    if stage_fingerprints:
+        for stage_name, fingerprint in stage_fingerprints.items():
+            if stage_name in cached_stage_sources:
+                stage_cache[stage_name]["run_dir"] = output_dir_current_run.name
+            elif stage_name in executed_stage_names:
+                stage_files = _stage_output_files(
+                    active_stages_config[stage_name], output_dir_current_run
+                )
+                if stage_files:
+                    stage_cache[stage_name] = {
+                        "fingerprint": fingerprint,
+                        "run_dir": output_dir_current_run.name,
+                        "files": stage_files,
+                    }
+            else:
+                stage_cache.pop(stage_name, None)
+        save_stage_cache(output_base_dir, stage_cache)
 
     if active_stages_config:
         print("\n--- Coleta Seletiva de Contexto Concluída ---")
@@ -1327,6 +2212,10 @@ def run_all_collections(
         for stage_name_ordered in STAGES_CONFIG.keys():
             if stage_name_ordered in executed_stage_names:
                 print(f"  - Estágio '{stage_name_ordered}': EXECUTADO")
+            elif stage_name_ordered in cached_stage_sources:
+                print(
+                    f"  - Estágio '{stage_name_ordered}': CACHED (fingerprint inalterado, saídas reutilizadas de '{cached_stage_sources[stage_name_ordered]}')"
+                )
             elif stage_name_ordered in copied_stage_names:
                 print(
                     f"  - Estágio '{stage_name_ordered}': COPIADO (fallback do anterior)"
@@ -1368,6 +2257,89 @@ def run_all_collections(
     )
     generate_manifest_md(output_dir_current_run, timestamp)
 
+    if not getattr(args, "no_blob_store", False):
+        blob_store_dir = output_dir_current_run.parent / BLOB_STORE_DIR_NAME
+        print(
+            f"[{'Final'}] Deduplicando arquivos do contexto no blob store '{BLOB_STORE_DIR_NAME}'..."
+        )
+        blob_stats = store_snapshot_in_blob_store(
+            output_dir_current_run, blob_store_dir, args.verbose
+        )
+        print(
+            f"  {blob_stats['files']} arquivos: {blob_stats['new_blobs']} blobs novos, {blob_stats['deduplicated']} já existentes ({blob_stats['bytes_saved'] / 1024:.1f} KiB economizados), {blob_stats['pruned']} blobs órfãos removidos."
+        )
+
+
+def _file_sha256(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(BLOB_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_snapshot_in_blob_store(
+    snapshot_dir: Path, blob_store_dir: Path, verbose: bool = False
+) -> Dict[str, int]:
+    """
+    Move o conteúdo de snapshot_dir para o blob store endereçado por sha256:
+    cada arquivo vira um hard link para blob_store_dir/<2 hex>/<resto>,
+    reutilizando o blob se o mesmo conteúdo já existe (execuções anteriores).
+    Os blobs mantêm o modo original: um modo somente leitura seria herdado
+    por cópias (shutil.copy2) dos arquivos do snapshot.
+    Blobs sem nenhum snapshot apontando (nlink == 1) são removidos.
+    """
+    stats = {
+        "files": 0,
+        "new_blobs": 0,
+        "deduplicated": 0,
+        "bytes_saved": 0,
+        "pruned": 0,
+    }
+    if not snapshot_dir.is_dir():
+        return stats
+    for file_path in sorted(snapshot_dir.iterdir()):
+        if not file_path.is_file() or file_path.is_symlink():
+            continue
+        stats["files"] += 1
+        try:
+            digest = _file_sha256(file_path)
+            blob_path = blob_store_dir / digest[:2] / digest[2:]
+            if blob_path.is_file():
+                if os.path.samefile(file_path, blob_path):
+                    stats["deduplicated"] += 1
+                    continue
+                tmp_link = file_path.with_name(file_path.name + ".blob_tmp")
+                if tmp_link.exists():
+                    tmp_link.unlink()
+                os.link(blob_path, tmp_link)
+                os.replace(tmp_link, file_path)
+                stats["deduplicated"] += 1
+                stats["bytes_saved"] += blob_path.stat().st_size
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.link(file_path, blob_path)
+                stats["new_blobs"] += 1
+            if verbose:
+                print(
+                    f"    {file_path.name} -> {BLOB_STORE_DIR_NAME}/{digest[:2]}/{digest[2:12]}..."
+                )
+        except OSError as e:
+            # Ex: sistema de arquivos sem hard links; o arquivo fica como cópia própria
+            print(
+                f"  AVISO: Não foi possível deduplicar '{file_path.name}' no blob store: {e}",
+                file=sys.stderr,
+            )
+    if blob_store_dir.is_dir():
+        for blob_path in blob_store_dir.glob("*/*"):
+            try:
+                if blob_path.is_file() and blob_path.stat().st_nlink == 1:
+                    blob_path.unlink()
+                    stats["pruned"] += 1
+            except OSError:
+                continue
+    return stats
+
 
 def invoke_manifest_generator(
     output_dir: Path, timestamp: str, args: argparse.Namespace
@@ -1527,6 +2499,34 @@ def setup_arg_parser() -> argparse.ArgumentParser:
         f"Estágios disponíveis: {', '.join(STAGES_CONFIG.keys())}",
         default=None,
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_STAGE_JOBS,
+        help=f"Número máximo de estágios executados em paralelo, respeitando dependências e recursos (db, network, cpu) de cada estágio. Use 1 para execução sequencial (default: {DEFAULT_STAGE_JOBS})",
+    )
+    parser.add_argument(
+        "--no-blob-store",
+        action="store_true",
+        help=f"Não deduplica os arquivos do contexto no blob store '{BLOB_STORE_DIR_NAME}/' (hard links por conteúdo).",
+    )
+    parser.add_argument(
+        "--no-stage-cache",
+        action="store_true",
+        help="Executa todos os estágios selecionados mesmo se o fingerprint das entradas (lockfiles, versões de ferramentas) não mudou desde a execução anterior.",
+    )
+    parser.add_argument(
+        "--use-jq",
+        action="store_true",
+        help="Usa o jq (se instalado) para filtrar a lista de issues e gerar o resumo do GitHub Project, em vez do processamento interno em Python.",
+    )
+    parser.add_argument(
+        "--phpunit-processes",
+        type=int,
+        default=1,
+        help="Processos do PHPUnit em paralelo (php artisan test --parallel, requer paratest). 0 = número de CPUs, 1 = sem paralelismo (default: 1)",
+    )
     parser.add_argument(
         "--tree-depth",
         type=int,
@@ -1539,6 +2539,12 @@ def setup_arg_parser() -> argparse.ArgumentParser:
         default=DEFAULT_GH_ISSUE_LIST_LIMIT,
         help=f"Maximum number of GitHub issues to fetch details for (default: {DEFAULT_GH_ISSUE_LIST_LIMIT})",
     )
+    parser.add_argument(
+        "--issue-workers",
+        type=int,
+        default=DEFAULT_GH_ISSUE_WORKERS,
+        help=f"Maximum number of concurrent 'gh issue view' downloads (default: {DEFAULT_GH_ISSUE_WORKERS})",
+    )
     parser.add_argument(
         "--tag-limit",
         type=int,
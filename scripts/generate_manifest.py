@@ -14,32 +14,42 @@
 # NOVO: PERSISTE o summary para arquivos context_llm/code/* mesmo se o hash mudar.
 #
 # Uso:
-#   python scripts/generate_manifest.py [-o output.json] [-i ignore_pattern] [-v] [--sleep SLEEP_SECONDS] [--timeout TIMEOUT_SECONDS]
+#   python scripts/generate_manifest.py [-o output.json] [-i ignore_pattern] [-v] [-j N] [--incremental] [--sleep SLEEP_SECONDS] [--timeout TIMEOUT_SECONDS] [--no-sqlite] [--rehash] [--rpm RPM] [--workers N]
 #
 # Argumentos:
 #   -o, --output OUTPUT_PATH   Caminho para o arquivo JSON de saída.
 #   -i, --ignore IGNORE_PATTERN Padrão (glob), diretório ou arquivo a ignorar.
 #   -v, --verbose              Habilita logging mais detalhado.
-#   --sleep SLEEP_SECONDS      Segundos de espera entre chamadas à API count_tokens (padrão: 0.5).
+#   --sleep SLEEP_SECONDS      Intervalo mínimo entre chamadas count_tokens da MESMA chave (padrão: 0.5).
 #   --timeout TIMEOUT_SECONDS  Timeout em segundos para a chamada API count_tokens (padrão: 6).
+#   -j, --jobs N               Processos para o estágio de metadados por arquivo (padrão: 1).
+#   --incremental              Reprocessa só o que mudou desde o commit do manifesto anterior.
+#   --no-sqlite                Não grava o *_manifest.sqlite (formato compacto, leitura lazy).
+#   --rehash                   Ignora o fast path por stat() e recalcula o hash de todos os arquivos.
+#   --rpm RPM                  Limite de requisições/minuto por chave (padrão: MODEL_RPM_LIMITS do modelo).
+#   --workers N                Workers concorrentes para a contagem de tokens via API (padrão: 4).
 #   -h, --help                 Mostra esta mensagem de ajuda.
 # ==============================================================================
 
 import argparse
 import concurrent.futures
+import contextlib
 import datetime
 import hashlib
 import json
+import mmap
 import os
 import re
 import subprocess
 import sys
+import threading
 import time
 import traceback
 import shlex
 import shutil
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple, Set, Union
 from dotenv import load_dotenv
 
 # Importa diretamente o google.genai
@@ -49,6 +59,16 @@ from google.genai import errors as google_genai_errors
 from google.api_core import exceptions as google_api_core_exceptions
 from tqdm import tqdm  # Adicionado para barra de progresso no sleep
 
+# Adiciona o diretório raiz do projeto ao sys.path para importar llm_core
+_project_root_dir_for_script = Path(__file__).resolve().parent.parent
+if str(_project_root_dir_for_script) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_script))
+
+from scripts.llm_core import config as core_config
+from scripts.llm_core import manifest_store
+from scripts.llm_core import token_cache
+from scripts.llm_core import token_estimator
+
 # --- Constantes Globais ---
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "scripts" / "data"
@@ -146,25 +166,29 @@ BINARY_EXTENSIONS = {
     ".dat",
 }
 TEXTCHARS = bytes(range(32, 127)) + b"\n\r\t\f\b"
+BINARY_CHECK_CHUNK_SIZE = 512
+MMAP_THRESHOLD_BYTES = 1024 * 1024  # Arquivos a partir deste tamanho são lidos via mmap
+PHP_DEPENDENCY_FILE_TYPE_PREFIXES = ("code_php_", "migration_php", "test_php_")
+STAT_FINGERPRINT_KEYS = ("mtime_ns", "size", "inode")
+CONTEXT_CODE_PREFIX = "context_llm/code/"
 GEMINI_MODEL_NAME = "gemini-1.5-flash"  # Modelo para contagem de tokens
 DEFAULT_INTER_CALL_SLEEP = 0.5
 DEFAULT_RATE_LIMIT_SLEEP = 5.0
 DEFAULT_API_TIMEOUT_SECONDS = 6
+DEFAULT_TOKEN_COUNT_WORKERS = 4
 
 # --- Variáveis Globais ---
 repo_owner: Optional[str] = None
 GEMINI_API_KEYS_LIST: List[str] = []
-current_api_key_index: int = 0
-genai_client: Optional[genai.Client] = None
 api_key_loaded: bool = False
 gemini_initialized: bool = False
-api_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+api_key_pool: Optional["ApiKeyPool"] = None
 
 
 # --- Funções Auxiliares ---
 # (Funções auxiliares como run_command, parse_arguments, setup_logging, get_default_output_filepath,
 # find_latest_context_code_dir, is_likely_binary, load_api_keys, initialize_gemini,
-# rotate_api_key_and_reinitialize, extract_php_dependencies, get_file_type,
+# extract_php_dependencies, get_file_type,
 # scan_project_files, filter_files, count_tokens_for_file, get_git_versioned_status
 # permanecem essencialmente as mesmas da versão 1.23.0 - OMITIDAS PARA BREVIDADE,
 # mas mantendo a lógica de tratamento de erros e logging)
@@ -237,7 +261,7 @@ def parse_arguments() -> argparse.Namespace:
         "--sleep",
         type=float,
         default=DEFAULT_INTER_CALL_SLEEP,
-        help=f"Segundos de espera entre chamadas à API count_tokens (padrão: {DEFAULT_INTER_CALL_SLEEP}).",
+        help=f"Intervalo mínimo em segundos entre chamadas count_tokens da mesma chave (padrão: {DEFAULT_INTER_CALL_SLEEP}).",
     )
     parser.add_argument(
         "--timeout",
@@ -245,6 +269,41 @@ def parse_arguments() -> argparse.Namespace:
         default=DEFAULT_API_TIMEOUT_SECONDS,
         help=f"Timeout em segundos para a chamada API count_tokens (padrão: {DEFAULT_API_TIMEOUT_SECONDS}).",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Número de processos para o estágio de metadados por arquivo (hash, binário, dependências). Padrão: 1 (serial).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reprocessa apenas o que mudou desde o commit registrado no manifesto anterior (git diff + varredura por stat dos diretórios fora do git).",
+    )
+    parser.add_argument(
+        "--no-sqlite",
+        dest="no_sqlite",
+        action="store_true",
+        help="Não grava o manifesto compacto *_manifest.sqlite ao lado do JSON.",
+    )
+    parser.add_argument(
+        "--rehash",
+        action="store_true",
+        help="Ignora o fast path por stat() (mtime/size/inode) e relê/recalcula hash de todos os arquivos.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Limite de requisições por minuto por chave de API (padrão: MODEL_RPM_LIMITS do modelo).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_TOKEN_COUNT_WORKERS,
+        help=f"Número de workers concorrentes para a contagem de tokens via API (padrão: {DEFAULT_TOKEN_COUNT_WORKERS}).",
+    )
     return parser.parse_args()
 
 
@@ -275,31 +334,42 @@ def find_latest_context_code_dir(context_base_dir: Path) -> Optional[Path]:
     return sorted(valid_context_dirs, reverse=True)[0]
 
 
-def is_likely_binary(file_path: Path, verbose: bool) -> bool:
-    """Verifica se um arquivo é provavelmente binário."""
+def _chunk_looks_binary(chunk: bytes, verbose: bool) -> bool:
+    """Heurística de binário (AC6) sobre os primeiros bytes de um arquivo."""
+    if not chunk:
+        return False
+    if b"\0" in chunk:
+        if verbose:
+            print(f"      -> Binary Check (AC6): Positive (null byte found)")
+        return True
+    non_text_count = sum(1 for byte in chunk if bytes([byte]) not in TEXTCHARS)
+    proportion = non_text_count / len(chunk) if len(chunk) > 0 else 0
+    is_bin = proportion > 0.30
+    if is_bin and verbose:
+        print(
+            f"      -> Binary Check (AC6): Positive (high proportion of non-text bytes: {proportion:.1%})"
+        )
+    return is_bin
+
+
+def _has_binary_extension(file_path: Path, verbose: bool) -> bool:
     if file_path.suffix.lower() in BINARY_EXTENSIONS:
         if verbose:
             print(
                 f"      -> Binary Check (AC6): Positive (extension '{file_path.suffix}')"
             )
         return True
+    return False
+
+
+def is_likely_binary(file_path: Path, verbose: bool) -> bool:
+    """Verifica se um arquivo é provavelmente binário."""
+    if _has_binary_extension(file_path, verbose):
+        return True
     try:
         with open(file_path, "rb") as f:
-            chunk = f.read(512)
-        if not chunk:
-            return False
-        if b"\0" in chunk:
-            if verbose:
-                print(f"      -> Binary Check (AC6): Positive (null byte found)")
-            return True
-        non_text_count = sum(1 for byte in chunk if bytes([byte]) not in TEXTCHARS)
-        proportion = non_text_count / len(chunk) if len(chunk) > 0 else 0
-        is_bin = proportion > 0.30
-        if is_bin and verbose:
-            print(
-                f"      -> Binary Check (AC6): Positive (high proportion of non-text bytes: {proportion:.1%})"
-            )
-        return is_bin
+            chunk = f.read(BINARY_CHECK_CHUNK_SIZE)
+        return _chunk_looks_binary(chunk, verbose)
     except Exception as e:
         if verbose:
             print(
@@ -309,14 +379,252 @@ def is_likely_binary(file_path: Path, verbose: bool) -> bool:
         return False
 
 
-def load_previous_manifest(data_dir: Path, verbose: bool) -> Dict[str, Any]:
-    """Carrega o dicionário 'files' do manifesto anterior mais recente."""
+def get_stat_fingerprint(file_path: Path) -> Optional[Dict[str, int]]:
+    """Retorna mtime_ns, size e inode do arquivo, ou None se stat() falhar."""
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return {
+        "mtime_ns": stat_result.st_mtime_ns,
+        "size": stat_result.st_size,
+        "inode": stat_result.st_ino,
+    }
+
+
+def stored_stat_fingerprint(
+    previous_file_data: Dict[str, Any],
+) -> Optional[Dict[str, int]]:
+    """Fingerprint (mtime_ns/size/inode) gravado numa entrada do manifesto, se completo."""
+    if not previous_file_data or any(
+        previous_file_data.get(key) is None for key in STAT_FINGERPRINT_KEYS
+    ):
+        return None
+    return {key: previous_file_data[key] for key in STAT_FINGERPRINT_KEYS}
+
+
+def can_reuse_previous_entry(
+    previous_file_data: Dict[str, Any],
+    file_type: str,
+    stat_fingerprint: Optional[Dict[str, int]],
+    api_counting_enabled: bool = False,
+) -> bool:
+    """
+    Fast path: o arquivo não mudou desde o manifesto anterior se tipo, mtime_ns,
+    size e inode coincidem. Entradas com hash mas sem token_count são
+    reprocessadas para que a contagem seja refeita, assim como, com a API
+    disponível (api_counting_enabled), as que só têm uma estimativa local.
+    """
+    if not previous_file_data or stat_fingerprint is None:
+        return False
+    if (
+        api_counting_enabled
+        and previous_file_data.get("token_count_source") == "estimate"
+        and file_type != "environment_env"
+        and not file_type.startswith("context_code_")
+    ):
+        return False
+    if previous_file_data.get("type") != file_type:
+        return False
+    if any(
+        previous_file_data.get(key) != stat_fingerprint[key]
+        for key in STAT_FINGERPRINT_KEYS
+    ):
+        return False
+    return not (
+        previous_file_data.get("hash") is not None
+        and previous_file_data.get("token_count") is None
+    )
+
+
+@contextlib.contextmanager
+def open_file_buffer(file_path: Path) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Lê o arquivo uma única vez. Arquivos grandes (>= MMAP_THRESHOLD_BYTES) são
+    mapeados em memória; os demais são lidos por inteiro. O buffer é liberado
+    ao sair do bloco.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD_BYTES:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+        else:
+            yield f.read()
+
+
+@dataclass
+class FileProcessingResult:
+    """Dados derivados de uma única leitura do arquivo no loop do manifesto."""
+
+    is_binary: bool = False
+    hash: Optional[str] = None
+    text: Optional[str] = None
+    dependencies: List[str] = field(default_factory=list)
+    estimated_token_count: Optional[int] = None
+    read_error: Optional[str] = None
+
+
+def process_file_single_read(
+    file_path_absolute: Path, file_type: str, verbose: bool, keep_text: bool = True
+) -> FileProcessingResult:
+    """
+    Unidade de processamento por arquivo: lê os bytes uma vez e deriva a
+    detecção de binário (AC6), o hash SHA1 (AC10/11), o texto decodificado
+    (payload da contagem de tokens), a estimativa local de tokens e as
+    dependências PHP (AC22). Com keep_text=False o texto é descartado ao final.
+    """
+    result = FileProcessingResult()
+    if _has_binary_extension(file_path_absolute, verbose):
+        result.is_binary = True
+        return result
+
+    should_calculate_hash = file_type != "environment_env" and not file_type.startswith(
+        "context_code_"
+    )
+    try:
+        with open_file_buffer(file_path_absolute) as buffer:
+            result.is_binary = _chunk_looks_binary(
+                buffer[:BINARY_CHECK_CHUNK_SIZE], verbose
+            )
+            if result.is_binary:
+                return result
+            if should_calculate_hash:
+                result.hash = hashlib.sha1(buffer).hexdigest()
+            content_size = len(buffer)
+            result.text = buffer[:].decode("utf-8", errors="ignore")
+    except Exception as e:
+        result.read_error = str(e)
+        if verbose:
+            print(
+                f"      -> Read (AC6/10): Error reading file content bytes: {e}",
+                file=sys.stderr,
+            )
+        return result
+
+    if file_type.startswith(PHP_DEPENDENCY_FILE_TYPE_PREFIXES):
+        try:
+            result.dependencies = extract_php_dependencies(result.text)
+        except Exception as e:
+            if verbose:
+                print(
+                    f"      -> Dependencies (AC22): Error extracting: {e}",
+                    file=sys.stderr,
+                )
+            result.dependencies = []
+    # Mesmo tamanho (bytes) que llm_core.context usa a partir do st_size
+    result.estimated_token_count = token_estimator.estimate_tokens_for_size(
+        content_size, file_type
+    )
+    if not keep_text:
+        result.text = None
+    return result
+
+
+def _process_file_worker(
+    job: Tuple[str, str, str, bool],
+) -> Tuple[str, FileProcessingResult]:
+    """Função de nível de módulo (picklable) executada pelos workers do --jobs."""
+    relative_path_str, file_path_absolute_str, file_type, verbose = job
+    return relative_path_str, process_file_single_read(
+        Path(file_path_absolute_str), file_type, verbose, keep_text=False
+    )
+
+
+def process_files(
+    jobs: List[Tuple[str, Path, str]], max_jobs: int, verbose: bool
+) -> Dict[str, FileProcessingResult]:
+    """
+    Estágio de metadados por arquivo (binário, hash, dependências, estimativa).
+    Com max_jobs > 1 distribui os arquivos em um pool de processos; o resultado
+    é indexado pelo path relativo, de modo que a ordem de conclusão não afeta
+    o manifesto final.
+    """
+    worker_jobs = [
+        (relative_path_str, str(file_path_absolute), file_type, verbose)
+        for relative_path_str, file_path_absolute, file_type in jobs
+    ]
+    if max_jobs <= 1 or len(worker_jobs) <= 1:
+        return dict(_process_file_worker(job) for job in worker_jobs)
+
+    chunksize = max(1, len(worker_jobs) // (max_jobs * 8))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_jobs) as executor:
+        return dict(
+            tqdm(
+                executor.map(_process_file_worker, worker_jobs, chunksize=chunksize),
+                total=len(worker_jobs),
+                desc="Processando arquivos",
+                unit="arq",
+                leave=False,
+            )
+        )
+
+
+def build_context_code_basename_index(
+    files_data: Dict[str, Any],
+) -> Dict[str, List[str]]:
+    """
+    Índice secundário basename -> caminhos context_llm/code/<timestamp>/<basename>
+    do manifesto anterior, do timestamp mais recente para o mais antigo.
+    Guarda apenas os dois mais recentes: o segundo só é necessário quando o
+    primeiro pertence ao mesmo diretório de contexto que está sendo processado.
+    """
+    index: Dict[str, List[Tuple[str, str]]] = {}
+    for path_str in files_data:
+        if not path_str.startswith(CONTEXT_CODE_PREFIX):
+            continue
+        parent_str, _, basename = path_str.rpartition("/")
+        timestamp_dir = parent_str.rpartition("/")[2]
+        candidates = index.setdefault(basename, [])
+        candidates.append((timestamp_dir, path_str))
+        if len(candidates) > 2:
+            candidates.sort(reverse=True)
+            del candidates[2:]
+    return {
+        basename: [path_str for _, path_str in sorted(candidates, reverse=True)]
+        for basename, candidates in index.items()
+    }
+
+
+def find_previous_context_code_path(
+    basename_index: Dict[str, List[str]], file_path_relative: Path
+) -> Optional[str]:
+    """
+    Retorna o caminho, no manifesto anterior, da versão mais recente de um
+    arquivo context_code_* com o mesmo nome, ignorando o próprio diretório de
+    timestamp (caso de rerodagem sem novo contexto).
+    """
+    for candidate in basename_index.get(file_path_relative.name, []):
+        if Path(candidate).parent.name != file_path_relative.parent.name:
+            return candidate
+    return None
+
+
+def load_previous_manifest(
+    data_dir: Path, verbose: bool
+) -> Tuple[Dict[str, Any], Dict[str, List[str]], Dict[str, Any]]:
+    """
+    Carrega o dicionário 'files' do manifesto anterior mais recente, o índice
+    secundário por basename dos arquivos context_llm/code/* e o '_metadata'
+    (usado pelo modo --incremental).
+    """
+    files_data, metadata = _load_previous_manifest_data(data_dir, verbose)
+    return files_data, build_context_code_basename_index(files_data), metadata
+
+
+def _load_previous_manifest_data(
+    data_dir: Path, verbose: bool
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Carrega 'files' e '_metadata' do manifesto anterior mais recente."""
     if not data_dir.is_dir():
         if verbose:
             print(
                 "  Aviso: Diretório de dados do manifesto não encontrado, não é possível carregar dados anteriores."
             )
-        return {}
+        return {}, {}
     manifest_files = [
         f
         for f in data_dir.glob("*_manifest.json")
@@ -325,12 +633,22 @@ def load_previous_manifest(data_dir: Path, verbose: bool) -> Dict[str, Any]:
     if not manifest_files:
         if verbose:
             print("  Aviso: Nenhum arquivo de manifesto anterior encontrado.")
-        return {}
+        return {}, {}
     latest_manifest_path = sorted(manifest_files, reverse=True)[0]
     if verbose:
         print(
             f"  Encontrado manifesto anterior: '{latest_manifest_path.relative_to(PROJECT_ROOT)}'"
         )
+    sqlite_manifest = manifest_store.open_manifest_sqlite(
+        manifest_store.sqlite_path_for(latest_manifest_path),
+        source_json_path=latest_manifest_path,
+    )
+    if sqlite_manifest is not None:
+        if verbose:
+            print(
+                f"  Manifesto anterior aberto via SQLite (lazy, {len(sqlite_manifest['files'])} arquivos)."
+            )
+        return sqlite_manifest["files"], sqlite_manifest["_metadata"]
     try:
         with open(latest_manifest_path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -343,24 +661,29 @@ def load_previous_manifest(data_dir: Path, verbose: bool) -> Dict[str, Any]:
                 print(
                     f"  Manifesto anterior carregado com sucesso ({len(data['files'])} arquivos)."
                 )
-            return data["files"]
+            metadata = data.get("_metadata")
+            return data["files"], metadata if isinstance(metadata, dict) else {}
         else:
             if verbose:
                 print(
                     "  Aviso: Formato inesperado no manifesto anterior ou chave 'files' ausente/inválida."
                 )
-            return {}
+            return {}, {}
     except Exception as e:
         if verbose:
             print(
                 f"  Erro ao carregar ou parsear manifesto anterior '{latest_manifest_path.name}': {e}",
                 file=sys.stderr,
             )
-        return {}
+        return {}, {}
 
 
 def get_git_versioned_status(filepath_relative: Path, verbose: bool) -> bool:
-    """Checks if a specific file is tracked by Git using ls-files."""
+    """
+    Checks if a specific file is tracked by Git using ls-files.
+    Spawns one subprocess per call; the main loop uses the index returned by
+    scan_project_files() instead.
+    """
     try:
         exit_code, _, stderr = run_command(
             ["git", "ls-files", "--error-unmatch", filepath_relative.as_posix()],
@@ -377,23 +700,47 @@ def get_git_versioned_status(filepath_relative: Path, verbose: bool) -> bool:
         return False  # Assume not versioned on error
 
 
+def parse_git_ls_files_tagged(stdout_ls: str) -> List[Tuple[str, bool]]:
+    """
+    Interpreta a saída de 'git ls-files -z -t' em pares (path, versionado).
+    A tag '?' marca arquivos não rastreados (-o); qualquer outra tag (H, S, ...)
+    indica um arquivo presente no índice do Git.
+    """
+    entries: List[Tuple[str, bool]] = []
+    for record in filter(None, stdout_ls.split("\0")):
+        tag, sep, path_str = record.partition(" ")
+        if not sep or len(tag) != 1 or not path_str:
+            continue
+        entries.append((path_str, tag != "?"))
+    return entries
+
+
 def scan_project_files(verbose: bool) -> Tuple[Set[Path], Set[Path]]:
-    """Escaneia o projeto por arquivos, priorizando git e incluindo dirs específicos."""
+    """
+    Escaneia o projeto por arquivos, priorizando git e incluindo dirs específicos.
+    Retorna (todos os arquivos, arquivos versionados). O índice de versionamento é
+    obtido da mesma chamada 'git ls-files' usada no scan, evitando um subprocesso
+    por arquivo no loop principal.
+    """
     all_files_set: Set[Path] = set()
+    versioned_files_set: Set[Path] = set()
     if verbose:
-        print("  Executando 'git ls-files -z -c -o --exclude-standard'...")
+        print("  Executando 'git ls-files -z -t -c -o --exclude-standard'...")
     exit_code_ls, stdout_ls, stderr_ls = run_command(
-        ["git", "ls-files", "-z", "-c", "-o", "--exclude-standard"], check=False
+        ["git", "ls-files", "-z", "-t", "-c", "-o", "--exclude-standard"],
+        check=False,
     )
     if exit_code_ls == 0 and stdout_ls:
-        tracked_paths = filter(None, stdout_ls.split("\0"))
-        for path_str in tracked_paths:
+        for path_str, is_tracked in parse_git_ls_files_tagged(stdout_ls):
             try:
                 absolute_path = (PROJECT_ROOT / Path(path_str)).resolve(strict=True)
                 if absolute_path.is_file() and absolute_path.is_relative_to(
                     PROJECT_ROOT
                 ):
-                    all_files_set.add(absolute_path.relative_to(PROJECT_ROOT))
+                    relative_path = absolute_path.relative_to(PROJECT_ROOT)
+                    all_files_set.add(relative_path)
+                    if is_tracked:
+                        versioned_files_set.add(relative_path)
             except Exception as e:
                 if verbose:
                     print(
@@ -406,18 +753,35 @@ def scan_project_files(verbose: bool) -> Tuple[Set[Path], Set[Path]]:
             file=sys.stderr,
         )
     if verbose:
-        print(f"  Arquivos iniciais via Git: {len(all_files_set)}")
+        print(
+            f"  Arquivos iniciais via Git: {len(all_files_set)} ({len(versioned_files_set)} versionados)"
+        )
 
+    all_files_set.update(scan_additional_dirs(verbose))
+    if verbose:
+        print(
+            f"  Total de arquivos únicos encontrados após scans: {len(all_files_set)}"
+        )
+    return all_files_set, versioned_files_set
+
+
+def get_additional_scan_dirs() -> List[Path]:
+    """Diretórios fora do git (ou forçados) incluídos por varredura de filesystem."""
     additional_scan_dirs: List[Path] = [CONTEXT_COMMON_DIR]
     latest_context_code_dir = find_latest_context_code_dir(CONTEXT_CODE_DIR)
     if latest_context_code_dir:
         additional_scan_dirs.append(latest_context_code_dir)
     additional_scan_dirs.extend(VENDOR_USPDEV_DIRS)
     additional_scan_dirs.append(PROJECT_ROOT / "docs" / "laravel_12")
+    return additional_scan_dirs
 
+
+def scan_additional_dirs(verbose: bool) -> Set[Path]:
+    """Varre os diretórios de get_additional_scan_dirs() e retorna paths relativos."""
+    found_files: Set[Path] = set()
     if verbose:
         print("  Realizando scans adicionais em diretórios específicos...")
-    for scan_dir in additional_scan_dirs:
+    for scan_dir in get_additional_scan_dirs():
         abs_scan_dir = scan_dir.resolve(strict=False)
         if verbose:
             print(f"    Escaneando: {abs_scan_dir.relative_to(PROJECT_ROOT)}")
@@ -430,7 +794,7 @@ def scan_project_files(verbose: bool) -> Tuple[Set[Path], Set[Path]]:
                         relative_path = item.resolve(strict=True).relative_to(
                             PROJECT_ROOT
                         )
-                        all_files_set.add(relative_path)
+                        found_files.add(relative_path)
                 except Exception as e:
                     if verbose:
                         print(
@@ -441,11 +805,123 @@ def scan_project_files(verbose: bool) -> Tuple[Set[Path], Set[Path]]:
             print(
                 f"      Aviso: Diretório de scan adicional não existe: {abs_scan_dir}"
             )
-    if verbose:
+    return found_files
+
+
+def get_git_head_state(verbose: bool) -> Tuple[Optional[str], List[str]]:
+    """
+    Retorna (commit HEAD, paths versionados que diferem de HEAD na working tree).
+    Ambos são gravados no _metadata para servir de base ao modo --incremental.
+    """
+    exit_code, stdout, stderr = run_command(["git", "rev-parse", "HEAD"], check=False)
+    if exit_code != 0 or not stdout.strip():
+        if verbose:
+            print(
+                f"  Aviso: 'git rev-parse HEAD' falhou: {stderr.strip()}",
+                file=sys.stderr,
+            )
+        return None, []
+    head_commit = stdout.strip()
+    exit_code, stdout, _ = run_command(
+        ["git", "diff", "--name-only", "-z", "--no-renames", "HEAD"], check=False
+    )
+    dirty_paths = sorted(p for p in stdout.split("\0") if p) if exit_code == 0 else []
+    return head_commit, dirty_paths
+
+
+def parse_git_diff_name_status(stdout_diff: str) -> List[Tuple[str, str]]:
+    """Parseia a saída de 'git diff --name-status -z --no-renames' em (status, path)."""
+    fields = [field for field in stdout_diff.split("\0") if field]
+    return [(fields[i][:1], fields[i + 1]) for i in range(0, len(fields) - 1, 2)]
+
+
+def scan_project_files_incremental(
+    previous_files_data: Dict[str, Any],
+    previous_metadata: Dict[str, Any],
+    verbose: bool,
+) -> Optional[Tuple[Set[Path], Set[Path], Set[str]]]:
+    """
+    Modo --incremental: deriva a lista de arquivos do manifesto anterior e do
+    'git diff' desde o commit registrado em seu _metadata, sem 'git ls-files'.
+    Retorna (todos os arquivos, versionados, paths a reprocessar) ou None quando
+    não há base utilizável (o chamador então faz o scan completo).
+    Arquivos não versionados e os diretórios de get_additional_scan_dirs() são
+    sempre reprocessados (varredura por stat, com o fast path de mtime/size/inode).
+    """
+    base_commit = previous_metadata.get("git_commit")
+    if not previous_files_data or not base_commit:
         print(
-            f"  Total de arquivos únicos encontrados após scans: {len(all_files_set)}"
+            "  Aviso (incremental): Manifesto anterior ausente ou sem 'git_commit'. Usando scan completo."
         )
-    return all_files_set, set()  # versioned_files_set is now determined later
+        return None
+    exit_code, _, _ = run_command(
+        ["git", "cat-file", "-e", f"{base_commit}^{{commit}}"], check=False
+    )
+    if exit_code != 0:
+        print(
+            f"  Aviso (incremental): Commit base '{base_commit}' não encontrado. Usando scan completo."
+        )
+        return None
+
+    exit_code, stdout_diff, stderr_diff = run_command(
+        ["git", "diff", "--name-status", "-z", "--no-renames", base_commit],
+        check=False,
+    )
+    if exit_code != 0:
+        print(
+            f"  Aviso (incremental): 'git diff' falhou ({stderr_diff.strip()}). Usando scan completo."
+        )
+        return None
+    exit_code, stdout_untracked, _ = run_command(
+        ["git", "ls-files", "-z", "-o", "--exclude-standard"], check=False
+    )
+    untracked_paths = {p for p in stdout_untracked.split("\0") if p}
+
+    deleted_paths: Set[str] = set()
+    changed_tracked_paths: Set[str] = set()
+    for status, path_str in parse_git_diff_name_status(stdout_diff):
+        if status == "D":
+            deleted_paths.add(path_str)
+        else:
+            changed_tracked_paths.add(path_str)
+    # Paths que já diferiam do commit base quando o manifesto anterior foi gerado
+    previously_dirty_paths = set(previous_metadata.get("git_dirty_paths") or [])
+
+    all_files_set: Set[Path] = set()
+    versioned_files_set: Set[Path] = set()
+    # Manifesto SQLite: uma única consulta em vez de um SELECT por caminho
+    previous_entries = (
+        previous_files_data.iter_entries()
+        if isinstance(previous_files_data, manifest_store.SqliteManifestFiles)
+        else previous_files_data.items()
+    )
+    for path_str, previous_entry in previous_entries:
+        if path_str in deleted_paths:
+            continue
+        if previous_entry.get("versioned"):
+            all_files_set.add(Path(path_str))
+            versioned_files_set.add(Path(path_str))
+    for path_str in changed_tracked_paths | (previously_dirty_paths - deleted_paths):
+        if (PROJECT_ROOT / path_str).is_file():
+            all_files_set.add(Path(path_str))
+            if path_str not in untracked_paths:
+                versioned_files_set.add(Path(path_str))
+    for path_str in untracked_paths:
+        if (PROJECT_ROOT / path_str).is_file():
+            all_files_set.add(Path(path_str))
+    additional_files = scan_additional_dirs(verbose)
+    all_files_set.update(additional_files)
+
+    dirty_paths = (
+        changed_tracked_paths
+        | previously_dirty_paths
+        | untracked_paths
+        | {p.as_posix() for p in additional_files}
+    )
+    print(
+        f"  Incremental desde {base_commit[:12]}: {len(changed_tracked_paths)} alterados, {len(deleted_paths)} removidos, {len(untracked_paths)} não versionados."
+    )
+    return all_files_set, versioned_files_set, dirty_paths
 
 
 def filter_files(
@@ -739,7 +1215,7 @@ def get_file_type(relative_path: Path) -> str:
 
 def load_api_keys(verbose: bool) -> bool:
     """Loads API keys from .env file."""
-    global GEMINI_API_KEYS_LIST, api_key_loaded, current_api_key_index
+    global GEMINI_API_KEYS_LIST, api_key_loaded
     if api_key_loaded:
         return True
     dotenv_path = PROJECT_ROOT / ".env"
@@ -766,73 +1242,177 @@ def load_api_keys(verbose: bool) -> bool:
         )
         api_key_loaded = False
         return False
-    current_api_key_index = 0
     api_key_loaded = True
     if verbose:
         print(f"  {len(GEMINI_API_KEYS_LIST)} Chave(s) de API GEMINI carregadas.")
     return True
 
 
-def initialize_gemini(verbose: bool) -> bool:
-    """Initializes the Gemini client using the current API key."""
-    global genai_client, gemini_initialized, GEMINI_API_KEYS_LIST, current_api_key_index
-    if gemini_initialized:
+class TokenBucket:
+    """
+    Token bucket para limitar a taxa de chamadas de uma única chave de API.
+    Não é thread-safe por si só; o ApiKeyPool serializa o acesso.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_second = max(rate_per_minute, 0.0) / 60.0
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        """Segundos até que um token esteja disponível (0 se disponível agora)."""
+        now = self.clock()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1.0:
+            return 0.0
+        if self.rate_per_second <= 0:
+            return float("inf")
+        return (1.0 - self.tokens) / self.rate_per_second
+
+    def try_consume(self) -> bool:
+        if self.wait_time() > 0:
+            return False
+        self.tokens -= 1.0
         return True
-    if (
-        not api_key_loaded
-        or not GEMINI_API_KEYS_LIST
-        or not (0 <= current_api_key_index < len(GEMINI_API_KEYS_LIST))
+
+    def penalize(self, seconds: float) -> None:
+        """Bloqueia a chave por 'seconds' (ex: após um erro 429) e esvazia o balde."""
+        now = self.clock()
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class ApiKeyPool:
+    """
+    Distribui chamadas count_tokens entre as chaves de GEMINI_API_KEYS_LIST,
+    com um TokenBucket por chave compartilhado por todos os workers.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        rate_per_minute: float,
+        timeout_seconds: int,
+        client_factory: Optional[Callable[..., Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
     ):
+        if not api_keys:
+            raise ValueError("ApiKeyPool requer ao menos uma chave de API.")
+        self.api_keys = list(api_keys)
+        self.timeout_seconds = timeout_seconds
+        self.client_factory = client_factory or genai.Client
+        self.buckets = [TokenBucket(rate_per_minute, clock=clock) for _ in api_keys]
+        self.clients: Dict[int, Any] = {}
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.api_keys)
+
+    def acquire(self, exclude: Optional[Set[int]] = None) -> Optional[int]:
+        """
+        Bloqueia até que alguma chave (fora de 'exclude') tenha um token livre e
+        retorna seu índice. Retorna None se todas as chaves estiverem excluídas.
+        """
+        exclude = exclude or set()
+        candidates = [i for i in range(len(self.api_keys)) if i not in exclude]
+        if not candidates:
+            return None
+        while True:
+            with self.lock:
+                waits = {i: self.buckets[i].wait_time() for i in candidates}
+                best_index = min(candidates, key=lambda i: (waits[i], i))
+                if waits[best_index] <= 0 and self.buckets[best_index].try_consume():
+                    return best_index
+                wait_seconds = waits[best_index]
+            self.sleep(min(max(wait_seconds, 0.01), 1.0))
+
+    def penalize(self, key_index: int, seconds: float) -> None:
+        with self.lock:
+            self.buckets[key_index].penalize(seconds)
+
+    def client_for(self, key_index: int) -> Any:
+        with self.lock:
+            client = self.clients.get(key_index)
+            if client is None:
+                client = self.client_factory(
+                    api_key=self.api_keys[key_index],
+                    http_options=types.HttpOptions(timeout=self.timeout_seconds * 1000),
+                )
+                self.clients[key_index] = client
+            return client
+
+
+def resolve_rate_per_minute(
+    rpm_override: Optional[float], sleep_seconds: float
+) -> float:
+    """
+    Taxa por chave: --rpm se informado, senão MODEL_RPM_LIMITS do modelo.
+    --sleep (> 0) impõe um intervalo mínimo adicional entre chamadas da mesma chave.
+    """
+    rate = (
+        float(rpm_override)
+        if rpm_override
+        else float(
+            core_config.MODEL_RPM_LIMITS.get(
+                GEMINI_MODEL_NAME, core_config.MODEL_RPM_LIMITS["default"]
+            )
+        )
+    )
+    if sleep_seconds and sleep_seconds > 0:
+        rate = min(rate, 60.0 / sleep_seconds)
+    return rate
+
+
+def initialize_gemini(
+    verbose: bool, rate_per_minute: float, timeout_seconds: int
+) -> bool:
+    """Cria o pool de chaves (um cliente GenAI e um TokenBucket por chave)."""
+    global api_key_pool, gemini_initialized
+    if gemini_initialized:
+        return True
+    if not api_key_loaded or not GEMINI_API_KEYS_LIST:
         if verbose:
             print(
-                "  Aviso: Chaves de API não carregadas ou índice inválido. Impossível inicializar Gemini."
+                "  Aviso: Chaves de API não carregadas. Impossível inicializar Gemini."
             )
         return False
-    active_key = GEMINI_API_KEYS_LIST[current_api_key_index]
     try:
         if verbose:
             print(
-                f"  Inicializando Google GenAI Client com Key Index {current_api_key_index}..."
+                f"  Inicializando Google GenAI Clients para {len(GEMINI_API_KEYS_LIST)} chave(s) ({rate_per_minute:.1f} RPM por chave)..."
             )
-        genai_client = genai.Client(api_key=active_key)
+        pool = ApiKeyPool(GEMINI_API_KEYS_LIST, rate_per_minute, timeout_seconds)
+        pool.client_for(0)
+        api_key_pool = pool
         print("  Google GenAI Client inicializado com sucesso.")
         gemini_initialized = True
         return True
     except Exception as e:
-        print(
-            f"Erro ao inicializar Google GenAI Client com Key Index {current_api_key_index}: {e}",
-            file=sys.stderr,
-        )
+        print(f"Erro ao inicializar Google GenAI Client: {e}", file=sys.stderr)
         if verbose:
             traceback.print_exc(file=sys.stderr)
         gemini_initialized = False
         return False
 
 
-def rotate_api_key_and_reinitialize(verbose: bool) -> bool:
-    """Rotates to the next API key and reinitializes the client."""
-    global current_api_key_index, GEMINI_API_KEYS_LIST, gemini_initialized
-    if not GEMINI_API_KEYS_LIST or len(GEMINI_API_KEYS_LIST) <= 1:
-        if verbose:
-            print(
-                "  Aviso: Não é possível rotacionar (apenas uma ou nenhuma chave disponível).",
-                file=sys.stderr,
-            )
-        return False
-    start_index = current_api_key_index
-    current_api_key_index = (current_api_key_index + 1) % len(GEMINI_API_KEYS_LIST)
-    print(
-        f"\n---> Rotacionando Chave de API para Índice {current_api_key_index} <---\n"
-    )
-    gemini_initialized = False  # Mark as uninitialized before trying the new key
-    if current_api_key_index == start_index:
-        print(
-            "Aviso: Ciclo completo por todas as chaves de API. Limites de taxa podem persistir.",
-            file=sys.stderr,
-        )
-    return initialize_gemini(verbose)
-
-
 def extract_php_dependencies(file_content: str) -> List[str]:
     """Extracts FQCNs from use statements in PHP code, excluding function/const."""
     dependencies = set()
@@ -855,235 +1435,352 @@ def extract_php_dependencies(file_content: str) -> List[str]:
     return sorted(list(dependencies))
 
 
-def count_tokens_for_file(
-    executor: Optional[concurrent.futures.ThreadPoolExecutor],  # Made Optional
-    filepath_absolute: Path,
+def _read_composer_psr4(
+    composer_json_path: Path, base_dir: Path
+) -> List[Tuple[str, str]]:
+    """Lê as regras PSR-4 (autoload e autoload-dev) de um composer.json."""
+    try:
+        composer_data = json.loads(composer_json_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return []
+    mappings: List[Tuple[str, str]] = []
+    for section in ("autoload", "autoload-dev"):
+        psr4_rules = (composer_data.get(section) or {}).get("psr-4") or {}
+        for namespace_prefix, directories in psr4_rules.items():
+            if isinstance(directories, str):
+                directories = [directories]
+            for directory in directories:
+                try:
+                    relative_dir = Path(
+                        os.path.normpath(base_dir / directory)
+                    ).relative_to(PROJECT_ROOT)
+                except ValueError:
+                    # Diretório fora do projeto (ex: '../lib/'): sem arquivos no manifesto
+                    continue
+                mappings.append((namespace_prefix, relative_dir.as_posix()))
+    return mappings
+
+
+def load_psr4_mappings(verbose: bool) -> List[Tuple[str, str]]:
+    """
+    Carrega as regras PSR-4 do composer.json do projeto e dos pacotes
+    vendor/uspdev incluídos no manifesto. Retorna (prefixo, diretório relativo)
+    ordenado do prefixo mais longo para o mais curto.
+    """
+    mappings = _read_composer_psr4(PROJECT_ROOT / "composer.json", PROJECT_ROOT)
+    for vendor_src_dir in VENDOR_USPDEV_DIRS:
+        package_dir = vendor_src_dir.parent
+        mappings.extend(_read_composer_psr4(package_dir / "composer.json", package_dir))
+    mappings.sort(key=lambda mapping: len(mapping[0]), reverse=True)
+    if verbose:
+        print(f"  Regras PSR-4 carregadas: {len(mappings)}")
+    return mappings
+
+
+def resolve_fqcn_to_path(
+    fqcn: str, psr4_mappings: List[Tuple[str, str]]
+) -> Optional[str]:
+    """Converte um FQCN no caminho relativo do arquivo PHP que o declara (PSR-4)."""
+    normalized_fqcn = fqcn.lstrip("\\")
+    for namespace_prefix, relative_dir in psr4_mappings:
+        if normalized_fqcn.startswith(namespace_prefix):
+            class_path = normalized_fqcn[len(namespace_prefix) :].replace("\\", "/")
+            if not class_path:
+                return None
+            base = relative_dir.rstrip("/")
+            return (
+                f"{base}/{class_path}.php"
+                if base and base != "."
+                else f"{class_path}.php"
+            )
+    return None
+
+
+def compute_dependents(
+    files_data: Dict[str, Dict[str, Any]],
+    psr4_mappings: List[Tuple[str, str]],
+    verbose: bool,
+) -> int:
+    """
+    Preenche 'dependents' de cada entrada invertendo 'dependencies' em uma
+    única passada O(total de arestas). Retorna o número de arestas resolvidas.
+    """
+    resolved_cache: Dict[str, Optional[str]] = {}
+    dependents_map: Dict[str, List[str]] = {}
+    edge_count = 0
+    for relative_path_str, metadata in files_data.items():
+        for fqcn in metadata.get("dependencies") or []:
+            if fqcn not in resolved_cache:
+                resolved_cache[fqcn] = resolve_fqcn_to_path(fqcn, psr4_mappings)
+            target_path = resolved_cache[fqcn]
+            if (
+                target_path is None
+                or target_path == relative_path_str
+                or target_path not in files_data
+            ):
+                continue
+            dependents_map.setdefault(target_path, []).append(relative_path_str)
+            edge_count += 1
+    for relative_path_str, metadata in files_data.items():
+        metadata["dependents"] = sorted(set(dependents_map.get(relative_path_str, [])))
+    if verbose:
+        print(
+            f"  Dependents (AC22): {edge_count} arestas resolvidas para {len(dependents_map)} arquivos."
+        )
+    return edge_count
+
+
+def estimate_token_count(content: str, file_type: Optional[str] = None) -> int:
+    """
+    Estimativa local de tokens usada quando a API não é chamada ou falha.
+    Usa o estimador calibrado por tipo compartilhado com llm_core.context
+    (0 para conteúdo vazio, como no contexto).
+    """
+    return token_estimator.estimate_tokens(content, file_type)
+
+
+def update_token_calibration(
+    files_data: Dict[str, Dict[str, Any]], verbose: bool
+) -> Optional[Path]:
+    """
+    Recalibra o estimador offline com as contagens da API do manifesto atual.
+    Tipos sem amostras suficientes mantêm a calibração gravada anteriormente.
+    Retorna o caminho salvo ou None se não houver amostras.
+    """
+    fitted = token_estimator.fit_calibration(files_data.items())
+    if not fitted["samples"]:
+        if verbose:
+            print("  Calibração de tokens: nenhuma contagem da API para ajustar.")
+        return None
+    stored = token_estimator.load_calibration(reload=True)
+    for group in ("types", "categories"):
+        fitted[group] = {**(stored.get(group) or {}), **fitted[group]}
+    calibration_path = token_estimator.save_calibration(fitted)
+    if verbose:
+        print(
+            f"  Calibração de tokens: {fitted['samples']} amostras, {len(fitted['types'])} tipos calibrados."
+        )
+    return calibration_path
+
+
+def update_token_cache(
+    cache: token_cache.TokenCountCache,
+    files_data: Dict[str, Dict[str, Any]],
+    project_root: Path,
+) -> Tuple[int, int]:
+    """
+    Grava no cache por hash de conteúdo as contagens da API (e de sumário)
+    do manifesto, para reuso pelas tarefas e por manifestos futuros, e
+    reconstrói o índice caminho -> hash consultado pelas tarefas.
+    Retorna (contagens gravadas, caminhos indexados).
+    """
+    count_entries = []
+    index_entries = []
+    for relative_path_str, metadata in files_data.items():
+        content_hash = metadata.get("hash")
+        if not content_hash:
+            continue
+        token_count = (
+            metadata.get("token_count")
+            if metadata.get("token_count_source") == "api"
+            else None
+        )
+        summary_token_count = metadata.get("summary_token_count")
+        count_entries.append(
+            (
+                content_hash,
+                token_count if isinstance(token_count, int) else None,
+                (summary_token_count if isinstance(summary_token_count, int) else None),
+            )
+        )
+        size, mtime_ns = metadata.get("size"), metadata.get("mtime_ns")
+        if isinstance(size, int) and isinstance(mtime_ns, int):
+            index_entries.append(
+                (
+                    os.path.abspath(project_root / relative_path_str),
+                    size,
+                    mtime_ns,
+                    content_hash,
+                )
+            )
+    return cache.put_many(count_entries), cache.replace_file_index(index_entries)
+
+
+def needs_api_token_count(
     file_type: str,
     previous_token_count: Optional[int],
     current_hash: Optional[str],
     previous_hash: Optional[str],
-    verbose: bool,
-    sleep_seconds: float,
-    timeout_seconds: int,
-) -> Optional[int]:
-    """Counts tokens with rate limit handling, key rotation, timeout, and specific type estimates."""
-    global genai_client
-
-    # --- AC1 #38 & AC2 #38: Estimate for .env* and context_code_* files ---
+) -> bool:
+    """Indica se o arquivo precisa de uma contagem nova via API (AC13/16)."""
     if file_type == "environment_env" or file_type.startswith("context_code_"):
-        try:
-            content = filepath_absolute.read_text(encoding="utf-8", errors="ignore")
-            token_count = max(1, int(len(content) / 4)) if content else 0
-            if verbose:
-                print(
-                    f"      -> Token Count (Estimate AC1/2): {token_count} (for {file_type})"
-                )
-            return token_count
-        except Exception as e:
-            if verbose:
-                print(
-                    f"      -> Token Count (Estimate AC1/2): Error reading '{filepath_absolute.name}' for estimation: {e}",
-                    file=sys.stderr,
-                )
-            return None
-
-    # Reuse previous count if hash matches (AC16)
-    if (
+        return False
+    return not (
         current_hash
         and previous_hash
         and current_hash == previous_hash
         and previous_token_count is not None
+    )
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    if isinstance(
+        error,
+        (
+            google_api_core_exceptions.ResourceExhausted,
+            google_genai_errors.ServerError,
+            google_api_core_exceptions.DeadlineExceeded,
+        ),
     ):
-        if verbose:
-            print(
-                f"      -> Token Count (AC16): Reusing previous count ({previous_token_count}) as hash matches."
-            )
-        return previous_token_count
+        return True
+    return (
+        isinstance(error, google_genai_errors.APIError)
+        and getattr(error, "code", None) == 429
+    )
 
-    # Check if Gemini client and executor are ready for API calls
-    if not gemini_initialized or not genai_client or not executor:
-        if verbose:
+
+def count_tokens_via_api(
+    key_pool: ApiKeyPool,
+    content: str,
+    display_name: str,
+    verbose: bool,
+    file_type: Optional[str] = None,
+) -> Tuple[int, str]:
+    """
+    Conta tokens via API usando a chave com token livre no pool. Em erro de
+    limite de taxa, penaliza a chave e tenta as demais; ao esgotar as chaves ou
+    em qualquer outro erro, recorre à estimativa local calibrada.
+    Retorna (contagem, origem), com origem "api" ou "estimate".
+    """
+    keys_tried: Set[int] = set()
+    while True:
+        key_index = key_pool.acquire(exclude=keys_tried)
+        if key_index is None:
             print(
-                f"      -> Token Count: Skipping API call (Gemini client/executor not ready). Estimating as fallback."
+                f"      Error: Ciclo completo de chaves API. Limite/Erro persistente para '{display_name}'. Estimating.",
+                file=sys.stderr,
             )
+            return estimate_token_count(content, file_type), "estimate"
+        keys_tried.add(key_index)
         try:
-            content = filepath_absolute.read_text(encoding="utf-8", errors="ignore")
-            token_count = max(1, int(len(content) / 4)) if content else 0
             if verbose:
                 print(
-                    f"      -> Token Count (Fallback Estimate due to no client/executor): Estimated tokens: {token_count}"
+                    f"        -> count_tokens para '{display_name}' com Key Index {key_index}"
                 )
-            return token_count
+            response = key_pool.client_for(key_index).models.count_tokens(
+                model=GEMINI_MODEL_NAME, contents=content
+            )
+            return response.total_tokens, "api"
         except Exception as e:
-            if verbose:
+            if _is_rate_limit_error(e):
                 print(
-                    f"      -> Token Count: Error reading file '{filepath_absolute.name}' for fallback estimation: {e}",
+                    f"      -> Rate Limit/Server Error ({type(e).__name__}) com Key Index {key_index}. Pausando a chave por {DEFAULT_RATE_LIMIT_SLEEP}s...",
                     file=sys.stderr,
                 )
-            return None
-
-    if verbose:
-        print(
-            f"      -> Token Count (AC13/16): API/Fallback counting needed for {filepath_absolute.name}"
-        )
-
-    content_for_api: Optional[str] = None
-    try:
-        content_for_api = filepath_absolute.read_text(encoding="utf-8", errors="ignore")
-    except (IOError, OSError) as e:
-        if verbose:
+                key_pool.penalize(key_index, DEFAULT_RATE_LIMIT_SLEEP)
+                continue
             print(
-                f"      -> Token Count (AC14): Error reading file '{filepath_absolute.name}' for API call: {e}",
+                f"      -> Token Count (AC18/19): API Call Error for '{display_name}': {type(e).__name__} - {e}. Estimating.",
                 file=sys.stderr,
             )
-        return None
-    except MemoryError:
+            return estimate_token_count(content, file_type), "estimate"
+
+
+def count_tokens_for_file(
+    estimated_token_count: Optional[int],
+    file_type: str,
+    previous_token_count: Optional[int],
+    current_hash: Optional[str],
+    previous_hash: Optional[str],
+    verbose: bool,
+) -> Optional[int]:
+    """
+    Contagem local de tokens para um arquivo: reutiliza a contagem anterior se
+    o hash não mudou (AC16), senão usa a estimativa calculada na leitura do
+    arquivo. Contagens via API são feitas em count_tokens_concurrently().
+    """
+    is_estimate_type = file_type == "environment_env" or file_type.startswith(
+        "context_code_"
+    )
+    if not is_estimate_type and not needs_api_token_count(
+        file_type, previous_token_count, current_hash, previous_hash
+    ):
         if verbose:
             print(
-                f"      -> Token Count (AC14): MemoryError reading large file '{filepath_absolute.name}' for API. Estimating.",
-                file=sys.stderr,
+                f"      -> Token Count (AC16): Reusing previous count ({previous_token_count}) as hash matches."
             )
-        try:
-            token_count = max(1, int(os.path.getsize(filepath_absolute) / 4))
-            if verbose:
-                print(
-                    f"      -> Token Count (AC20 Fallback for MemoryError): Estimated tokens: {token_count}"
-                )
-            return token_count
-        except Exception as estimate_e:
-            if verbose:
-                print(
-                    f"      -> Token Count: Error estimating size for MemoryError file: {estimate_e}",
-                    file=sys.stderr,
-                )
-            return None
+        return previous_token_count
 
-    if sleep_seconds > 0:
+    if estimated_token_count is None:
         if verbose:
-            print(f"      -> Sleeping for {sleep_seconds:.2f}s before API call...")
-        for _ in tqdm(
-            range(int(sleep_seconds * 10)),
-            desc="Waiting before API call",
-            unit="ds",
-            leave=False,
-            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}",
-        ):
-            time.sleep(0.1)
-
-    initial_key_index = current_api_key_index
-    keys_tried_in_this_call = {initial_key_index}
-    token_count = None
-
-    while True:
-
-        def _api_call_task(content_str: str) -> int:
-            """Makes the actual API call to count tokens via client."""
-            if not genai_client:
-                raise RuntimeError("Gemini client became uninitialized.")
-            try:
-                response = genai_client.models.count_tokens(
-                    model=GEMINI_MODEL_NAME, contents=content_str
-                )
-                return response.total_tokens
-            except Exception as inner_e:
-                print(
-                    f"      -> Erro interno na task API ({type(inner_e).__name__}): {inner_e}",
-                    file=sys.stderr,
-                )
-                raise inner_e
-
-        future = None
-        try:
-            if verbose:
-                print(
-                    f"        -> Attempting count_tokens with Key Index {current_api_key_index}, Timeout {timeout_seconds}s"
-                )
-            future = executor.submit(_api_call_task, content_for_api)
-            token_count = future.result(timeout=timeout_seconds)
-            if verbose:
-                print(
-                    f"      -> Token Count (AC13): Successfully counted via API: {token_count}"
-                )
-            return token_count
-
-        except concurrent.futures.TimeoutError:
             print(
-                f"      -> Token Count (AC19): API call timed out after {timeout_seconds}s for '{filepath_absolute.name}'. Estimating.",
+                f"      -> Token Count (AC14): No content available (read error).",
                 file=sys.stderr,
             )
-            token_count = (
-                max(1, int(len(content_for_api) / 4)) if content_for_api else 0
-            )
-            if verbose:
-                print(
-                    f"      -> Token Count (AC20 Fallback for Timeout): Estimated tokens: {token_count}"
-                )
-            return token_count
+        return None
 
-        except (
-            google_api_core_exceptions.ResourceExhausted,
-            errors.ServerError,
-            google_api_core_exceptions.DeadlineExceeded,
-        ) as e:
+    if verbose:
+        if is_estimate_type:
+            # --- AC1 #38 & AC2 #38: Estimate for .env* and context_code_* files ---
             print(
-                f"      -> Rate Limit/Server Error/Deadline ({type(e).__name__}) with Key Index {current_api_key_index}. Waiting {DEFAULT_RATE_LIMIT_SLEEP}s and rotating key...",
-                file=sys.stderr,
+                f"      -> Token Count (Estimate AC1/2): {estimated_token_count} (for {file_type})"
             )
-            time.sleep(DEFAULT_RATE_LIMIT_SLEEP)
-            if not rotate_api_key_and_reinitialize(verbose):
-                print(
-                    f"      Error: Falha ao rotacionar chave de API. Estimating as fallback.",
-                    file=sys.stderr,
-                )
-                token_count = (
-                    max(1, int(len(content_for_api) / 4)) if content_for_api else 0
-                )
-                if verbose:
-                    print(
-                        f"      -> Token Count (AC3 Fallback - Rotation Failed): Estimated tokens: {token_count}"
-                    )
-                return token_count
-            if current_api_key_index in keys_tried_in_this_call:
-                print(
-                    f"      Error: Ciclo completo de chaves API. Limite/Erro persistente para '{filepath_absolute.name}'. Estimating.",
-                    file=sys.stderr,
-                )
-                token_count = (
-                    max(1, int(len(content_for_api) / 4)) if content_for_api else 0
-                )
-                if verbose:
-                    print(
-                        f"      -> Token Count (AC3 Fallback - Full Cycle): Estimated tokens: {token_count}"
-                    )
-                return token_count
-            keys_tried_in_this_call.add(current_api_key_index)
-            if verbose:
-                print(
-                    f"        -> Retrying count_tokens with new Key Index {current_api_key_index}"
-                )
-            continue
-
-        except (errors.APIError, google_api_core_exceptions.GoogleAPICallError) as e:
+        else:
             print(
-                f"      -> Token Count (AC18): API Call Error for '{filepath_absolute.name}': {type(e).__name__} - {e}. Estimating.",
-                file=sys.stderr,
-            )
-            token_count = (
-                max(1, int(len(content_for_api) / 4)) if content_for_api else 0
+                f"      -> Token Count (Fallback Estimate, Gemini client not ready): {estimated_token_count}"
             )
-            if verbose:
-                print(
-                    f"      -> Token Count (AC3 Fallback - API Error): Estimated tokens: {token_count}"
-                )
-            return token_count
-        except Exception as e:
-            if verbose:
+    return estimated_token_count
+
+
+def count_tokens_concurrently(
+    jobs: List[Tuple[str, Path, str]],
+    key_pool: ApiKeyPool,
+    max_workers: int,
+    verbose: bool,
+) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    """
+    Estágio concorrente de contagem de tokens. Submete todos os jobs
+    (path relativo, path absoluto, tipo) a um pool limitado de workers que
+    compartilham os TokenBuckets do key_pool, e coleta os resultados
+    conforme completam. O conteúdo é relido no worker (apenas arquivos
+    alterados chegam aqui) para que o loop principal mantenha em memória
+    um arquivo por vez.
+    """
+    results: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
+    if not jobs:
+        return results
+
+    def _count_job(filepath_absolute: Path, file_type: str) -> Tuple[int, str]:
+        content = filepath_absolute.read_text(encoding="utf-8", errors="ignore")
+        return count_tokens_via_api(
+            key_pool, content, filepath_absolute.name, verbose, file_type
+        )
+
+    workers = max(1, min(max_workers, len(jobs)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        future_to_path = {
+            executor.submit(_count_job, filepath_absolute, file_type): relative_path_str
+            for relative_path_str, filepath_absolute, file_type in jobs
+        }
+        for future in tqdm(
+            concurrent.futures.as_completed(future_to_path),
+            total=len(future_to_path),
+            desc="Contando tokens (API)",
+            unit="arq",
+            leave=False,
+        ):
+            relative_path_str = future_to_path[future]
+            try:
+                results[relative_path_str] = future.result()
+            except Exception as e:
                 print(
-                    f"      -> Token Count: Unexpected Error during API call/result for '{filepath_absolute.name}': {e}",
+                    f"      -> Token Count: Erro inesperado para '{relative_path_str}': {e}",
                     file=sys.stderr,
                 )
-            traceback.print_exc(file=sys.stderr)
-            return None
+                if verbose:
+                    traceback.print_exc(file=sys.stderr)
+                results[relative_path_str] = (None, None)
+    return results
 
 
 # --- Bloco Principal ---
@@ -1107,7 +1804,11 @@ if __name__ == "__main__":
 
     print(f"--- Iniciando Geração do Manifesto (v1.23.1) ---")  # Versão Atualizada
     print(f"Arquivo de Saída: {output_filepath.relative_to(PROJECT_ROOT)}")
-    print(f"Intervalo entre chamadas API count_tokens: {args.sleep}s")
+    rate_per_minute = resolve_rate_per_minute(args.rpm, args.sleep)
+    print(
+        f"Limite por chave API count_tokens: {rate_per_minute:.1f} RPM (--rpm/MODEL_RPM_LIMITS, --sleep {args.sleep}s)"
+    )
+    print(f"Workers para contagem de tokens: {args.workers}")
     print(f"Timeout para chamadas API count_tokens: {args.timeout}s")
 
     if not load_api_keys(args.verbose):
@@ -1115,16 +1816,34 @@ if __name__ == "__main__":
             "Aviso: Incapaz de carregar chave(s) de API. A contagem de tokens via API será pulada (usará estimativas)."
         )
     else:
-        initialize_gemini(args.verbose)
+        initialize_gemini(args.verbose, rate_per_minute, args.timeout)
 
     if args.verbose:
         print("\n[AC3] Carregando manifesto anterior (se existir)...")
-    previous_manifest_files_data = load_previous_manifest(
-        DEFAULT_OUTPUT_DIR, args.verbose
-    )
+    (
+        previous_manifest_files_data,
+        previous_context_code_index,
+        previous_manifest_metadata,
+    ) = load_previous_manifest(DEFAULT_OUTPUT_DIR, args.verbose)
 
     print("\n[AC4 & AC9] Escaneando arquivos do projeto...")
-    all_found_files_relative, _ = scan_project_files(args.verbose)
+    # Paths a reprocessar no modo --incremental (None = todos passam pelo stat)
+    incremental_dirty_paths: Optional[Set[str]] = None
+    incremental_scan = (
+        scan_project_files_incremental(
+            previous_manifest_files_data, previous_manifest_metadata, args.verbose
+        )
+        if args.incremental
+        else None
+    )
+    if incremental_scan is not None:
+        all_found_files_relative, versioned_files_index, incremental_dirty_paths = (
+            incremental_scan
+        )
+    else:
+        all_found_files_relative, versioned_files_index = scan_project_files(
+            args.verbose
+        )
 
     print("\n[AC5] Filtrando arquivos baseados nas regras de exclusão...")
     filtered_file_paths = filter_files(
@@ -1142,252 +1861,356 @@ if __name__ == "__main__":
     binary_file_count = 0
     processed_file_count = 0
     token_api_calls_or_fallbacks = 0
+    stat_fast_path_reused = 0
+    # Arquivos que precisam de contagem nova via API: (path relativo, path absoluto)
+    token_count_jobs: List[Tuple[str, Path, str]] = []
+    token_count_cache = token_cache.TokenCountCache(core_config.TOKEN_CACHE_FILE)
+    token_cache_hits = 0
+
+    sorted_file_paths = sorted(list(filtered_file_paths))
+    file_types: Dict[str, str] = {}
+    stat_fingerprints: Dict[str, Optional[Dict[str, int]]] = {}
+    read_jobs: List[Tuple[str, Path, str]] = []
+    # Pré-passe barata (stat): decide quais arquivos precisam ser lidos.
+    # stat() antes da leitura: se o arquivo mudar durante o processamento,
+    # o fingerprint gravado não coincidirá na próxima execução.
+    for file_path_relative in sorted_file_paths:
+        relative_path_str = file_path_relative.as_posix()
+        file_type = get_file_type(file_path_relative)
+        file_types[relative_path_str] = file_type
+        previous_entry = previous_manifest_files_data.get(relative_path_str, {})
+        if (
+            incremental_dirty_paths is not None
+            and relative_path_str not in incremental_dirty_paths
+            and not args.rehash
+        ):
+            # --incremental: inalterado segundo o git, nem stat() é necessário
+            stat_fingerprint = stored_stat_fingerprint(previous_entry)
+            if can_reuse_previous_entry(
+                previous_entry,
+                file_type,
+                stat_fingerprint,
+                api_counting_enabled=api_key_pool is not None,
+            ):
+                stat_fingerprints[relative_path_str] = stat_fingerprint
+                continue
+        stat_fingerprint = get_stat_fingerprint(PROJECT_ROOT / file_path_relative)
+        stat_fingerprints[relative_path_str] = stat_fingerprint
+        if args.rehash or not can_reuse_previous_entry(
+            previous_entry,
+            file_type,
+            stat_fingerprint,
+            api_counting_enabled=api_key_pool is not None,
+        ):
+            read_jobs.append(
+                (relative_path_str, PROJECT_ROOT / file_path_relative, file_type)
+            )
 
-    # Initialize global executor only if Gemini client is ready
-    api_executor = (
-        concurrent.futures.ThreadPoolExecutor(max_workers=1)
-        if gemini_initialized
-        else None
-    )
+    if args.jobs > 1:
+        print(
+            f"  Lendo {len(read_jobs)} arquivos com {args.jobs} processos (--jobs)..."
+        )
+    file_units = process_files(read_jobs, args.jobs, args.verbose)
 
-    try:
-        for file_path_relative in sorted(list(filtered_file_paths)):
-            processed_file_count += 1
-            file_path_absolute = PROJECT_ROOT / file_path_relative
-            relative_path_str = file_path_relative.as_posix()
-            if args.verbose:
-                print(
-                    f"\n  Processing ({processed_file_count}/{len(filtered_file_paths)}): {relative_path_str}"
-                )
+    for file_path_relative in sorted_file_paths:
+        processed_file_count += 1
+        file_path_absolute = PROJECT_ROOT / file_path_relative
+        relative_path_str = file_path_relative.as_posix()
+        if args.verbose:
+            print(
+                f"\n  Processing ({processed_file_count}/{len(filtered_file_paths)}): {relative_path_str}"
+            )
 
-            is_binary = is_likely_binary(file_path_absolute, args.verbose)
-            if is_binary:
+        file_type = file_types[relative_path_str]
+        if args.verbose:
+            print(f"      -> Type (AC8): {file_type}")
+
+        is_versioned = file_path_relative in versioned_files_index
+        if relative_path_str.startswith(("vendor/uspdev/", "context_llm/")):
+            is_versioned = False
+        if args.verbose:
+            print(f"      -> Versioned (AC9): {is_versioned}")
+
+        stat_fingerprint = stat_fingerprints[relative_path_str]
+        file_unit = file_units.pop(relative_path_str, None)
+        if file_unit is None:
+            exact_previous_file_data = previous_manifest_files_data[relative_path_str]
+            stat_fast_path_reused += 1
+            if (
+                exact_previous_file_data.get("hash") is None
+                and exact_previous_file_data.get("token_count") is None
+                and file_type != "environment_env"
+                and not file_type.startswith("context_code_")
+            ):
                 binary_file_count += 1
-
-            file_type = get_file_type(file_path_relative)
-            if args.verbose:
-                print(f"      -> Type (AC8): {file_type}")
-
-            is_versioned = get_git_versioned_status(file_path_relative, args.verbose)
-            if relative_path_str.startswith(("vendor/uspdev/", "context_llm/")):
-                is_versioned = False
             if args.verbose:
-                print(f"      -> Versioned (AC9): {is_versioned}")
-
-            calculated_hash: Optional[str] = None
-            is_env_file = file_type == "environment_env"
-            is_context_code = file_type.startswith("context_code_")
-            should_calculate_hash = (
-                not is_binary and not is_env_file and not is_context_code
-            )
+                print(
+                    f"      -> Stat fast path: mtime/size/inode inalterados. Reutilizando hash, tokens, dependências e sumário."
+                )
+            current_manifest_files_data[relative_path_str] = {
+                "type": file_type,
+                "versioned": is_versioned,
+                "hash": exact_previous_file_data.get("hash"),
+                "token_count": exact_previous_file_data.get("token_count"),
+                "token_count_source": exact_previous_file_data.get(
+                    "token_count_source"
+                ),
+                "dependencies": exact_previous_file_data.get("dependencies") or [],
+                "dependents": [],
+                "summary": exact_previous_file_data.get("summary"),
+                **stat_fingerprint,
+            }
+            continue
 
-            if should_calculate_hash:
-                try:
-                    file_content_bytes = file_path_absolute.read_bytes()
-                    calculated_hash = hashlib.sha1(file_content_bytes).hexdigest()
-                except Exception as e:
-                    if args.verbose:
-                        print(
-                            f"      -> Hash (AC10/11): Error reading file content bytes: {e}",
-                            file=sys.stderr,
-                        )
-            elif args.verbose:
-                reason_hash = (
-                    "binary (AC6)"
-                    if is_binary
+        # Leitura única (process_files): binário, hash e dependências do mesmo buffer
+        is_binary = file_unit.is_binary
+        if is_binary:
+            binary_file_count += 1
+
+        calculated_hash: Optional[str] = file_unit.hash
+        is_env_file = file_type == "environment_env"
+        is_context_code = file_type.startswith("context_code_")
+        if args.verbose and calculated_hash is None:
+            reason_hash = (
+                "binary (AC6)"
+                if is_binary
+                else (
+                    "env file (AC11)"
+                    if is_env_file
                     else (
-                        "env file (AC11)"
-                        if is_env_file
+                        "context code (AC11)"
+                        if is_context_code
                         else (
-                            "context code (AC11)"
-                            if is_context_code
+                            "read error"
+                            if file_unit.read_error
                             else "unknown exclusion"
                         )
                     )
                 )
-                print(f"      -> Hash (AC11): Setting to null ({reason_hash})")
+            )
+            print(f"      -> Hash (AC11): Setting to null ({reason_hash})")
 
+        if args.verbose:
+            print(f"      -> Hash (AC10/11): {calculated_hash or 'null'}")
+
+        dependencies: List[str] = file_unit.dependencies
+        if file_type.startswith(PHP_DEPENDENCY_FILE_TYPE_PREFIXES):
             if args.verbose:
-                print(f"      -> Hash (AC10/11): {calculated_hash or 'null'}")
+                print(
+                    f"      -> Dependencies (AC22): Extracted {len(dependencies)} use statements."
+                )
+        elif args.verbose:
+            print(f"      -> Dependencies (AC23): Skipping (not a PHP file).")
 
-            dependencies: List[str] = []
-            if file_type.startswith(("code_php_", "migration_php", "test_php_")):
-                try:
-                    file_content_str = file_path_absolute.read_text(
-                        encoding="utf-8", errors="ignore"
-                    )
-                    dependencies = extract_php_dependencies(file_content_str)
-                    if args.verbose:
-                        print(
-                            f"      -> Dependencies (AC22): Extracted {len(dependencies)} use statements."
-                        )
-                except Exception as e:
-                    if args.verbose:
-                        print(
-                            f"      -> Dependencies (AC22): Error extracting: {e}",
-                            file=sys.stderr,
-                        )
-                    dependencies = []
-            elif args.verbose:
-                print(f"      -> Dependencies (AC23): Skipping (not a PHP file).")
-
-            dependents: List[str] = []
-
-            token_count: Optional[int] = None
-            should_count_tokens_or_estimate = not is_binary
-
-            previous_file_data = {}  # Começa vazio
-            relative_path_str = file_path_relative.as_posix()  # Caminho relativo atual
-
-            if file_type.startswith("context_code_"):
-                # Busca especial para arquivos de contexto: ignora o timestamp no path
-                current_filename = file_path_relative.name
-                found_previous_path_str = None
-                # Itera pelas chaves do manifesto anterior
-                for prev_path_str in previous_manifest_files_data.keys():
-                    # Verifica se é um arquivo de contexto com o mesmo nome de arquivo
-                    if prev_path_str.startswith(
-                        "context_llm/code/"
-                    ) and prev_path_str.endswith(f"/{current_filename}"):
-                        # Garante que não estamos pegando o mesmo timestamp (caso de rerodagem sem novo contexto)
-                        if (
-                            Path(prev_path_str).parent.name
-                            != file_path_relative.parent.name
-                        ):
-                            found_previous_path_str = prev_path_str
-                            break  # Pega o primeiro encontrado (provavelmente o mais recente anterior)
-
-                if found_previous_path_str:
-                    previous_file_data = previous_manifest_files_data.get(
-                        found_previous_path_str, {}
-                    )
-                    if args.verbose and previous_file_data:
-                        print(
-                            f"      -> Found previous manifest data for '{current_filename}' using path '{found_previous_path_str}'"
-                        )
-                elif args.verbose:
-                    print(
-                        f"      -> No corresponding previous manifest data found for context file '{current_filename}'."
-                    )
+        dependents: List[str] = []
+
+        token_count: Optional[int] = None
+        token_count_source: Optional[str] = None  # "api" ou "estimate"
+        should_count_tokens_or_estimate = not is_binary
+
+        previous_file_data = {}  # Começa vazio
+        relative_path_str = file_path_relative.as_posix()  # Caminho relativo atual
+
+        if file_type.startswith("context_code_"):
+            # Busca especial para arquivos de contexto: ignora o timestamp no path
+            current_filename = file_path_relative.name
+            # Lookup O(1) no índice por basename (timestamp mais recente vence)
+            found_previous_path_str = find_previous_context_code_path(
+                previous_context_code_index, file_path_relative
+            )
 
-            else:
-                # Lógica original para arquivos não-contexto: busca pelo path exato
+            if found_previous_path_str:
                 previous_file_data = previous_manifest_files_data.get(
-                    relative_path_str, {}
+                    found_previous_path_str, {}
                 )
-            # --- Fim da Lógica MODIFICADA ---
-
-            # Agora recupera os dados do dicionário `previous_file_data` (que pode ou não ter sido encontrado)
-            previous_hash = previous_file_data.get("hash")
-            previous_count = previous_file_data.get("token_count")
-            previous_summary = previous_file_data.get("summary")
-
-            if should_count_tokens_or_estimate:
-                token_count_result = count_tokens_for_file(
-                    api_executor,
-                    file_path_absolute,
-                    file_type,
-                    previous_count,
-                    calculated_hash,
-                    previous_hash,
-                    args.verbose,
-                    args.sleep,
-                    args.timeout,
-                )
-                if token_count_result is not None and (
-                    not previous_hash
-                    or calculated_hash != previous_hash
-                    or previous_count is None
-                ):
-                    token_api_calls_or_fallbacks += 1
-                token_count = token_count_result
+                if args.verbose and previous_file_data:
+                    print(
+                        f"      -> Found previous manifest data for '{current_filename}' using path '{found_previous_path_str}'"
+                    )
             elif args.verbose:
-                reason = "binary"
                 print(
-                    f"      -> Token Count: Skipping count ({reason}). Setting to null."
+                    f"      -> No corresponding previous manifest data found for context file '{current_filename}'."
                 )
 
-            # --- Lógica REVISADA para Preservação do Sumário (v1.23.1) ---
-            # Esta lógica agora funcionará corretamente porque previous_summary será
-            # populado corretamente para context_code* devido à busca acima.
-            preserved_summary: Optional[str] = None
+        else:
+            # Lógica original para arquivos não-contexto: busca pelo path exato
+            previous_file_data = previous_manifest_files_data.get(relative_path_str, {})
+        # --- Fim da Lógica MODIFICADA ---
 
-            if file_type.startswith("context_code"):
-                if previous_summary is not None:
-                    preserved_summary = previous_summary
-                    if args.verbose:
-                        print(
-                            f"      -> Summary: Preserving previous summary for context file (regardless of hash)."
-                        )
-                elif args.verbose:
+        # Agora recupera os dados do dicionário `previous_file_data` (que pode ou não ter sido encontrado)
+        previous_hash = previous_file_data.get("hash")
+        previous_count = previous_file_data.get("token_count")
+        if (
+            api_key_pool is not None
+            and previous_file_data.get("token_count_source") == "estimate"
+        ):
+            # Estimativa local de uma execução sem API: recontar agora
+            previous_count = None
+        previous_summary = previous_file_data.get("summary")
+
+        cached_token_count: Optional[int] = None
+        if (
+            should_count_tokens_or_estimate
+            and calculated_hash
+            and needs_api_token_count(
+                file_type, previous_count, calculated_hash, previous_hash
+            )
+        ):
+            # Mesmo conteúdo já contado pela API (outro path ou manifesto antigo)
+            cached_token_count, _ = token_count_cache.get(calculated_hash)
+
+        if cached_token_count is not None:
+            token_count = cached_token_count
+            token_count_source = "api"
+            token_cache_hits += 1
+            if args.verbose:
+                print(
+                    f"      -> Token Count: {token_count} (cache por hash de conteúdo)."
+                )
+        elif (
+            should_count_tokens_or_estimate
+            and api_key_pool is not None
+            and needs_api_token_count(
+                file_type, previous_count, calculated_hash, previous_hash
+            )
+        ):
+            # Contagem via API adiada para o estágio concorrente abaixo
+            token_count_jobs.append((relative_path_str, file_path_absolute, file_type))
+            if args.verbose:
+                print(f"      -> Token Count: Enfileirado para contagem via API.")
+        elif should_count_tokens_or_estimate:
+            token_count_result = count_tokens_for_file(
+                file_unit.estimated_token_count,
+                file_type,
+                previous_count,
+                calculated_hash,
+                previous_hash,
+                args.verbose,
+            )
+            if token_count_result is not None and (
+                not previous_hash
+                or calculated_hash != previous_hash
+                or previous_count is None
+            ):
+                token_api_calls_or_fallbacks += 1
+            token_count = token_count_result
+            if token_count is not None:
+                token_count_source = (
+                    previous_file_data.get("token_count_source")
+                    if not needs_api_token_count(
+                        file_type, previous_count, calculated_hash, previous_hash
+                    )
+                    else "estimate"
+                )
+        elif args.verbose:
+            reason = "binary"
+            print(f"      -> Token Count: Skipping count ({reason}). Setting to null.")
+
+        # --- Lógica REVISADA para Preservação do Sumário (v1.23.1) ---
+        # Esta lógica agora funcionará corretamente porque previous_summary será
+        # populado corretamente para context_code* devido à busca acima.
+        preserved_summary: Optional[str] = None
+
+        if file_type.startswith("context_code"):
+            if previous_summary is not None:
+                preserved_summary = previous_summary
+                if args.verbose:
                     print(
-                        f"      -> Summary: Setting to null (new context file or no previous summary)."
+                        f"      -> Summary: Preserving previous summary for context file (regardless of hash)."
                     )
+            elif args.verbose:
+                print(
+                    f"      -> Summary: Setting to null (new context file or no previous summary)."
+                )
 
-            elif calculated_hash and previous_hash and calculated_hash == previous_hash:
-                # Para TODOS OS OUTROS arquivos, preserva o sumário APENAS se o hash não mudou.
-                if previous_summary is not None:
-                    preserved_summary = previous_summary
-                    if args.verbose:
-                        print(
-                            f"      -> Summary: Reusing previous summary (hash unchanged)."
-                        )
-                elif args.verbose:
+        elif calculated_hash and previous_hash and calculated_hash == previous_hash:
+            # Para TODOS OS OUTROS arquivos, preserva o sumário APENAS se o hash não mudou.
+            if previous_summary is not None:
+                preserved_summary = previous_summary
+                if args.verbose:
                     print(
-                        f"      -> Summary: Setting to null (hash matches, but no previous summary found)."
+                        f"      -> Summary: Reusing previous summary (hash unchanged)."
                     )
+            elif args.verbose:
+                print(
+                    f"      -> Summary: Setting to null (hash matches, but no previous summary found)."
+                )
 
-            elif (
+        elif (
+            args.verbose
+        ):  # Hash mudou (e não é context_code) ou arquivo novo/binário/env
+            print(
+                f"      -> Summary: Setting to null (hash changed or file is new/binary/env/context-without-prev-summary)."
+            )
+        # --- Fim da Lógica REVISADA ---
+
+        # ... (cálculo de token_count) ...
+
+        metadata: Dict[str, Any] = {
+            "type": file_type,
+            "versioned": is_versioned,
+            "hash": calculated_hash,
+            "token_count": token_count,  # Valor calculado/reusado
+            "token_count_source": token_count_source,
+            "dependencies": dependencies,
+            "dependents": dependents,
+            "summary": preserved_summary,  # Usa o valor determinado pela NOVA lógica
+        }
+        if stat_fingerprint is not None:
+            metadata.update(stat_fingerprint)
+
+        # Garante que binários SEMPRE tenham summary null (AC6), mesmo se a lógica acima
+        # acidentalmente preservar algo (improvável, mas seguro).
+        if is_binary:
+            metadata["summary"] = None
+            if (
                 args.verbose
-            ):  # Hash mudou (e não é context_code) ou arquivo novo/binário/env
+                and preserved_summary is not None
+                and not file_type.startswith("context_code_")
+            ):
                 print(
-                    f"      -> Summary: Setting to null (hash changed or file is new/binary/env/context-without-prev-summary)."
+                    f"      -> Summary: Overriding previous summary with null because file is binary."
                 )
-            # --- Fim da Lógica REVISADA ---
-
-            # ... (cálculo de token_count) ...
-
-            metadata: Dict[str, Any] = {
-                "type": file_type,
-                "versioned": is_versioned,
-                "hash": calculated_hash,
-                "token_count": token_count,  # Valor calculado/reusado
-                "dependencies": dependencies,
-                "dependents": dependents,
-                "summary": preserved_summary,  # Usa o valor determinado pela NOVA lógica
-            }
 
-            # Garante que binários SEMPRE tenham summary null (AC6), mesmo se a lógica acima
-            # acidentalmente preservar algo (improvável, mas seguro).
-            if is_binary:
-                metadata["summary"] = None
-                if (
-                    args.verbose
-                    and preserved_summary is not None
-                    and not file_type.startswith("context_code_")
-                ):
-                    print(
-                        f"      -> Summary: Overriding previous summary with null because file is binary."
-                    )
+        current_manifest_files_data[relative_path_str] = metadata
 
-            current_manifest_files_data[relative_path_str] = metadata
+    if token_count_jobs and api_key_pool is not None:
+        print(
+            f"\n[AC12-20] Contando tokens via API para {len(token_count_jobs)} arquivos ({args.workers} workers, {len(api_key_pool)} chave(s))..."
+        )
+        api_token_counts = count_tokens_concurrently(
+            token_count_jobs, api_key_pool, args.workers, args.verbose
+        )
+        for relative_path_str, (
+            token_count_result,
+            token_count_source,
+        ) in api_token_counts.items():
+            current_manifest_files_data[relative_path_str].update(
+                token_count=token_count_result, token_count_source=token_count_source
+            )
+            if token_count_result is not None:
+                token_api_calls_or_fallbacks += 1
 
-    finally:
-        if api_executor:
-            print("\nShutting down API executor...")
-            api_executor.shutdown(
-                wait=True
-            )  # Espera as tarefas pendentes antes de sair
-            print("Executor shut down.")
+    print("\n[AC22] Calculando índice reverso de dependências (dependents)...")
+    dependents_edge_count = compute_dependents(
+        current_manifest_files_data, load_psr4_mappings(args.verbose), args.verbose
+    )
 
     print(f"\n  Processamento concluído para {len(filtered_file_paths)} arquivos.")
     print(f"  Detecção AC6: {binary_file_count} arquivos binários.")
     print(f"  Cálculo AC10/11: Hashes SHA1 calculados ou nulos.")
+    print(
+        f"  Fast path (stat): {stat_fast_path_reused} arquivos inalterados reutilizados sem leitura{' (desativado por --rehash)' if args.rehash else ''}."
+    )
     print(
         f"  Contagem Tokens (AC1, AC2, AC3, AC12-20): {token_api_calls_or_fallbacks} chamadas API Gemini ou fallbacks de estimativa realizados."
     )
     print(f"  Extração Dependências (AC22/23): Processado para arquivos PHP.")
+    print(
+        f"  Dependents (AC22): {dependents_edge_count} referências internas resolvidas via PSR-4."
+    )
 
+    git_commit, git_dirty_paths = get_git_head_state(args.verbose)
     manifest_data_final: Dict[str, Any] = {
         "_metadata": {
             "timestamp": datetime.datetime.now().isoformat(),
@@ -1400,9 +2223,15 @@ if __name__ == "__main__":
             "binary_files_detected": binary_file_count,
             "gemini_initialized": gemini_initialized,
             "token_api_calls_or_fallbacks": token_api_calls_or_fallbacks,
+            "stat_fast_path_reused": stat_fast_path_reused,
+            "incremental": incremental_scan is not None,
+            "git_commit": git_commit,
+            "git_dirty_paths": git_dirty_paths,
         },
         "files": current_manifest_files_data,
     }
+    if isinstance(previous_manifest_files_data, manifest_store.SqliteManifestFiles):
+        previous_manifest_files_data.close()
 
     try:
         with open(output_filepath, "w", encoding="utf-8") as f:
@@ -1413,5 +2242,50 @@ if __name__ == "__main__":
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
+    if not args.no_sqlite:
+        try:
+            sqlite_output_path = manifest_store.write_manifest_sqlite(
+                manifest_data_final,
+                manifest_store.sqlite_path_for(output_filepath),
+                source_json_path=output_filepath,
+            )
+            print(
+                f"Manifesto SQLite (lazy) salvo em: {sqlite_output_path.relative_to(PROJECT_ROOT)}"
+            )
+        except Exception as e:
+            print(
+                f"Aviso: Não foi possível salvar o manifesto SQLite: {e}",
+                file=sys.stderr,
+            )
+
+    try:
+        cached_entries, indexed_paths = update_token_cache(
+            token_count_cache, current_manifest_files_data, PROJECT_ROOT
+        )
+        print(
+            f"Cache de contagens de tokens: {cached_entries} entradas gravadas, {token_cache_hits} reaproveitadas, {indexed_paths} caminhos indexados."
+        )
+    except Exception as e:
+        print(
+            f"Aviso: Não foi possível atualizar o cache de tokens: {e}",
+            file=sys.stderr,
+        )
+    finally:
+        token_count_cache.close()
+
+    try:
+        calibration_path = update_token_calibration(
+            current_manifest_files_data, args.verbose
+        )
+        if calibration_path is not None:
+            print(
+                f"Calibração do estimador de tokens salva em: {calibration_path.relative_to(PROJECT_ROOT)}"
+            )
+    except Exception as e:
+        print(
+            f"Aviso: Não foi possível atualizar a calibração de tokens: {e}",
+            file=sys.stderr,
+        )
+
     print(f"--- Geração do Manifesto Concluída (v1.23.1) ---")  # Atualizado
     sys.exit(0)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Core Context Budget Module.
+
+Alocação do orçamento de tokens do contexto (prepare_context_parts). Cada
+arquivo tem um conjunto de opções (integral, sumário, truncado em alguns
+tamanhos, omitido) com um valor relativo ponderado pelo tipo do arquivo e
+pelo mapa de essenciais. A escolha maximiza o valor total dentro do limite
+(mochila de múltipla escolha) com o guloso sobre a envoltória convexa de cada
+arquivo, em O(n log n), seguido do preenchimento do orçamento restante com um
+truncamento sob medida.
+"""
+
+import dataclasses
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import token_estimator
+
+# Peso de prioridade por categoria do tipo no manifesto (token_estimator.file_type_category)
+FILE_CATEGORY_WEIGHTS: Dict[str, float] = {
+    "code": 1.0,
+    "test": 0.9,
+    "migration": 0.8,
+    "view": 0.8,
+    "context": 0.8,
+    "docs": 0.7,
+    "template": 0.7,
+    "plan": 0.6,
+    "config": 0.6,
+    "environment": 0.5,
+    "asset": 0.4,
+    "dependency": 0.3,
+}
+DEFAULT_FILE_WEIGHT = 0.6
+ESSENTIAL_WEIGHT_MULTIPLIER = 5.0
+
+# Valor de cada forma do conteúdo relativo ao arquivo integral (1.0)
+SUMMARY_VALUE = 0.6
+TRUNCATION_VALUE_FACTOR = 0.9  # truncado: fator * sqrt(fração mantida)
+TRUNCATION_FRACTIONS = (0.75, 0.5, 0.25)
+# Tamanho mínimo útil de um truncamento (essenciais nunca são omitidos)
+MIN_TRUNCATED_TOKENS_NON_ESSENTIAL = 50
+MIN_TRUNCATED_TOKENS_ESSENTIAL = 100
+
+CHOICE_FULL = "full"
+CHOICE_SUMMARY = "summary"
+CHOICE_TRUNCATED = "truncated"
+CHOICE_DROPPED = "dropped"
+
+
+@dataclasses.dataclass
+class BudgetItem:
+    """Arquivo candidato ao contexto, do ponto de vista do orçamento."""
+
+    token_count: int
+    file_type: Optional[str] = None
+    is_essential: bool = False
+    summary_token_count: Optional[int] = None
+
+
+@dataclasses.dataclass
+class BudgetChoice:
+    """Forma escolhida para um arquivo e sua contagem de tokens (alvo, se truncado)."""
+
+    kind: str
+    token_count: int
+
+
+def file_weight(file_type: Optional[str], is_essential: bool = False) -> float:
+    """Peso de prioridade do arquivo pelo tipo no manifesto e pelo mapa de essenciais."""
+    weight = (
+        FILE_CATEGORY_WEIGHTS.get(
+            token_estimator.file_type_category(file_type), DEFAULT_FILE_WEIGHT
+        )
+        if file_type
+        else DEFAULT_FILE_WEIGHT
+    )
+    return weight * ESSENTIAL_WEIGHT_MULTIPLIER if is_essential else weight
+
+
+def _truncation_value(tokens: int, full_tokens: int) -> float:
+    return TRUNCATION_VALUE_FACTOR * math.sqrt(tokens / full_tokens)
+
+
+def _min_truncated_tokens(item: BudgetItem) -> int:
+    return (
+        MIN_TRUNCATED_TOKENS_ESSENTIAL
+        if item.is_essential
+        else MIN_TRUNCATED_TOKENS_NON_ESSENTIAL
+    )
+
+
+def _options(item: BudgetItem) -> List[Tuple[int, float, str]]:
+    """Opções (custo, valor relativo, tipo) do item, sem ponderação."""
+    full_tokens = max(0, item.token_count)
+    options: List[Tuple[int, float, str]] = [(full_tokens, 1.0, CHOICE_FULL)]
+    if full_tokens == 0:
+        return options
+    min_tokens = _min_truncated_tokens(item)
+    if item.is_essential:
+        # Essenciais não são omitidos nem trocados por sumário
+        if full_tokens > min_tokens:
+            options.append(
+                (
+                    min_tokens,
+                    _truncation_value(min_tokens, full_tokens),
+                    CHOICE_TRUNCATED,
+                )
+            )
+    else:
+        options.append((0, 0.0, CHOICE_DROPPED))
+        if (
+            item.summary_token_count is not None
+            and item.summary_token_count < full_tokens
+        ):
+            options.append((item.summary_token_count, SUMMARY_VALUE, CHOICE_SUMMARY))
+    for fraction in TRUNCATION_FRACTIONS:
+        tokens = int(full_tokens * fraction)
+        if min_tokens <= tokens < full_tokens:
+            options.append(
+                (tokens, _truncation_value(tokens, full_tokens), CHOICE_TRUNCATED)
+            )
+    return options
+
+
+def _convex_hull(
+    options: Sequence[Tuple[int, float, str]],
+) -> List[Tuple[int, float, str]]:
+    """
+    Envoltória superior das opções no plano (custo, valor): descarta opções
+    dominadas (mais caras sem ganho de valor) e as que ficam abaixo da reta
+    entre vizinhas, de modo que a eficiência incremental seja decrescente.
+    """
+    hull: List[Tuple[int, float, str]] = []
+    for option in sorted(options, key=lambda o: (o[0], -o[1])):
+        if hull and option[1] <= hull[-1][1]:
+            continue
+        if hull and option[0] == hull[-1][0]:
+            continue
+        while len(hull) >= 2:
+            (c1, v1, _), (c2, v2, _) = hull[-2], hull[-1]
+            # hull[-1] sai se não estiver acima da reta hull[-2] -> option
+            if (v2 - v1) * (option[0] - c1) <= (option[1] - v1) * (c2 - c1):
+                hull.pop()
+            else:
+                break
+        hull.append(option)
+    return hull
+
+
+def allocate_context_budget(
+    items: Sequence[BudgetItem], max_tokens: int
+) -> List[BudgetChoice]:
+    """
+    Escolhe uma opção por item maximizando o valor ponderado total com a soma
+    dos tokens <= max_tokens. Se nem as opções mínimas couberem, todos os
+    itens ficam na opção mínima (essenciais truncados, demais omitidos).
+    """
+    weights = [file_weight(item.file_type, item.is_essential) for item in items]
+    hulls = [_convex_hull(_options(item)) for item in items]
+    current = [0] * len(items)  # índice da opção corrente na envoltória
+    remaining = max_tokens - sum(hull[0][0] for hull in hulls)
+
+    # Passos incrementais (eficiência, item, próxima opção); dentro de um item
+    # a eficiência é decrescente, então a ordem global respeita a sequência.
+    steps: List[Tuple[float, int, int]] = []
+    for index, hull in enumerate(hulls):
+        for option_index in range(1, len(hull)):
+            delta_cost = hull[option_index][0] - hull[option_index - 1][0]
+            delta_value = (hull[option_index][1] - hull[option_index - 1][1]) * weights[
+                index
+            ]
+            steps.append((delta_value / delta_cost, index, option_index))
+    steps.sort(key=lambda step: (-step[0], step[1], step[2]))
+
+    blocked: List[int] = []  # itens cujo próximo passo não coube, por eficiência
+    blocked_set = set()
+    if remaining >= 0:
+        for _, index, option_index in steps:
+            if index in blocked_set or option_index != current[index] + 1:
+                continue
+            delta_cost = hulls[index][option_index][0] - hulls[index][current[index]][0]
+            if delta_cost <= remaining:
+                current[index] = option_index
+                remaining -= delta_cost
+            else:
+                blocked.append(index)
+                blocked_set.add(index)
+
+    choices = [
+        BudgetChoice(kind=hulls[i][current[i]][2], token_count=hulls[i][current[i]][0])
+        for i in range(len(items))
+    ]
+
+    # Preenche o restante com um truncamento sob medida do primeiro item
+    # bloqueado para o qual isso aumenta o valor.
+    for index in blocked:
+        if remaining <= 0:
+            break
+        item, choice = items[index], choices[index]
+        target_tokens = choice.token_count + remaining
+        if target_tokens >= item.token_count or target_tokens < _min_truncated_tokens(
+            item
+        ):
+            continue
+        if (
+            _truncation_value(target_tokens, item.token_count)
+            > hulls[index][current[index]][1]
+        ):
+            choices[index] = BudgetChoice(CHOICE_TRUNCATED, target_tokens)
+            remaining = 0
+    return choices
@@ -4,6 +4,7 @@ LLM Core Configuration Module.
 
 This module stores all global constants for the LLM interaction scripts.
 """
+
 from pathlib import Path
 import os
 from typing import Dict, List, Optional, Any, Set, Tuple, Union  # Added Dict, Any
@@ -21,6 +22,8 @@ TEMP_CONTEXT_COPY_DIR = (
 OUTPUT_DIR_BASE = PROJECT_ROOT / "llm_outputs"
 CONTEXT_GENERATION_SCRIPT = PROJECT_ROOT / "scripts" / "generate_context.py"
 MANIFEST_DATA_DIR = PROJECT_ROOT / "scripts" / "data"
+TOKEN_CALIBRATION_FILE = MANIFEST_DATA_DIR / "token_calibration.json"
+TOKEN_CACHE_FILE = MANIFEST_DATA_DIR / "token_cache.sqlite"  # Contagens por hash
 
 # Regex Patterns
 TIMESTAMP_DIR_REGEX = r"^\d{8}_\d{6}$"
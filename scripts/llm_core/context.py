@@ -2,111 +2,278 @@
 """
 LLM Core Context Management Module.
 """
+
 import re
 import sys
 import json
 import argparse
 import dataclasses  # Adicionado para FileProcessUnit
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Set, Tuple, Union  # Adicionado Union
+from typing import (
+    List,
+    Optional,
+    Dict,
+    Any,
+    Set,
+    Tuple,
+    Union,
+    Callable,
+)  # Adicionado Union
 
 from google.genai import types
 
 from . import config as core_config
 from . import api_client
+from . import budget
 from .exceptions import MissingEssentialFileAbort
 from . import io_utils
-
-
-@dataclasses.dataclass
+from . import manifest_store
+from . import token_cache
+from . import token_estimator
+
+TRUNCATION_SEPARATOR = (
+    "\n\n... [CONTEÚDO TRUNCADO PARA CABER NO LIMITE DE TOKENS] ...\n\n"
+)
+TRUNCATION_SHORT_MARKER = "\n...[TRUNCADO]...\n"
+# Fração do orçamento de um truncamento reservada ao início do arquivo
+DEFAULT_TRUNCATION_HEAD_RATIO = 0.5
+TRUNCATION_HEAD_RATIOS_BY_TYPE: Dict[str, float] = {
+    "context_code_phpunit": 0.15,
+    "context_code_dusk_results": 0.15,
+    "context_code_pint": 0.3,
+    "context_code_git_log": 0.85,
+    "code_": 0.8,
+    "test_": 0.8,
+    "config_": 0.8,
+    "docs_": 0.8,
+}
+TRUNCATION_HEAD_RATIOS_BY_FILENAME: Dict[str, float] = {
+    "phpunit_test_results.txt": 0.15,
+    "dusk_test_results.txt": 0.15,
+    "pytest_results.txt": 0.15,
+    "pint_test_results.txt": 0.3,
+    "git_log.txt": 0.85,
+}
+
+
+@dataclasses.dataclass(slots=True)
 class FileProcessUnit:
     """
     Dataclass para gerenciar o estado dos arquivos durante o processo de redução de contexto.
+    O conteúdo integral não fica em memória: é lido de source_path só quando
+    necessário (load_content()); 'content' guarda apenas a forma reduzida
+    (sumário ou truncado) quando houver. Com __slots__ (slots=True), cada
+    unidade não carrega um __dict__ próprio.
     """
 
     relative_path: str
-    content: str
     token_count: int  # Token count of current content (integral, summary, or truncated)
     original_token_count: int  # Token count of the full original content
-    original_content: str  # Store original content for potential truncation later
+    source_path: Optional[Path] = None  # Arquivo de origem do conteúdo integral
+    content: Optional[str] = None  # Conteúdo reduzido; None = integral (lazy)
     file_type: Optional[str] = None  # Type of the file from manifest
     summary: Optional[str] = None
     summary_token_count: Optional[int] = None
     is_essential_from_map: bool = False
     is_reduced_to_summary: bool = False
     is_truncated: bool = False
+    is_dropped: bool = False
+
+    def load_content(self) -> str:
+        """Conteúdo atual: a forma reduzida, se houver, ou o arquivo integral."""
+        if self.content is not None:
+            return self.content
+        if self.source_path is None:
+            return ""
+        return self.source_path.read_text(encoding="utf-8", errors="ignore")
+
+
+def _read_head_tail(file_path: Path, byte_count: int) -> Tuple[str, Optional[str]]:
+    """
+    Lê apenas os byte_count primeiros e últimos bytes de um arquivo (mesma
+    unidade do estimador de tokens), descartando caracteres UTF-8 cortados nas
+    bordas. Retorna (conteúdo integral, None) se o arquivo for pequeno demais
+    para que as duas fatias sejam disjuntas.
+    """
+    if file_path.stat().st_size <= 2 * byte_count:
+        return file_path.read_text(encoding="utf-8", errors="ignore"), None
+    with open(file_path, "rb") as f:
+        head = f.read(byte_count).decode("utf-8", errors="ignore")
+        f.seek(-byte_count, 2)
+        tail = f.read().decode("utf-8", errors="ignore")
+    return head, tail
+
+
+def _truncation_head_ratio(
+    file_type: Optional[str], relative_path: Optional[str] = None
+) -> float:
+    """
+    Fração do orçamento de um truncamento reservada ao início do arquivo, pelo
+    tipo no manifesto ou, sem tipo, pelo nome do arquivo (ex: logs de teste
+    guardam o fim, onde ficam falhas e o resumo).
+    """
+    if file_type:
+        for type_key, ratio in TRUNCATION_HEAD_RATIOS_BY_TYPE.items():
+            if file_type == type_key or (
+                type_key.endswith("_") and file_type.startswith(type_key)
+            ):
+                return ratio
+    if relative_path:
+        file_name = relative_path.rsplit("/", 1)[-1]
+        if file_name in TRUNCATION_HEAD_RATIOS_BY_FILENAME:
+            return TRUNCATION_HEAD_RATIOS_BY_FILENAME[file_name]
+    return DEFAULT_TRUNCATION_HEAD_RATIO
+
+
+def _truncate_unit(
+    unit: FileProcessUnit, target_token_count: int, verbose: bool = False
+) -> Tuple[str, int]:
+    """
+    _truncate_content() sobre o conteúdo integral da unidade, lendo do disco
+    só as fatias de início e fim que o truncamento pode manter.
+    """
+    head_ratio = _truncation_head_ratio(unit.file_type, unit.relative_path)
+    if unit.source_path is None:
+        return _truncate_content(
+            unit.load_content(),
+            target_token_count,
+            verbose,
+            file_type=unit.file_type,
+            head_ratio=head_ratio,
+        )
+    # Um trecho com até target_token_count tokens estimados tem menos de
+    # (target_token_count + 1) * bytes_per_token bytes
+    bytes_per_token = token_estimator.bytes_per_token(unit.file_type)
+    window_bytes = int((target_token_count + 1) * bytes_per_token) + 1
+    head, tail = _read_head_tail(unit.source_path, window_bytes)
+    if tail is None:
+        return _truncate_content(
+            head,
+            target_token_count,
+            verbose,
+            file_type=unit.file_type,
+            head_ratio=head_ratio,
+        )
+    # O trecho mantido é menor que cada fatia, então head + tail produz o
+    # mesmo resultado que o conteúdo integral.
+    return _truncate_content(
+        head + tail,
+        target_token_count,
+        verbose,
+        original_token_estimate=unit.original_token_count,
+        file_type=unit.file_type,
+        head_ratio=head_ratio,
+    )
+
+
+def _last_fitting(low: int, high: int, fits: Callable[[int], bool]) -> int:
+    """Maior i em [low, high] com fits(i) (fits monótona, fits(low) verdadeiro)."""
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
 
 
 def _truncate_content(
-    content: str, target_token_count: int, verbose: bool = False
+    content: str,
+    target_token_count: int,
+    verbose: bool = False,
+    original_token_estimate: Optional[int] = None,
+    file_type: Optional[str] = None,
+    head_ratio: Optional[float] = None,
 ) -> Tuple[str, int]:
     """
-    Trunca o conteúdo para aproximadamente target_token_count, mantendo início e fim.
-    Retorna o conteúdo truncado e sua nova contagem de tokens estimada.
+    Trunca o conteúdo para no máximo target_token_count tokens (medidos pelo
+    estimador calibrado para file_type), mantendo início e fim em limites de
+    linha. head_ratio é a fração do orçamento reservada ao início (padrão:
+    DEFAULT_TRUNCATION_HEAD_RATIO); o restante vai para o fim e sobras de um
+    lado são aproveitadas pelo outro. Linhas longas demais caem para cortes
+    por caractere. Retorna o conteúdo truncado e sua contagem de tokens
+    exata segundo o mesmo estimador.
+    original_token_estimate (opcional) é usado apenas no log, quando 'content'
+    contém só as fatias de início e fim do original.
     """
-    chars_per_token_approx = 3.8
-    target_char_count = int(target_token_count * chars_per_token_approx)
 
-    separator = "\n\n... [CONTEÚDO TRUNCADO PARA CABER NO LIMITE DE TOKENS] ...\n\n"
-    separator_len = len(separator)
+    def count(text: str) -> int:
+        return token_estimator.estimate_tokens(text, file_type)
 
     if not content:
         return "", 0
-
-    if len(content) <= target_char_count:
-        return content, (
-            max(1, int(len(content) / chars_per_token_approx)) if content else 0
-        )
-
-    if target_char_count <= separator_len:
-        keep_start_chars = max(10, target_char_count - 10)
-        truncated_content_str = content[:keep_start_chars] + "\n...[TRUNCADO]..."
-        new_token_estimate = (
-            max(1, int(len(truncated_content_str) / chars_per_token_approx))
-            if truncated_content_str
-            else 0
-        )
+    content_tokens = count(content)
+    if content_tokens <= target_token_count:
+        return content, content_tokens
+
+    separator = TRUNCATION_SEPARATOR
+    if count(separator) * 2 > target_token_count:
+        separator = TRUNCATION_SHORT_MARKER
+    if count(separator) > target_token_count:
         if verbose:
             print(
-                f"      Truncamento agressivo: mantendo {keep_start_chars} caracteres do início."
-            )
-        return truncated_content_str, new_token_estimate
-
-    keep_each_side = (target_char_count - separator_len) // 2
-    if keep_each_side < 50:
-        keep_each_side = 50
-
-        if target_char_count < (keep_each_side * 2 + separator_len):
-            keep_start = max(10, target_char_count - len("\n...[TRUNCADO]..."))
-            truncated_content_str = content[:keep_start] + "\n...[TRUNCADO]..."
-            new_token_estimate = (
-                max(1, int(len(truncated_content_str) / chars_per_token_approx))
-                if truncated_content_str
-                else 0
+                f"      Truncamento: limite de {target_token_count} tokens pequeno demais; conteúdo omitido."
             )
-            if verbose:
-                print(f"      Truncamento priorizando início: {keep_start} caracteres.")
-            return truncated_content_str, new_token_estimate
+        return "", 0
 
-    start_chunk = content[:keep_each_side]
-    end_chunk = content[-keep_each_side:]
+    ratio = DEFAULT_TRUNCATION_HEAD_RATIO if head_ratio is None else head_ratio
+    ratio = min(1.0, max(0.0, ratio))
+    content_len = len(content)
+    # Cortes possíveis: início de cada linha (o início mantém content[:h] e o
+    # fim content[t:])
+    line_starts = [0] + [m.end() for m in re.finditer("\n", content)]
+    if line_starts[-1] != content_len:
+        line_starts.append(content_len)
+
+    def assembled(head_end: int, tail_start: int) -> str:
+        return content[:head_end] + separator + content[tail_start:]
+
+    def fits(head_end: int, tail_start: int) -> bool:
+        return count(assembled(head_end, tail_start)) <= target_token_count
+
+    separator_tokens = count(separator)
+    text_budget = target_token_count - separator_tokens
+    head_budget = int(text_budget * ratio) + separator_tokens
+    last = len(line_starts) - 1
+
+    # 1) maior início dentro da fatia do orçamento reservada a ele (medido
+    #    com o separador, para que início + separador sempre caiba no alvo)
+    h = _last_fitting(
+        0,
+        last,
+        lambda i: count(content[: line_starts[i]] + separator) <= head_budget,
+    )
+    # 2) maior fim que ainda cabe com esse início
+    t = last - _last_fitting(
+        0, last - h, lambda k: fits(line_starts[h], line_starts[last - k])
+    )
+    # 3) o que sobrar volta para o início
+    h = _last_fitting(h, t, lambda i: fits(line_starts[i], line_starts[t]))
+    head_end, tail_start = line_starts[h], line_starts[t]
 
-    truncated_content_str = start_chunk + separator + end_chunk
-    new_token_estimate = (
-        max(1, int(len(truncated_content_str) / chars_per_token_approx))
-        if truncated_content_str
-        else 0
+    kept_bytes = len(content[:head_end].encode("utf-8")) + len(
+        content[tail_start:].encode("utf-8")
     )
+    min_useful_bytes = (text_budget * token_estimator.bytes_per_token(file_type)) // 2
+    if kept_bytes < min_useful_bytes:
+        # Linhas longas demais: corta por caractere, na proporção head_ratio
+        def char_split(kept: int) -> Tuple[int, int]:
+            head_chars = int(kept * ratio)
+            return head_chars, content_len - (kept - head_chars)
+
+        kept = _last_fitting(0, content_len, lambda k: fits(*char_split(k)))
+        head_end, tail_start = char_split(kept)
+
+    truncated_content_str = assembled(head_end, tail_start)
+    new_token_count = count(truncated_content_str)
 
     if verbose:
-        original_token_estimate = (
-            max(1, int(len(content) / chars_per_token_approx)) if content else 0
-        )
+        if original_token_estimate is None:
+            original_token_estimate = content_tokens
         print(
-            f"      Conteúdo truncado: ~{new_token_estimate} tokens (original: ~{original_token_estimate} tokens)."
+            f"      Conteúdo truncado: ~{new_token_count} tokens (original: ~{original_token_estimate} tokens)."
         )
-
-    return truncated_content_str, new_token_estimate
+    return truncated_content_str, new_token_count
 
 
 def find_latest_context_dir(context_base_dir: Path) -> Optional[Path]:
@@ -134,6 +301,71 @@ def find_latest_context_dir(context_base_dir: Path) -> Optional[Path]:
     return sorted(valid_context_dirs, reverse=True)[0]
 
 
+def _build_file_unit(
+    relative_path_str: str,
+    filepath_abs: Path,
+    manifest_data: Optional[Dict[str, Any]],
+    is_essential: bool,
+) -> FileProcessUnit:
+    """
+    Cria a FileProcessUnit de um arquivo sem ler seu conteúdo: tokens, tipo e
+    sumário vêm do manifesto. Sem token_count no manifesto, usa a contagem
+    exata do cache de tokens (consulta somente leitura ao índice gravado pelo
+    generate_manifest.py) ou, na falta dela, a estimativa pelo tamanho.
+    """
+    file_size = filepath_abs.stat().st_size
+    original_token_count: Optional[int] = None
+    summary_text: Optional[str] = None
+    summary_tokens: Optional[int] = None
+    file_type: Optional[str] = None
+
+    if (
+        manifest_data
+        and "files" in manifest_data
+        and relative_path_str in manifest_data["files"]
+    ):
+        metadata = manifest_data["files"][relative_path_str]
+        if isinstance(metadata, dict):
+            summary_text = metadata.get("summary")
+            stc_from_manifest = metadata.get("summary_token_count")
+            if isinstance(stc_from_manifest, int) and stc_from_manifest >= 0:
+                summary_tokens = stc_from_manifest
+
+            file_type = metadata.get("type")
+
+            manifest_token_count = metadata.get("token_count")
+            if isinstance(manifest_token_count, int) and manifest_token_count >= 0:
+                original_token_count = manifest_token_count
+
+    if original_token_count is None or (summary_text and summary_tokens is None):
+        cached_tokens, cached_summary_tokens = (
+            token_cache.get_default_cache().lookup_file(filepath_abs)
+        )
+        if original_token_count is None and cached_tokens is not None:
+            original_token_count = cached_tokens
+        if summary_text and summary_tokens is None:
+            summary_tokens = (
+                cached_summary_tokens
+                if cached_summary_tokens is not None
+                else token_estimator.estimate_tokens(summary_text)
+            )
+    if original_token_count is None:
+        original_token_count = token_estimator.estimate_tokens_for_size(
+            file_size, file_type
+        )
+
+    return FileProcessUnit(
+        relative_path=relative_path_str,
+        source_path=filepath_abs,
+        token_count=original_token_count,
+        original_token_count=original_token_count,
+        file_type=file_type,
+        summary=summary_text,
+        summary_token_count=summary_tokens,
+        is_essential_from_map=is_essential,
+    )
+
+
 def _load_files_from_dir(
     context_dir: Path,
     processed_units: List[FileProcessUnit],
@@ -189,51 +421,10 @@ def _load_files_from_dir(
             continue
 
         try:
-            content = filepath_abs.read_text(encoding="utf-8", errors="ignore")
-            original_token_count = max(1, int(len(content) / 3.8)) if content else 0
-
-            summary_text: Optional[str] = None
-            summary_tokens: Optional[int] = None
-            file_type_from_manifest: Optional[str] = None
-
-            if (
-                manifest_data
-                and "files" in manifest_data
-                and relative_path_str in manifest_data["files"]
-            ):
-                metadata = manifest_data["files"][relative_path_str]
-                if isinstance(metadata, dict):
-                    summary_text = metadata.get("summary")
-                    stc_from_manifest = metadata.get("summary_token_count")
-                    if isinstance(stc_from_manifest, int) and stc_from_manifest >= 0:
-                        summary_tokens = stc_from_manifest
-                    elif summary_text:
-                        summary_tokens = max(1, int(len(summary_text) / 3.8))
-                    else:
-                        summary_tokens = None
-
-                    file_type_from_manifest = metadata.get("type")
-
-                    manifest_token_count = metadata.get("token_count")
-                    if (
-                        isinstance(manifest_token_count, int)
-                        and manifest_token_count >= 0
-                    ):
-                        original_token_count = manifest_token_count
-
             is_essential = relative_path_str in essential_map_paths_relative_str
-
             processed_units.append(
-                FileProcessUnit(
-                    relative_path=relative_path_str,
-                    content=content,
-                    original_content=content,
-                    token_count=original_token_count,
-                    original_token_count=original_token_count,
-                    file_type=file_type_from_manifest,
-                    summary=summary_text,
-                    summary_token_count=summary_tokens,
-                    is_essential_from_map=is_essential,
+                _build_file_unit(
+                    relative_path_str, filepath_abs, manifest_data, is_essential
                 )
             )
             loaded_count += 1
@@ -432,9 +623,7 @@ def load_essential_files_content(
 
         try:
             content = file_path_abs.read_text(encoding="utf-8", errors="ignore")
-            estimated_tokens_current_file = (
-                max(1, int(len(content) / 3.8)) if content else 0
-            )
+            estimated_tokens_current_file = token_estimator.estimate_tokens(content)
 
             content_to_add = content
             tokens_to_add = estimated_tokens_current_file
@@ -462,7 +651,10 @@ def load_essential_files_content(
                             f"    AVISO (AC3.4 / AC5.1b): Conteúdo do arquivo essencial '{relative_path_str}' ({estimated_tokens_current_file} tokens est.) será truncado para caber no orçamento de {remaining_token_budget} tokens."
                         )
                     content_to_add, tokens_to_add = _truncate_content(
-                        content, remaining_token_budget, verbose
+                        content,
+                        remaining_token_budget,
+                        verbose,
+                        head_ratio=_truncation_head_ratio(None, relative_path_str),
                     )
                     was_truncated = True
                     status_log_msg_part = "TRUNCADO"
@@ -530,7 +722,13 @@ def prepare_payload_for_selector_llm(
     if verbose:
         print("  Filtrando manifesto restante para LLM seletora:")
 
-    for path_str, metadata in files_metadata_from_manifest.items():
+    # Manifesto SQLite: uma única consulta em vez de um SELECT por caminho
+    manifest_entries = (
+        files_metadata_from_manifest.iter_entries(include_summary=True)
+        if isinstance(files_metadata_from_manifest, manifest_store.SqliteManifestFiles)
+        else files_metadata_from_manifest.items()
+    )
+    for path_str, metadata in manifest_entries:
         if path_str not in loaded_essential_relative_paths_str_set:
             if not isinstance(metadata, dict):
                 continue
@@ -571,18 +769,21 @@ def prepare_payload_for_selector_llm(
 
     if verbose:
         essential_tokens_est = (
-            max(1, int(len(essential_content_str) / 3.8))
+            max(1, token_estimator.estimate_tokens(essential_content_str))
             if essential_content_str
             else 0
         )
         remaining_manifest_tokens_est = (
-            max(1, int(len(remaining_manifest_json_str) / 3.8))
+            max(1, token_estimator.estimate_tokens(remaining_manifest_json_str))
             if remaining_manifest_json_str
             else 0
         )
         # Estima tokens do template
         prompt_template_tokens_est = max(
-            1, int(len(re.sub(r"{{.*?}}", "", selector_prompt_template_content)) / 3.8)
+            1,
+            token_estimator.estimate_tokens(
+                re.sub(r"{{.*?}}", "", selector_prompt_template_content)
+            ),
         )
 
         total_payload_tokens_est = (
@@ -674,47 +875,11 @@ def prepare_context_parts(
                 continue
 
             try:
-                content = essential_abs_path.read_text(
-                    encoding="utf-8", errors="ignore"
-                )
-                token_count_val = max(1, int(len(content) / 3.8)) if content else 0
-                summary_val, summary_token_val, type_val = None, None, None
-                if (
-                    manifest_data
-                    and "files" in manifest_data
-                    and rel_path_str in manifest_data["files"]
-                ):
-                    meta = manifest_data["files"][rel_path_str]
-                    if isinstance(meta, dict):
-                        summary_val = meta.get("summary")
-                        stc_from_manifest = meta.get("summary_token_count")
-                        if (
-                            isinstance(stc_from_manifest, int)
-                            and stc_from_manifest >= 0
-                        ):
-                            summary_token_val = stc_from_manifest
-                        elif summary_val:
-                            summary_token_val = max(1, int(len(summary_val) / 3.8))
-                        else:
-                            summary_token_val = None
-                        type_val = meta.get("type")
-                        manifest_token_count_val = meta.get("token_count")
-                        if isinstance(manifest_token_count_val, int):
-                            token_count_val = manifest_token_count_val
-
-                processed_units.append(
-                    FileProcessUnit(
-                        relative_path=rel_path_str,
-                        content=content,
-                        original_content=content,
-                        token_count=token_count_val,
-                        original_token_count=token_count_val,
-                        file_type=type_val,
-                        summary=summary_val,
-                        summary_token_count=summary_token_val,
-                        is_essential_from_map=True,
-                    )
+                unit = _build_file_unit(
+                    rel_path_str, essential_abs_path, manifest_data, True
                 )
+                token_count_val = unit.original_token_count
+                processed_units.append(unit)
                 loaded_as_essential_paths_str.add(rel_path_str)
                 if verbose:
                     print(
@@ -776,50 +941,9 @@ def prepare_context_parts(
                 continue
 
             try:
-                content = filepath_abs_incl.read_text(encoding="utf-8", errors="ignore")
-                original_token_count = max(1, int(len(content) / 3.8)) if content else 0
-                summary_text_incl, summary_tokens_val_incl, file_type_val_incl = (
-                    None,
-                    None,
-                    None,
-                )
-
-                if (
-                    manifest_data
-                    and "files" in manifest_data
-                    and rel_path_str_incl in manifest_data["files"]
-                ):
-                    metadata = manifest_data["files"][rel_path_str_incl]
-                    if isinstance(metadata, dict):
-                        summary_text_incl = metadata.get("summary")
-                        stc_from_manifest_incl = metadata.get("summary_token_count")
-                        if (
-                            isinstance(stc_from_manifest_incl, int)
-                            and stc_from_manifest_incl >= 0
-                        ):
-                            summary_tokens_val_incl = stc_from_manifest_incl
-                        elif summary_text_incl:
-                            summary_tokens_val_incl = max(
-                                1, int(len(summary_text_incl) / 3.8)
-                            )
-                        else:
-                            summary_tokens_val_incl = None
-                        file_type_val_incl = metadata.get("type")
-                        manifest_token_count_val_incl = metadata.get("token_count")
-                        if isinstance(manifest_token_count_val_incl, int):
-                            original_token_count = manifest_token_count_val_incl
-
                 processed_units.append(
-                    FileProcessUnit(
-                        relative_path=rel_path_str_incl,
-                        content=content,
-                        original_content=content,
-                        token_count=original_token_count,
-                        original_token_count=original_token_count,
-                        file_type=file_type_val_incl,
-                        summary=summary_text_incl,
-                        summary_token_count=summary_tokens_val_incl,
-                        is_essential_from_map=False,
+                    _build_file_unit(
+                        rel_path_str_incl, filepath_abs_incl, manifest_data, False
                     )
                 )
                 loaded_count_incl += 1
@@ -884,108 +1008,67 @@ def prepare_context_parts(
             print(
                 f"  AVISO (AC2.2): Contexto inicial ({current_total_tokens} tokens) excede o limite ({max_input_tokens_for_call} tokens). Aplicando reduções..."
             )
+        # AC2.2: uma opção por arquivo (integral, sumário, truncado ou omitido)
+        # escolhida por llm_core.budget para maximizar o valor retido no limite.
 
-        units_for_summary_reduction = sorted(
+        choices = budget.allocate_context_budget(
             [
-                unit
+                budget.BudgetItem(
+                    token_count=unit.original_token_count,
+                    file_type=unit.file_type,
+                    is_essential=unit.is_essential_from_map,
+                    summary_token_count=(
+                        unit.summary_token_count if unit.summary else None
+                    ),
+                )
                 for unit in processed_units
-                if not unit.is_essential_from_map
-                and unit.summary
-                and unit.summary_token_count is not None
-                and unit.summary_token_count < unit.original_token_count
             ],
-            key=lambda u: (
-                u.original_token_count
-                - (u.summary_token_count or u.original_token_count)
-            ),
-            reverse=True,
+            max_input_tokens_for_call,
         )
-        for unit in units_for_summary_reduction:
-            if current_total_tokens <= max_input_tokens_for_call:
-                break
-            if unit.summary and unit.summary_token_count is not None:
-                token_reduction = unit.token_count - unit.summary_token_count
-                if token_reduction > 0:
-                    if verbose:
-                        print(
-                            f"    AC2.2.1: Substituindo '{unit.relative_path}' ({unit.original_token_count} tokens originais) por sumário ({unit.summary_token_count} tokens). Economia: {token_reduction}"
-                        )
-                    unit.content = unit.summary
-                    unit.token_count = unit.summary_token_count
-                    current_total_tokens -= token_reduction
-                    unit.is_reduced_to_summary = True
-
-        if current_total_tokens > max_input_tokens_for_call:
-            units_to_truncate_non_essential = sorted(
-                [
-                    unit
-                    for unit in processed_units
-                    if not unit.is_essential_from_map and not unit.is_reduced_to_summary
-                ],
-                key=lambda u: u.token_count,
-                reverse=True,
-            )
-            for unit in units_to_truncate_non_essential:
-                if current_total_tokens <= max_input_tokens_for_call:
-                    break
-                needed_reduction_overall = (
-                    current_total_tokens - max_input_tokens_for_call
-                )
-                max_reduction_for_this_file = max(0, unit.token_count - 50)
-                reduction_to_apply = min(
-                    needed_reduction_overall, max_reduction_for_this_file
-                )
-                if reduction_to_apply > 0:
-                    target_token_for_this_file = unit.token_count - reduction_to_apply
-                    original_tokens_before_trunc = unit.token_count
-                    unit.content, unit.token_count = _truncate_content(
-                        unit.original_content, target_token_for_this_file, verbose
-                    )
-                    current_total_tokens -= (
-                        original_tokens_before_trunc - unit.token_count
+        for unit, choice in zip(processed_units, choices):
+            if choice.kind == budget.CHOICE_SUMMARY and unit.summary:
+                if verbose:
+                    print(
+                        f"    AC2.2.1: Substituindo '{unit.relative_path}' ({unit.original_token_count} tokens originais) por sumário ({choice.token_count} tokens). Economia: {unit.original_token_count - choice.token_count}"
                     )
-                    unit.is_truncated = True
-                    if verbose:
+                unit.content = unit.summary
+                unit.token_count = choice.token_count
+                unit.is_reduced_to_summary = True
+            elif choice.kind == budget.CHOICE_TRUNCATED:
+                unit.content, unit.token_count = _truncate_unit(
+                    unit, choice.token_count, verbose
+                )
+                unit.is_truncated = True
+                if verbose:
+                    if unit.is_essential_from_map:
                         print(
-                            f"    AC2.2.2 (Não Essencial): Truncando '{unit.relative_path}' de {original_tokens_before_trunc} para {unit.token_count} tokens."
+                            f"    AVISO (AC3.4): Conteúdo do arquivo essencial '{unit.relative_path}' ({unit.original_token_count} tokens est.) foi truncado para {unit.token_count} tokens para caber no limite da chamada principal."
                         )
-
-        if current_total_tokens > max_input_tokens_for_call:
-            units_to_truncate_essential = sorted(
-                [
-                    unit
-                    for unit in processed_units
-                    if unit.is_essential_from_map and not unit.is_reduced_to_summary
-                ],
-                key=lambda u: u.token_count,
-                reverse=True,
-            )
-            for unit in units_to_truncate_essential:
-                if current_total_tokens <= max_input_tokens_for_call:
-                    break
-                needed_reduction_overall = (
-                    current_total_tokens - max_input_tokens_for_call
-                )
-                max_reduction_for_this_file = max(0, unit.token_count - 100)
-                reduction_to_apply = min(
-                    needed_reduction_overall, max_reduction_for_this_file
-                )
-                if reduction_to_apply > 0:
-                    target_token_for_this_file = unit.token_count - reduction_to_apply
-                    original_tokens_before_trunc = unit.token_count
-                    unit.content, unit.token_count = _truncate_content(
-                        unit.original_content, target_token_for_this_file, verbose
-                    )
-                    current_total_tokens -= (
-                        original_tokens_before_trunc - unit.token_count
-                    )
-                    unit.is_truncated = True
-                    if verbose:
+                    else:
                         print(
-                            f"    AVISO (AC3.4): Conteúdo do arquivo essencial '{unit.relative_path}' ({original_tokens_before_trunc} tokens est.) foi truncado para {unit.token_count} tokens para caber no limite da chamada principal."
+                            f"    AC2.2.2 (Não Essencial): Truncando '{unit.relative_path}' de {unit.original_token_count} para {unit.token_count} tokens."
                         )
+            elif choice.kind == budget.CHOICE_DROPPED:
+                unit.content = ""
+                unit.token_count = 0
+                unit.is_dropped = True
+                if verbose:
+                    print(
+                        f"    AC2.2.3 (Não Essencial): Omitindo '{unit.relative_path}' ({unit.original_token_count} tokens) por falta de orçamento."
+                    )
 
     for unit in processed_units:
+        if unit.is_dropped:
+            continue
+        try:
+            unit_content = unit.load_content()
+        except OSError as e:
+            if verbose:
+                print(
+                    f"      - Aviso: Não foi possível ler '{unit.relative_path}': {e}",
+                    file=sys.stderr,
+                )
+            continue
         content_type_log = "integral"
         if unit.is_reduced_to_summary:
             content_type_log = "sumário"
@@ -997,32 +1080,12 @@ def prepare_context_parts(
                 f"    -> Incluindo '{unit.relative_path}' ({unit.token_count} tokens) como conteúdo {content_type_log}."
             )
 
-        summary_block_for_part_text = ""
-        if (
-            unit.summary and not unit.is_reduced_to_summary and not is_for_selector_llm
-        ):  # is_for_selector_llm condition is not relevant here
-            summary_block_for_part_text = (
-                f"--- SUMMARY ---\n{unit.summary}\n--- END SUMMARY ---"
-            )
-
-        delimiter_start = (
-            core_config.ESSENTIAL_CONTENT_DELIMITER_START
-            if unit.is_essential_from_map
-            else core_config.SUMMARY_CONTENT_DELIMITER_START
-        )
-        delimiter_end = (
-            core_config.ESSENTIAL_CONTENT_DELIMITER_END
-            if unit.is_essential_from_map
-            else core_config.SUMMARY_CONTENT_DELIMITER_END
+        final_text = _build_part_text(
+            unit,
+            unit_content,
+            include_summary=not unit.is_reduced_to_summary and not is_for_selector_llm,
         )
-
-        final_text_parts = [f"{delimiter_start}{unit.relative_path} ---"]
-        if summary_block_for_part_text:
-            final_text_parts.append(summary_block_for_part_text)
-        final_text_parts.append(unit.content)
-        final_text_parts.append(f"{delimiter_end}{unit.relative_path} ---")
-
-        final_text = "\n".join(final_text_parts)
+        del unit_content  # libera o conteúdo antes de ler o próximo arquivo
         context_parts_final.append(types.Part.from_text(text=final_text))
 
     final_total_tokens = sum(unit.token_count for unit in processed_units)
@@ -1041,6 +1104,27 @@ def prepare_context_parts(
     return context_parts_final
 
 
+def _build_part_text(
+    unit: FileProcessUnit, content: str, include_summary: bool = True
+) -> str:
+    """
+    Texto delimitado de uma parte do contexto (delimitador, sumário opcional,
+    conteúdo, delimitador final) montado com um único join, sem cópias
+    intermediárias do conteúdo ou do sumário.
+    """
+    if unit.is_essential_from_map:
+        delimiter_start = core_config.ESSENTIAL_CONTENT_DELIMITER_START
+        delimiter_end = core_config.ESSENTIAL_CONTENT_DELIMITER_END
+    else:
+        delimiter_start = core_config.SUMMARY_CONTENT_DELIMITER_START
+        delimiter_end = core_config.SUMMARY_CONTENT_DELIMITER_END
+    pieces = [delimiter_start, unit.relative_path, " ---\n"]
+    if include_summary and unit.summary:
+        pieces += ["--- SUMMARY ---\n", unit.summary, "\n--- END SUMMARY ---\n"]
+    pieces += [content, "\n", delimiter_end, unit.relative_path, " ---"]
+    return "".join(pieces)
+
+
 def find_latest_manifest_json(manifest_data_dir: Path) -> Optional[Path]:
     """Encontra o arquivo _manifest.json mais recente no diretório de dados."""
     if not manifest_data_dir.is_dir():
@@ -1055,14 +1139,26 @@ def find_latest_manifest_json(manifest_data_dir: Path) -> Optional[Path]:
     return sorted(manifest_files, reverse=True)[0]
 
 
-def load_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
-    """Carrega e parseia o arquivo de manifesto JSON."""
+def load_manifest(manifest_path: Path, lazy: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Carrega o manifesto. Com lazy=True, usa o SQLite irmão (*_manifest.sqlite)
+    quando ele existe e está em dia com o JSON: 'files' passa a ser um Mapping
+    somente-leitura com lookups por caminho. Use lazy=False para obter dicts
+    mutáveis (ex: tarefas que reescrevem o manifesto).
+    """
     if not manifest_path.is_file():
         print(
             f"Erro: Arquivo de manifesto não encontrado: {manifest_path}",
             file=sys.stderr,
         )
         return None
+    if lazy:
+        sqlite_manifest = manifest_store.open_manifest_sqlite(
+            manifest_store.sqlite_path_for(manifest_path),
+            source_json_path=manifest_path,
+        )
+        if sqlite_manifest is not None:
+            return sqlite_manifest
     try:
         with open(manifest_path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -1088,6 +1184,11 @@ def load_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
         return None
 
 
+def close_manifest(manifest_data: Optional[Dict[str, Any]]) -> None:
+    """Libera a conexão do manifesto carregado por load_manifest (se SQLite)."""
+    manifest_store.close_manifest(manifest_data)
+
+
 def prompt_user_on_empty_selection() -> bool:
     """Pergunta ao usuário se deve prosseguir com o contexto padrão ou abortar."""
     while True:
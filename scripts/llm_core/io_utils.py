@@ -2,6 +2,7 @@
 """
 LLM Core Input/Output Utilities Module.
 """
+
 import sys
 import re
 import datetime
@@ -12,6 +13,7 @@ from pathlib import Path
 from typing import Tuple, Optional, Dict, Any, List, Set
 
 from . import config as core_config  # Import the core config
+from . import manifest_store
 
 
 def save_llm_response(
@@ -210,11 +212,25 @@ def prompt_user_to_select_doc(doc_files: List[Path]) -> Optional[Path]:
 
 
 def update_manifest_file(manifest_path: Path, manifest_data: Dict[str, Any]) -> bool:
-    """Writes the updated manifest data back to the JSON file."""
+    """
+    Writes the updated manifest data back to the JSON file and refreshes the
+    sibling SQLite manifest, if one exists, so lazy readers don't fall back to JSON.
+    """
     try:
         with open(manifest_path, "w", encoding="utf-8") as f:
             json.dump(manifest_data, f, indent=4, ensure_ascii=False)
         print(f"  Arquivo de manifesto '{manifest_path.name}' atualizado com sucesso.")
+        sqlite_path = manifest_store.sqlite_path_for(manifest_path)
+        if sqlite_path.is_file():
+            try:
+                manifest_store.write_manifest_sqlite(
+                    manifest_data, sqlite_path, source_json_path=manifest_path
+                )
+            except Exception as e:
+                print(
+                    f"  Aviso: Não foi possível atualizar '{sqlite_path.name}': {e}",
+                    file=sys.stderr,
+                )
         return True
     except Exception as e:
         print(
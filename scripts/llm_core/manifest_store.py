@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Core Manifest Store Module.
+
+Formato compacto (SQLite) gravado ao lado do *_manifest.json, com carregamento
+preguiçoso: lookups por caminho e iteração sem materializar todos os sumários.
+"""
+import json
+import os
+import sqlite3
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+MANIFEST_SQLITE_SUFFIX = ".sqlite"
+SQLITE_SCHEMA_VERSION = "1"
+
+_SCHEMA_STATEMENTS = (
+    "CREATE TABLE IF NOT EXISTS manifest_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS manifest_files ("
+    " path TEXT PRIMARY KEY,"
+    " type TEXT,"
+    " token_count INTEGER,"
+    " metadata TEXT NOT NULL,"
+    " summary TEXT"
+    ")",
+)
+
+
+def sqlite_path_for(manifest_json_path: Path) -> Path:
+    """Caminho do arquivo SQLite irmão de um *_manifest.json."""
+    return manifest_json_path.with_suffix(MANIFEST_SQLITE_SUFFIX)
+
+
+def _json_fingerprint(manifest_json_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = os.stat(manifest_json_path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def write_manifest_sqlite(
+    manifest_data: Dict[str, Any],
+    sqlite_path: Path,
+    source_json_path: Optional[Path] = None,
+) -> Path:
+    """
+    Grava o manifesto no formato SQLite. Se source_json_path for informado,
+    registra mtime/size do JSON para que leitores detectem um SQLite defasado.
+    """
+    tmp_path = sqlite_path.with_name(sqlite_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for statement in _SCHEMA_STATEMENTS:
+            conn.execute(statement)
+        meta_rows = [
+            ("schema_version", SQLITE_SCHEMA_VERSION),
+            (
+                "_metadata",
+                json.dumps(manifest_data.get("_metadata", {}), ensure_ascii=False),
+            ),
+        ]
+        if source_json_path is not None:
+            fingerprint = _json_fingerprint(source_json_path)
+            if fingerprint is not None:
+                meta_rows.append(("source_json_fingerprint", json.dumps(fingerprint)))
+        conn.executemany("INSERT INTO manifest_meta VALUES (?, ?)", meta_rows)
+        conn.executemany(
+            "INSERT INTO manifest_files VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    path_str,
+                    metadata.get("type"),
+                    (
+                        metadata.get("token_count")
+                        if isinstance(metadata.get("token_count"), int)
+                        else None
+                    ),
+                    _metadata_without_summary(metadata),
+                    metadata.get("summary"),
+                )
+                for path_str, metadata in manifest_data.get("files", {}).items()
+                if isinstance(metadata, dict)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, sqlite_path)
+    return sqlite_path
+
+
+def _metadata_without_summary(metadata: Dict[str, Any]) -> str:
+    # Mantém a chave 'summary' (nula) na posição original para preservar a ordem
+    # das chaves; o texto vai para a coluna própria.
+    if "summary" in metadata:
+        metadata = {**metadata, "summary": None}
+    return json.dumps(metadata, ensure_ascii=False)
+
+
+class SqliteManifestFiles(Mapping):
+    """
+    Mapping somente-leitura {caminho: metadados} sobre a tabela manifest_files.
+    Cada acesso por caminho é uma consulta indexada; os metadados retornados
+    incluem 'summary' (como no JSON). Use iter_entries(include_summary=False)
+    para percorrer o manifesto sem carregar os sumários.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getitem__(self, path_str: str) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT metadata, summary FROM manifest_files WHERE path = ?",
+            (path_str,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(path_str)
+        metadata = json.loads(row[0])
+        if "summary" in metadata:
+            metadata["summary"] = row[1]
+        return metadata
+
+    def __contains__(self, path_str: object) -> bool:
+        return (
+            self._conn.execute(
+                "SELECT 1 FROM manifest_files WHERE path = ?", (path_str,)
+            ).fetchone()
+            is not None
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for (path_str,) in self._conn.execute(
+            "SELECT path FROM manifest_files ORDER BY path"
+        ):
+            yield path_str
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM manifest_files").fetchone()[0]
+
+    def iter_entries(
+        self, include_summary: bool = False
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Itera (caminho, metadados) em ordem; sem sumários por padrão."""
+        columns = "path, metadata, summary" if include_summary else "path, metadata"
+        for row in self._conn.execute(
+            f"SELECT {columns} FROM manifest_files ORDER BY path"
+        ):
+            metadata = json.loads(row[1])
+            if include_summary:
+                if "summary" in metadata:
+                    metadata["summary"] = row[2]
+            else:
+                metadata.pop("summary", None)
+            yield row[0], metadata
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SqliteManifestFiles":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def close_manifest(manifest_data: Optional[Mapping]) -> None:
+    """Fecha a conexão de um manifesto aberto via SQLite (no-op para JSON/None)."""
+    files = manifest_data.get("files") if manifest_data else None
+    if isinstance(files, SqliteManifestFiles):
+        files.close()
+
+
+def open_manifest_sqlite(
+    sqlite_path: Path, source_json_path: Optional[Path] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Abre o manifesto SQLite e retorna {"_metadata": ..., "files": SqliteManifestFiles}.
+    Retorna None se o arquivo não existir, for inválido ou estiver defasado em
+    relação a source_json_path (ex: JSON reescrito após a geração do SQLite).
+    """
+    try:
+        os.stat(sqlite_path)
+    except OSError:
+        return None
+    conn: Optional[sqlite3.Connection] = None
+    try:
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        meta = dict(conn.execute("SELECT key, value FROM manifest_meta").fetchall())
+    except sqlite3.Error as e:
+        if conn is not None:
+            conn.close()
+        print(
+            f"Aviso: Manifesto SQLite inválido '{sqlite_path.name}': {e}",
+            file=sys.stderr,
+        )
+        return None
+    if meta.get("schema_version") != SQLITE_SCHEMA_VERSION:
+        conn.close()
+        return None
+    if source_json_path is not None:
+        recorded = meta.get("source_json_fingerprint")
+        current = _json_fingerprint(source_json_path)
+        if (
+            recorded is None
+            or current is None
+            or tuple(json.loads(recorded)) != current
+        ):
+            conn.close()
+            return None
+    return {
+        "_metadata": json.loads(meta.get("_metadata", "{}")),
+        "files": SqliteManifestFiles(conn),
+    }
+
+
+def convert_json_to_sqlite(
+    manifest_json_path: Path, sqlite_path: Optional[Path] = None
+) -> Path:
+    """Converte um *_manifest.json existente para o formato SQLite irmão."""
+    with open(manifest_json_path, "r", encoding="utf-8") as f:
+        manifest_data = json.load(f)
+    return write_manifest_sqlite(
+        manifest_data,
+        sqlite_path or sqlite_path_for(manifest_json_path),
+        source_json_path=manifest_json_path,
+    )
+
+
+def convert_sqlite_to_json(sqlite_path: Path, manifest_json_path: Path) -> Path:
+    """Reconstrói o *_manifest.json a partir do SQLite (entradas ordenadas por caminho)."""
+    manifest = open_manifest_sqlite(sqlite_path)
+    if manifest is None:
+        raise ValueError(f"Manifesto SQLite inválido: {sqlite_path}")
+    files = manifest["files"]
+    try:
+        manifest_data = {
+            "_metadata": manifest["_metadata"],
+            "files": dict(files.iter_entries(include_summary=True)),
+        }
+    finally:
+        files.close()
+    with open(manifest_json_path, "w", encoding="utf-8") as f:
+        json.dump(manifest_data, f, indent=4, ensure_ascii=False)
+    return manifest_json_path
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Core Token Cache Module.
+
+Cache persistente (SQLite em scripts/data/) de contagens exatas de tokens por
+conteúdo: a chave é o SHA1 dos bytes do arquivo (o mesmo 'hash' do
+manifesto), então a contagem vale para qualquer caminho com o mesmo conteúdo.
+O generate_manifest.py é o único escritor: grava as contagens da API e
+reconstrói a cada execução o índice (caminho, size, mtime_ns) -> hash dos
+arquivos do manifesto. As tarefas apenas consultam (read_only), sem ler nem
+hashear arquivos.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from . import config as core_config
+
+TOKEN_CACHE_SCHEMA_VERSION = "1"
+
+_SCHEMA_STATEMENTS = (
+    "CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS token_counts ("
+    " content_hash TEXT PRIMARY KEY,"
+    " token_count INTEGER,"
+    " summary_token_count INTEGER,"
+    " updated_at REAL NOT NULL"
+    ")",
+    "CREATE TABLE IF NOT EXISTS file_hashes ("
+    " path TEXT PRIMARY KEY,"
+    " size INTEGER NOT NULL,"
+    " mtime_ns INTEGER NOT NULL,"
+    " content_hash TEXT NOT NULL"
+    ")",
+)
+
+_default_cache: Optional["TokenCountCache"] = None
+
+
+class TokenCountCache:
+    """
+    Acesso ao cache de contagens. Com read_only=True a conexão é aberta em
+    modo somente leitura e um arquivo inexistente equivale a um cache vazio.
+    Erros de SQLite desativam o cache (com um aviso) em vez de interromper a
+    tarefa: o chamador volta à estimativa.
+    """
+
+    def __init__(self, cache_path: Path, read_only: bool = False):
+        self.cache_path = cache_path
+        self.read_only = read_only
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._disabled:
+            return self._conn
+        if self.read_only and not self.cache_path.is_file():
+            return None
+        try:
+            if self.read_only:
+                conn = sqlite3.connect(
+                    f"{self.cache_path.resolve().as_uri()}?mode=ro", uri=True
+                )
+            else:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.cache_path)
+                for statement in _SCHEMA_STATEMENTS:
+                    conn.execute(statement)
+                conn.execute(
+                    "INSERT OR IGNORE INTO cache_meta VALUES ('schema_version', ?)",
+                    (TOKEN_CACHE_SCHEMA_VERSION,),
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        self._conn = conn
+        return conn
+
+    def _disable(self, error: Exception) -> None:
+        print(
+            f"Aviso: Cache de tokens '{self.cache_path.name}' indisponível: {error}",
+            file=sys.stderr,
+        )
+        self._disabled = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get(self, content_hash: str) -> Tuple[Optional[int], Optional[int]]:
+        """(token_count, summary_token_count) gravados para o conteúdo, ou (None, None)."""
+        conn = self._connection()
+        if conn is None:
+            return None, None
+        try:
+            row = conn.execute(
+                "SELECT token_count, summary_token_count FROM token_counts WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None, None
+        return (row[0], row[1]) if row else (None, None)
+
+    def put_many(
+        self, entries: Iterable[Tuple[str, Optional[int], Optional[int]]]
+    ) -> int:
+        """
+        Grava (hash, token_count, summary_token_count); valores None não
+        apagam contagens já gravadas. Retorna o número de entradas gravadas.
+        """
+        conn = self._connection()
+        if conn is None:
+            return 0
+        now = time.time()
+        rows = [
+            (content_hash, token_count, summary_token_count, now)
+            for content_hash, token_count, summary_token_count in entries
+            if content_hash
+            and (token_count is not None or summary_token_count is not None)
+        ]
+        try:
+            conn.executemany(
+                "INSERT INTO token_counts VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET "
+                " token_count = COALESCE(excluded.token_count, token_count),"
+                " summary_token_count = COALESCE(excluded.summary_token_count, summary_token_count),"
+                " updated_at = excluded.updated_at",
+                rows,
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return 0
+        return len(rows)
+
+    def put(
+        self,
+        content_hash: str,
+        token_count: Optional[int] = None,
+        summary_token_count: Optional[int] = None,
+    ) -> None:
+        """Grava a contagem exata (ex: da API) de um conteúdo."""
+        self.put_many([(content_hash, token_count, summary_token_count)])
+
+    def replace_file_index(self, entries: Iterable[Tuple[str, int, int, str]]) -> int:
+        """
+        Substitui o índice (caminho absoluto, size, mtime_ns, hash) pelo dos
+        arquivos do manifesto atual, descartando caminhos que saíram dele.
+        Retorna o número de caminhos indexados.
+        """
+        conn = self._connection()
+        if conn is None:
+            return 0
+        rows = list(entries)
+        try:
+            with conn:
+                conn.execute("DELETE FROM file_hashes")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+            return 0
+        return len(rows)
+
+    def content_hash_for(self, file_path: Path) -> Optional[str]:
+        """
+        Hash do conteúdo segundo o índice, se size/mtime_ns do arquivo ainda
+        coincidem; None caso contrário (o arquivo não é lido).
+        """
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            stat_result = os.stat(file_path)
+            row = conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?",
+                (os.path.abspath(file_path),),
+            ).fetchone()
+        except OSError:
+            return None
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row and row[0] == stat_result.st_size and row[1] == stat_result.st_mtime_ns:
+            return row[2]
+        return None
+
+    def lookup_file(self, file_path: Path) -> Tuple[Optional[int], Optional[int]]:
+        """(token_count, summary_token_count) do conteúdo atual do arquivo, se em cache."""
+        content_hash = self.content_hash_for(file_path)
+        if content_hash is None:
+            return None, None
+        return self.get(content_hash)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def get_default_cache() -> TokenCountCache:
+    """
+    Cache padrão (core_config.TOKEN_CACHE_FILE) para consultas das tarefas,
+    somente leitura.
+    """
+    global _default_cache
+    if (
+        _default_cache is None
+        or _default_cache.cache_path != core_config.TOKEN_CACHE_FILE
+    ):
+        _default_cache = TokenCountCache(core_config.TOKEN_CACHE_FILE, read_only=True)
+    return _default_cache
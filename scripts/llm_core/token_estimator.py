@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Core Token Estimator Module.
+
+Estimativa offline de tokens compartilhada por generate_manifest.py e
+llm_core.context. A razão bytes (UTF-8)/token é calibrada por tipo de arquivo
+(get_file_type()) a partir das contagens da API e do 'size' (bytes) já
+gravados nos manifestos; tipos sem calibração usam DEFAULT_BYTES_PER_TOKEN.
+Texto e tamanho de arquivo são medidos na mesma unidade, então manifesto e
+contexto estimam o mesmo valor para o mesmo arquivo.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from . import config as core_config
+
+DEFAULT_BYTES_PER_TOKEN = 3.8
+MIN_SAMPLES_FOR_CALIBRATION = 3
+MIN_BYTES_PER_TOKEN = 1.5
+MAX_BYTES_PER_TOKEN = 8.0
+CALIBRATION_VERSION = 1
+# Tipos cuja contagem no manifesto é sempre estimada (nunca vem da API)
+ESTIMATE_ONLY_FILE_TYPES = ("environment_env", "context_code_")
+
+_calibration_cache: Optional[Dict[str, Any]] = None
+
+
+def file_type_category(file_type: str) -> str:
+    """Categoria ampla de um tipo do manifesto (ex: 'code_php_model' -> 'code')."""
+    return file_type.split("_", 1)[0]
+
+
+def is_api_token_count(metadata: Mapping[str, Any]) -> bool:
+    """
+    Indica se o token_count de uma entrada do manifesto veio da API e tem o
+    tamanho do arquivo (size) necessário para a calibração.
+    """
+    token_count = metadata.get("token_count")
+    size = metadata.get("size")
+    file_type = metadata.get("type") or ""
+    if not isinstance(token_count, int) or token_count <= 0:
+        return False
+    if not isinstance(size, int) or size <= 0:
+        return False
+    if file_type.startswith(ESTIMATE_ONLY_FILE_TYPES):
+        return False
+    source = metadata.get("token_count_source")
+    if source is not None:
+        return source == "api"
+    # Manifestos antigos: descarta o que coincide com o fallback len/4 de então
+    return token_count != max(1, int(size / 4))
+
+
+def _clamp_ratio(ratio: float) -> float:
+    return min(MAX_BYTES_PER_TOKEN, max(MIN_BYTES_PER_TOKEN, ratio))
+
+
+def fit_calibration(
+    files_entries: Iterable[Tuple[str, Mapping[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Ajusta a razão bytes/token por tipo e por categoria a partir de
+    (path, metadados) de manifestos: soma(size) / soma(token_count) das
+    entradas contadas pela API. Grupos com menos de
+    MIN_SAMPLES_FOR_CALIBRATION amostras são descartados.
+    """
+    totals: Dict[str, Dict[str, Tuple[int, int, int]]] = {"types": {}, "categories": {}}
+    sample_count = 0
+    for _, metadata in files_entries:
+        if not isinstance(metadata, Mapping) or not is_api_token_count(metadata):
+            continue
+        sample_count += 1
+        file_type = metadata["type"]
+        for group, key in (
+            ("types", file_type),
+            ("categories", file_type_category(file_type)),
+        ):
+            size_bytes, tokens, samples = totals[group].get(key, (0, 0, 0))
+            totals[group][key] = (
+                size_bytes + metadata["size"],
+                tokens + metadata["token_count"],
+                samples + 1,
+            )
+    calibration: Dict[str, Any] = {
+        "version": CALIBRATION_VERSION,
+        "default_bytes_per_token": DEFAULT_BYTES_PER_TOKEN,
+        "samples": sample_count,
+    }
+    for group, group_totals in totals.items():
+        calibration[group] = {
+            key: round(_clamp_ratio(size_bytes / tokens), 4)
+            for key, (size_bytes, tokens, samples) in sorted(group_totals.items())
+            if samples >= MIN_SAMPLES_FOR_CALIBRATION
+        }
+    return calibration
+
+
+def load_calibration(
+    calibration_path: Optional[Path] = None, reload: bool = False
+) -> Dict[str, Any]:
+    """Carrega (com cache) a calibração gravada; retorna {} se ausente ou inválida."""
+    global _calibration_cache
+    if calibration_path is None and _calibration_cache is not None and not reload:
+        return _calibration_cache
+    path = calibration_path or core_config.TOKEN_CALIBRATION_FILE
+    calibration: Dict[str, Any] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get("version") == CALIBRATION_VERSION:
+            calibration = data
+    except (OSError, json.JSONDecodeError):
+        pass
+    if calibration_path is None:
+        _calibration_cache = calibration
+    return calibration
+
+
+def save_calibration(
+    calibration: Dict[str, Any], calibration_path: Optional[Path] = None
+) -> Path:
+    """Grava a calibração e atualiza o cache do processo."""
+    global _calibration_cache
+    path = calibration_path or core_config.TOKEN_CALIBRATION_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=4, ensure_ascii=False)
+    if calibration_path is None:
+        _calibration_cache = calibration
+    return path
+
+
+def bytes_per_token(
+    file_type: Optional[str] = None, calibration: Optional[Dict[str, Any]] = None
+) -> float:
+    """Razão bytes/token para o tipo: calibração do tipo, da categoria ou o padrão."""
+    if not file_type:
+        return DEFAULT_BYTES_PER_TOKEN
+    if calibration is None:
+        calibration = load_calibration()
+    ratio = (calibration.get("types") or {}).get(file_type) or (
+        calibration.get("categories") or {}
+    ).get(file_type_category(file_type))
+    return float(ratio) if ratio else DEFAULT_BYTES_PER_TOKEN
+
+
+def estimate_tokens(
+    content: str,
+    file_type: Optional[str] = None,
+    calibration: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Estimativa offline de tokens de 'content', pelo tamanho em UTF-8 (0 se vazio)."""
+    if not content:
+        return 0
+    return estimate_tokens_for_size(
+        len(content.encode("utf-8", errors="ignore")), file_type, calibration
+    )
+
+
+def estimate_tokens_for_size(
+    byte_count: int,
+    file_type: Optional[str] = None,
+    calibration: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Estimativa a partir do tamanho em bytes, sem ler o conteúdo (ex: st_size)."""
+    if byte_count <= 0:
+        return 0
+    return max(1, int(byte_count / bytes_per_token(file_type, calibration)))
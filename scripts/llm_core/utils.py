@@ -2,6 +2,7 @@
 """
 LLM Core General Utilities Module.
 """
+import os
 import shutil
 import subprocess
 import sys
@@ -25,6 +26,9 @@ def find_command(primary: str, fallback: str) -> Optional[str]:
 
 PYTHON_CMD = find_command("python3", "python")
 PIP_CMD = find_command("pip3", "pip")
+# 'php artisan test --parallel' depende do paratest, que não está no
+# require-dev do composer.json ('composer require brianium/paratest --dev')
+PARATEST_BIN = core_config.PROJECT_ROOT / "vendor/brianium/paratest/bin/paratest"
 
 
 def command_exists(cmd: str) -> bool:
@@ -32,6 +36,22 @@ def command_exists(cmd: str) -> bool:
     return shutil.which(cmd) is not None
 
 
+def phpunit_parallel_args(requested_processes: int = 1) -> Tuple[List[str], int]:
+    """
+    Argumentos extras de 'php artisan test' para o modo paralelo e o número
+    de processos (generate_context.py e run_tests.py). requested_processes
+    <= 0 usa os.cpu_count(); 1 mantém a execução serial, assim como a
+    ausência do paratest. No modo paralelo o Laravel cria um banco de testes
+    por processo; --recreate-databases evita reaproveitar bancos antigos.
+    """
+    processes = (
+        requested_processes if requested_processes > 0 else (os.cpu_count() or 1)
+    )
+    if processes <= 1 or not PARATEST_BIN.is_file():
+        return [], 1
+    return ["--parallel", f"--processes={processes}", "--recreate-databases"], processes
+
+
 def suggest_install(cmd_name: str, pkg_name: Optional[str] = None) -> str:
     """Generates installation suggestion message."""
     pkg = pkg_name or cmd_name
@@ -12,15 +12,22 @@
 #
 # Uso:
 #   python scripts/run_tests.py [--skip-phpunit] [--skip-dusk] [--stop-on-failure]
+#                               [--processes N] [--dusk-shards N]
 #
 # Opções:
 #   --skip-phpunit      Pula a execução dos testes PHPUnit.
 #   --skip-dusk         Pula a execução dos testes Laravel Dusk.
 #   --stop-on-failure   Para a execução imediatamente se uma suíte de teste falhar.
+#   --processes N       Processos do PHPUnit em paralelo (requer paratest;
+#                       0 = número de CPUs, padrão 1 = serial).
+#   --dusk-shards N     Divide os testes Dusk em N shards paralelos, cada um com
+#                       ChromeDriver, servidor e banco de dados próprios.
 # ==============================================================================
 
 import argparse
 import datetime
+import heapq
+import json
 import os
 import platform
 import shlex
@@ -29,8 +36,19 @@ import signal
 import subprocess
 import sys
 import time
+import traceback
+import urllib.error
+import urllib.request
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import Callable, List, Optional, Tuple, Dict
+from xml.etree import ElementTree
+
+# Adiciona o diretório raiz do projeto ao sys.path para importar llm_core
+_project_root_dir_for_script = Path(__file__).resolve().parent.parent
+if str(_project_root_dir_for_script) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_script))
+
+from scripts.llm_core import utils as core_utils
 
 # --- Configurações ---
 BASE_DIR = Path(__file__).resolve().parent.parent  # Raiz do projeto
@@ -47,6 +65,22 @@ LOG_DIR = BASE_DIR / "storage" / "logs"  # Diretório de logs
 CHROMEDRIVER_LOG = LOG_DIR / "chromedriver.log"
 DUSK_SERVE_LOG = LOG_DIR / "dusk_serve.log"
 VITE_DEV_LOG = LOG_DIR / "vite_dev.log"  # Log para o Vite
+# Dusk em shards (--dusk-shards N)
+PHPUNIT_BIN = VENDOR_DIR / "phpunit" / "phpunit" / "phpunit"
+DUSK_PHPUNIT_CONFIG = BASE_DIR / "phpunit.dusk.xml"
+DUSK_SHARD_ENV_PREFIX = "dusk.shard"
+DUSK_SHARD_LOG_DIR = LOG_DIR / "dusk_shards"
+DUSK_SHARDS_LOG = LOG_DIR / "dusk_shards.log"  # Logs dos shards consolidados
+DUSK_TIMINGS_FILE = LOG_DIR / "dusk_timings.json"  # Duração por arquivo de teste
+VITE_HOT_FILE = BASE_DIR / "public" / "hot"  # Escrito pelo laravel-vite-plugin
+# Prontidão dos serviços do Dusk: timeout (s) por serviço e backoff exponencial
+READY_TIMEOUT_CHROMEDRIVER = 30.0
+READY_TIMEOUT_APP_SERVER = 60.0
+READY_TIMEOUT_VITE = 60.0
+READY_POLL_INITIAL_DELAY = 0.1
+READY_POLL_MAX_DELAY = 2.0
+READY_PROBE_TIMEOUT = 2.0
+READY_LOG_TAIL_LINES = 20
 
 # --- Variáveis de Estado ---
 overall_exit_code = 0
@@ -185,14 +219,369 @@ def start_background_process(
         return None
 
 
-def check_process_running(p: Optional[subprocess.Popen], name: str) -> bool:
-    """Verifica se um processo Popen ainda está rodando."""
+# --- Dusk em shards ---
+
+
+def discover_dusk_test_files(test_dir: Path = DUSK_TEST_DIR) -> List[str]:
+    """Arquivos de teste Dusk (*Test.php, como no phpunit.dusk.xml), relativos a BASE_DIR."""
+    return sorted(
+        p.relative_to(BASE_DIR).as_posix() for p in test_dir.rglob("*Test.php")
+    )
+
+
+def load_dusk_timings(timings_file: Path = DUSK_TIMINGS_FILE) -> Dict[str, float]:
+    """Durações (s) por arquivo de teste registradas em execuções anteriores."""
+    try:
+        with open(timings_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        str(k): float(v)
+        for k, v in data.items()
+        if isinstance(v, (int, float)) and v >= 0
+    }
+
+
+def save_dusk_timings(
+    timings: Dict[str, float], timings_file: Path = DUSK_TIMINGS_FILE
+) -> None:
+    """Atualiza o histórico de durações com as medições da execução atual."""
+    merged = load_dusk_timings(timings_file)
+    merged.update({k: round(v, 3) for k, v in timings.items()})
+    try:
+        timings_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(timings_file, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(merged.items())), f, indent=2)
+    except OSError as e:
+        log(f"  Aviso: Não foi possível gravar '{timings_file}': {e}")
+
+
+def assign_dusk_shards(
+    test_files: List[str], timings: Dict[str, float], shard_count: int
+) -> List[List[str]]:
+    """
+    Distribui os arquivos entre shard_count shards pelo histórico de duração
+    (maior primeiro, sempre no shard menos carregado). Arquivos sem histórico
+    usam a média das durações conhecidas. Shards vazios são descartados.
+    """
+    if not test_files:
+        return []
+    known = [timings[f] for f in test_files if f in timings]
+    default_duration = sum(known) / len(known) if known else 1.0
+    shards: List[List[str]] = [[] for _ in range(max(1, shard_count))]
+    loads = [(0.0, i) for i in range(len(shards))]
+    for test_file in sorted(
+        test_files, key=lambda f: (-timings.get(f, default_duration), f)
+    ):
+        load, index = heapq.heappop(loads)
+        shards[index].append(test_file)
+        heapq.heappush(loads, (load + timings.get(test_file, default_duration), index))
+    return [sorted(shard) for shard in shards if shard]
+
+
+def parse_junit_report(
+    junit_file: Path,
+) -> Tuple[Dict[str, int], Dict[str, float]]:
+    """
+    Lê um relatório JUnit do PHPUnit e retorna (totais, duração por arquivo).
+    Totais: tests, failures, errors, skipped. Arquivos relativos a BASE_DIR.
+    """
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    durations: Dict[str, float] = {}
+    try:
+        root = ElementTree.parse(junit_file).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        log(f"  Aviso: Relatório JUnit inválido ou ausente '{junit_file.name}': {e}")
+        return totals, durations
+    for testcase in root.iter("testcase"):
+        totals["tests"] += 1
+        for tag, key in (
+            ("failure", "failures"),
+            ("error", "errors"),
+            ("skipped", "skipped"),
+        ):
+            if testcase.find(tag) is not None:
+                totals[key] += 1
+        file_attr = testcase.get("file")
+        if not file_attr:
+            continue
+        file_path = Path(file_attr)
+        try:
+            rel_file = file_path.resolve().relative_to(BASE_DIR).as_posix()
+        except ValueError:
+            rel_file = file_path.as_posix()
+        durations[rel_file] = durations.get(rel_file, 0.0) + float(
+            testcase.get("time") or 0
+        )
+    return totals, durations
+
+
+def read_env_file(env_file: Path) -> Dict[str, str]:
+    """Leitura simples de um arquivo .env (CHAVE=valor, ignora comentários)."""
+    values: Dict[str, str] = {}
+    try:
+        lines = env_file.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return values
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        values[key.strip()] = value.strip().strip('"').strip("'")
+    return values
+
+
+# Cria (DROP + CREATE) ou remove o banco de um shard Dusk via PDO, sem depender
+# dos clientes mysql/psql; os parâmetros chegam por variáveis de ambiente.
+DUSK_SHARD_DB_PHP = r"""
+$driver = getenv('SHARD_DB_DRIVER');
+$host = 'host=' . getenv('SHARD_DB_HOST') . ';port=' . getenv('SHARD_DB_PORT');
+$dsn = $driver === 'pgsql' ? "pgsql:$host;dbname=postgres" : "mysql:$host";
+$pdo = new PDO($dsn, getenv('SHARD_DB_USERNAME'), getenv('SHARD_DB_PASSWORD'),
+    [PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION]);
+$q = $driver === 'pgsql' ? '"' : '`';
+$name = $q . str_replace($q, $q . $q, getenv('SHARD_DB_NAME')) . $q;
+$pdo->exec("DROP DATABASE IF EXISTS $name");
+if (getenv('SHARD_DB_ACTION') === 'create') {
+    $pdo->exec("CREATE DATABASE $name");
+}
+"""
+DUSK_SHARD_DB_DRIVERS = {"mysql": "3306", "mariadb": "3306", "pgsql": "5432"}
+
+
+def manage_dusk_shard_database(env_file: Path, action: str) -> bool:
+    """
+    Cria (action='create', recriando se já existir) ou remove (action='drop')
+    o banco DB_DATABASE de um '.env.dusk.shard<N>' no servidor MySQL/MariaDB/
+    PostgreSQL configurado nele. Retorna False (com log) em caso de erro.
+    """
+    values = read_env_file(env_file)
+    driver = values.get("DB_CONNECTION", "mysql")
+    if driver not in DUSK_SHARD_DB_DRIVERS:
+        log(
+            f"  Erro: DB_CONNECTION '{driver}' não suportado com --dusk-shards (use sqlite, mysql, mariadb ou pgsql)."
+        )
+        return False
+    db_name = values.get("DB_DATABASE", "")
+    exit_code, stdout, stderr = run_command(
+        [PHP_CMD, "-r", DUSK_SHARD_DB_PHP],
+        env={
+            "SHARD_DB_ACTION": action,
+            "SHARD_DB_DRIVER": driver,
+            "SHARD_DB_HOST": values.get("DB_HOST", "127.0.0.1"),
+            "SHARD_DB_PORT": values.get("DB_PORT", DUSK_SHARD_DB_DRIVERS[driver]),
+            "SHARD_DB_USERNAME": values.get("DB_USERNAME", ""),
+            "SHARD_DB_PASSWORD": values.get("DB_PASSWORD", ""),
+            "SHARD_DB_NAME": db_name,
+        },
+        check=False,
+        timeout=60,
+    )
+    if exit_code != 0:
+        verb = "criar" if action == "create" else "remover"
+        log(
+            f"  Erro: Não foi possível {verb} o banco '{db_name}' do shard Dusk ({env_file.name}): {(stderr or stdout).strip()}"
+        )
+        return False
+    return True
+
+
+def write_dusk_shard_env(
+    shard_index: int, app_port: int, driver_port: int
+) -> Tuple[str, Path, Optional[Path]]:
+    """
+    Cria '.env.dusk.shard<N>' a partir do .env do Dusk (ou do .env), com
+    APP_URL, DUSK_DRIVER_URL e um banco de dados próprios do shard. Retorna
+    (nome do ambiente, arquivo .env, arquivo SQLite do shard ou None).
+    """
+    base_env_file = DUSK_ENV_FILE if DUSK_ENV_FILE.is_file() else BASE_DIR / ".env"
+    base_values = read_env_file(base_env_file)
+    try:
+        base_lines = base_env_file.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        base_lines = []
+    env_name = f"{DUSK_SHARD_ENV_PREFIX}{shard_index}"
+    env_file = BASE_DIR / f".env.{env_name}"
+
+    sqlite_file: Optional[Path] = None
+    if base_values.get("DB_CONNECTION", "sqlite") == "sqlite":
+        sqlite_file = BASE_DIR / "database" / f"dusk_shard_{shard_index}.sqlite"
+        sqlite_file.parent.mkdir(parents=True, exist_ok=True)
+        sqlite_file.write_bytes(b"")
+        db_database = str(sqlite_file)
+    else:
+        # Bancos de servidor (MySQL/PostgreSQL): um banco por shard, com sufixo
+        db_database = f"{base_values.get('DB_DATABASE', 'laravel')}_dusk_{shard_index}"
+
+    overrides = {
+        "APP_ENV": env_name,
+        "APP_URL": f"http://127.0.0.1:{app_port}",
+        "DUSK_DRIVER_URL": f"http://localhost:{driver_port}",
+        "DB_DATABASE": db_database,
+    }
+    # Linhas não sobrescritas são copiadas como estão (aspas, espaços e
+    # comentários preservados para o phpdotenv)
+    lines = [
+        line for line in base_lines if line.split("=", 1)[0].strip() not in overrides
+    ]
+    lines.append(f"# Gerado por run_tests.py (shard Dusk {shard_index})")
+    lines.extend(f'{key}="{value}"' for key, value in overrides.items())
+    env_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return env_name, env_file, sqlite_file
+
+
+def run_dusk_sharded(chromedriver_path: Path, shard_count: int) -> int:
+    """
+    Executa a suíte Dusk em até shard_count shards paralelos. Cada shard tem
+    seu ChromeDriver, 'artisan serve' e banco de dados (portas
+    DUSK_CHROMEDRIVER_PORT+N e DUSK_APP_PORT+N); o Vite é compartilhado.
+    Os arquivos de teste são distribuídos pelo histórico de duração e os
+    resultados (JUnit) e logs dos shards são consolidados ao final.
+    Retorna o código de saída combinado (o primeiro diferente de zero).
+    """
+    test_files = discover_dusk_test_files()
+    timings = load_dusk_timings()
+    shards = assign_dusk_shards(test_files, timings, shard_count)
+    if not shards:
+        log("  Aviso: Nenhum arquivo de teste Dusk encontrado.")
+        return 0
+    log(f"[Dusk] Executando {len(test_files)} arquivos em {len(shards)} shards...")
+    DUSK_SHARD_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    generated_files: List[Path] = []
+    shard_databases: List[Path] = []  # .env dos shards com banco no servidor
+    shard_runs: List[Tuple[int, Optional[subprocess.Popen], Path, Path]] = []
+    try:
+        servers: List[
+            Tuple[int, int, int, Optional[subprocess.Popen], Optional[subprocess.Popen]]
+        ] = []
+        for index, shard_files in enumerate(shards, start=1):
+            app_port = int(DUSK_APP_PORT) + index - 1
+            driver_port = int(DUSK_CHROMEDRIVER_PORT) + index - 1
+            env_name, env_file, sqlite_file = write_dusk_shard_env(
+                index, app_port, driver_port
+            )
+            generated_files.append(env_file)
+            if sqlite_file:
+                generated_files.append(sqlite_file)
+            elif manage_dusk_shard_database(env_file, "create"):
+                shard_databases.append(env_file)
+            else:
+                return 1
+            estimated = sum(timings.get(f, 0.0) for f in shard_files)
+            log(
+                f"  Shard {index}: {len(shard_files)} arquivos (~{estimated:.0f}s), app :{app_port}, chromedriver :{driver_port}"
+            )
+            chromedriver_proc = start_background_process(
+                [str(chromedriver_path), f"--port={driver_port}"],
+                DUSK_SHARD_LOG_DIR / f"chromedriver_{index}.log",
+            )
+            app_server_proc = start_background_process(
+                [
+                    PHP_CMD,
+                    str(ARTISAN_FILE),
+                    "serve",
+                    f"--port={app_port}",
+                    f"--env={env_name}",
+                ],
+                DUSK_SHARD_LOG_DIR / f"serve_{index}.log",
+            )
+            servers.append(
+                (index, driver_port, app_port, chromedriver_proc, app_server_proc)
+            )
+
+        # Os servidores sobem em paralelo; cada espera só dura o que falta
+        for index, driver_port, app_port, chromedriver_proc, app_server_proc in servers:
+            if not wait_until_ready(
+                f"ChromeDriver (shard {index})",
+                chromedriver_proc,
+                http_probe(f"http://127.0.0.1:{driver_port}/status"),
+                READY_TIMEOUT_CHROMEDRIVER,
+                DUSK_SHARD_LOG_DIR / f"chromedriver_{index}.log",
+            ) or not wait_until_ready(
+                f"Servidor App (shard {index})",
+                app_server_proc,
+                http_probe(f"http://127.0.0.1:{app_port}/"),
+                READY_TIMEOUT_APP_SERVER,
+                DUSK_SHARD_LOG_DIR / f"serve_{index}.log",
+            ):
+                return 1
+
+        # 'artisan dusk' troca o .env durante a execução; com shards em
+        # paralelo o PHPUnit é chamado diretamente com o APP_ENV do shard.
+        for index, shard_files in enumerate(shards, start=1):
+            junit_file = DUSK_SHARD_LOG_DIR / f"junit_{index}.xml"
+            if junit_file.exists():
+                junit_file.unlink()
+            shard_log = DUSK_SHARD_LOG_DIR / f"dusk_{index}.log"
+            proc = start_background_process(
+                [
+                    PHP_CMD,
+                    str(PHPUNIT_BIN),
+                    "-c",
+                    str(DUSK_PHPUNIT_CONFIG),
+                    "--log-junit",
+                    str(junit_file),
+                ]
+                + shard_files,
+                shard_log,
+                env={"APP_ENV": f"{DUSK_SHARD_ENV_PREFIX}{index}"},
+            )
+            shard_runs.append((index, proc, shard_log, junit_file))
+
+        combined_exit_code = 0
+        totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+        measured: Dict[str, float] = {}
+        with open(DUSK_SHARDS_LOG, "w", encoding="utf-8") as merged_log:
+            for index, proc, shard_log, junit_file in shard_runs:
+                exit_code = proc.wait() if proc else 1
+                log(f"  Shard {index} concluído com código {exit_code}.")
+                if exit_code != 0 and combined_exit_code == 0:
+                    combined_exit_code = exit_code
+                shard_totals, shard_durations = parse_junit_report(junit_file)
+                for key, value in shard_totals.items():
+                    totals[key] += value
+                measured.update(shard_durations)
+                merged_log.write(f"===== Shard {index} (código {exit_code}) =====\n")
+                try:
+                    merged_log.write(
+                        shard_log.read_text(encoding="utf-8", errors="replace")
+                    )
+                except OSError as e:
+                    merged_log.write(f"(log indisponível: {e})\n")
+                merged_log.write("\n")
+
+        if measured:
+            save_dusk_timings(measured)
+        log(
+            f"[Dusk] Resultado consolidado: {totals['tests']} testes, {totals['failures']} falhas, {totals['errors']} erros, {totals['skipped']} pulados. Log: {DUSK_SHARDS_LOG.relative_to(BASE_DIR)}"
+        )
+        return combined_exit_code
+    finally:
+        for env_file in shard_databases:
+            manage_dusk_shard_database(env_file, "drop")
+        for generated_file in generated_files:
+            try:
+                generated_file.unlink()
+            except OSError:
+                pass
+
+
+def check_process_running(
+    p: Optional[subprocess.Popen], name: str, quiet: bool = False
+) -> bool:
+    """Verifica se um processo Popen ainda está rodando (quiet: sem log se estiver)."""
     if p is None:
         log(f"  Erro: Objeto de processo para '{name}' é None.")
         return False
     # poll() retorna None se o processo ainda está rodando
     if p.poll() is None:
-        log(f"  {name} (PID: {p.pid}) parece estar rodando.")
+        if not quiet:
+            log(f"  {name} (PID: {p.pid}) parece estar rodando.")
         return True
     else:
         log(
@@ -204,6 +593,97 @@ def check_process_running(p: Optional[subprocess.Popen], name: str) -> bool:
         return False
 
 
+def _log_tail(log_file: Optional[Path], max_lines: int = READY_LOG_TAIL_LINES) -> str:
+    """Últimas linhas de um log de processo em background (para diagnóstico)."""
+    if log_file is None:
+        return ""
+    try:
+        lines = log_file.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return ""
+    return "\n".join(lines[-max_lines:])
+
+
+def http_probe(url: str) -> Callable[[], bool]:
+    """
+    Sonda de prontidão: o serviço está pronto quando responde HTTP em 'url'
+    (qualquer status, inclusive 4xx/5xx, indica que a porta já atende).
+    """
+
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=READY_PROBE_TIMEOUT):
+                return True
+        except urllib.error.HTTPError:
+            return True
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    return probe
+
+
+def vite_hot_file_probe(
+    started_at: float, hot_file: Path = VITE_HOT_FILE
+) -> Callable[[], bool]:
+    """
+    Sonda de prontidão do Vite: o laravel-vite-plugin grava a URL do servidor
+    em public/hot quando ele começa a escutar. Ignora um 'hot' antigo (mtime
+    anterior a started_at) e confirma com uma requisição ao cliente do Vite.
+    """
+
+    def probe() -> bool:
+        try:
+            # Tolerância de 1s para sistemas de arquivos com mtime de baixa resolução
+            if hot_file.stat().st_mtime < started_at - 1.0:
+                return False
+            dev_server_url = hot_file.read_text(encoding="utf-8").strip()
+        except OSError:
+            return False
+        if not dev_server_url:
+            return False
+        return http_probe(f"{dev_server_url.rstrip('/')}/@vite/client")()
+
+    return probe
+
+
+def wait_until_ready(
+    name: str,
+    p: Optional[subprocess.Popen],
+    probe: Callable[[], bool],
+    timeout: float,
+    log_file: Optional[Path] = None,
+) -> bool:
+    """
+    Aguarda até 'probe' indicar que o serviço aceita conexões, com backoff
+    exponencial (READY_POLL_INITIAL_DELAY até READY_POLL_MAX_DELAY). Falha
+    imediatamente se o processo terminar e, em caso de falha ou timeout,
+    mostra o final do log do serviço.
+    """
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    delay = READY_POLL_INITIAL_DELAY
+    log(f"  Aguardando {name} ficar pronto (timeout {timeout:.0f}s)...")
+    while True:
+        if not check_process_running(p, name, quiet=True):
+            failure = "terminou antes de ficar pronto"
+            break
+        if probe():
+            log(f"  {name} pronto em {time.monotonic() - start_time:.1f}s.")
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            failure = f"não ficou pronto em {timeout:.0f}s"
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, READY_POLL_MAX_DELAY)
+
+    log(f"  Erro: {name} {failure}.")
+    tail = _log_tail(log_file)
+    if tail:
+        log(f"  Últimas linhas de '{log_file.name}':\n{tail}")
+    return False
+
+
 def get_chromedriver_path() -> Optional[Path]:
     """Determina o caminho do executável ChromeDriver apropriado."""
     base_path = VENDOR_DIR / "laravel" / "dusk" / "bin"
@@ -293,6 +773,8 @@ def main():
   python scripts/run_tests.py
   python scripts/run_tests.py --skip-dusk
   python scripts/run_tests.py --stop-on-failure
+  python scripts/run_tests.py --processes 0   # PHPUnit em paralelo (paratest)
+  python scripts/run_tests.py --dusk-shards 4  # Dusk em 4 shards paralelos
 """,
     )
     parser.add_argument(
@@ -310,6 +792,18 @@ def main():
         action="store_true",
         help="Para a execução imediatamente se uma suíte de teste falhar.",
     )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Processos do PHPUnit em paralelo (requer paratest). 0 = número de CPUs, 1 = serial (default: 1).",
+    )
+    parser.add_argument(
+        "--dusk-shards",
+        type=int,
+        default=1,
+        help="Divide os testes Dusk em N shards paralelos (portas e bancos próprios por shard). 1 = execução única (default: 1).",
+    )
     args = parser.parse_args()
 
     log("Iniciando execução dos testes...")
@@ -353,7 +847,15 @@ def main():
                 f"  Aviso: Arquivo '{phpunit_env_file.name}' não encontrado. Usando config padrão/.env."
             )
 
-        phpunit_cmd = [PHP_CMD, str(ARTISAN_FILE), "test", f"--env={PHPUNIT_ENV}"]
+        parallel_args, processes = core_utils.phpunit_parallel_args(args.processes)
+        if processes > 1:
+            log(f"  Modo paralelo: {processes} processos (paratest).")
+        phpunit_cmd = [
+            PHP_CMD,
+            str(ARTISAN_FILE),
+            "test",
+            f"--env={PHPUNIT_ENV}",
+        ] + parallel_args
         exit_code, _, _ = run_command(phpunit_cmd, check=False, print_output=True)
 
         if exit_code != 0:
@@ -418,25 +920,34 @@ def main():
             vite_proc = None  # Variável para o processo Vite
 
             try:  # Envolve o setup e execução do Dusk em try para garantir cleanup
-                # 2. Iniciar ChromeDriver
-                log(
-                    f"[Dusk] Iniciando ChromeDriver ({chromedriver_path.name}) na porta {DUSK_CHROMEDRIVER_PORT}..."
-                )
-                chromedriver_proc = start_background_process(
-                    [str(chromedriver_path), f"--port={DUSK_CHROMEDRIVER_PORT}"],
-                    CHROMEDRIVER_LOG,
-                )
-                log("  Aguardando inicialização do ChromeDriver (5s)...")
-                time.sleep(5)
-                if not check_process_running(chromedriver_proc, "ChromeDriver"):
-                    dusk_setup_failed = True
-                    if overall_exit_code == 0:
-                        overall_exit_code = 1
-                    if args.stop_on_failure:
-                        return overall_exit_code  # Sai dentro do try
+                # 2. Iniciar ChromeDriver (no modo em shards, cada shard inicia o seu)
+                if args.dusk_shards > 1:
+                    log(
+                        f"[Dusk] Modo em shards ({args.dusk_shards}): ChromeDriver e servidor são iniciados por shard."
+                    )
+                else:
+                    log(
+                        f"[Dusk] Iniciando ChromeDriver ({chromedriver_path.name}) na porta {DUSK_CHROMEDRIVER_PORT}..."
+                    )
+                    chromedriver_proc = start_background_process(
+                        [str(chromedriver_path), f"--port={DUSK_CHROMEDRIVER_PORT}"],
+                        CHROMEDRIVER_LOG,
+                    )
+                    if not wait_until_ready(
+                        "ChromeDriver",
+                        chromedriver_proc,
+                        http_probe(f"http://127.0.0.1:{DUSK_CHROMEDRIVER_PORT}/status"),
+                        READY_TIMEOUT_CHROMEDRIVER,
+                        CHROMEDRIVER_LOG,
+                    ):
+                        dusk_setup_failed = True
+                        if overall_exit_code == 0:
+                            overall_exit_code = 1
+                        if args.stop_on_failure:
+                            return overall_exit_code  # Sai dentro do try
 
                 # 3. Iniciar Servidor da Aplicação
-                if not dusk_setup_failed:
+                if not dusk_setup_failed and args.dusk_shards <= 1:
                     log(
                         f"[Dusk] Iniciando servidor da aplicação na porta {DUSK_APP_PORT} (Ambiente: {DUSK_ENV})..."
                     )
@@ -450,9 +961,13 @@ def main():
                     app_server_proc = start_background_process(
                         serve_cmd, DUSK_SERVE_LOG
                     )
-                    log("  Aguardando inicialização do servidor da aplicação (8s)...")
-                    time.sleep(8)
-                    if not check_process_running(app_server_proc, "Servidor App"):
+                    if not wait_until_ready(
+                        "Servidor App",
+                        app_server_proc,
+                        http_probe(f"http://127.0.0.1:{DUSK_APP_PORT}/"),
+                        READY_TIMEOUT_APP_SERVER,
+                        DUSK_SERVE_LOG,
+                    ):
                         dusk_setup_failed = True
                         if overall_exit_code == 0:
                             overall_exit_code = 1
@@ -463,12 +978,15 @@ def main():
                 if not dusk_setup_failed:
                     log("[Dusk] Iniciando servidor Vite Dev ('npm run dev')...")
                     vite_cmd = ["npm", "run", "dev"]
+                    vite_started_at = time.time()
                     vite_proc = start_background_process(vite_cmd, VITE_DEV_LOG)
-                    log(
-                        "  Aguardando inicialização do Vite (10s)..."
-                    )  # Aumentado para 10s
-                    time.sleep(10)
-                    if not check_process_running(vite_proc, "Vite Dev Server"):
+                    if not wait_until_ready(
+                        "Vite Dev Server",
+                        vite_proc,
+                        vite_hot_file_probe(vite_started_at),
+                        READY_TIMEOUT_VITE,
+                        VITE_DEV_LOG,
+                    ):
                         dusk_setup_failed = True
                         if overall_exit_code == 0:
                             overall_exit_code = 1
@@ -476,7 +994,23 @@ def main():
                             return overall_exit_code  # Sai dentro do try
 
                 # 5. Executar Testes Dusk
-                if not dusk_setup_failed:
+                if not dusk_setup_failed and args.dusk_shards > 1:
+                    exit_code_dusk = run_dusk_sharded(
+                        chromedriver_path, args.dusk_shards
+                    )
+                    if exit_code_dusk != 0:
+                        log(
+                            f"Erro: Testes Dusk falharam em ao menos um shard (Código de Saída: {exit_code_dusk}). Verifique '{DUSK_SHARDS_LOG.relative_to(BASE_DIR)}'."
+                        )
+                        overall_exit_code = exit_code_dusk
+                        if args.stop_on_failure:
+                            log(
+                                "Parando execução devido à falha nos testes Dusk e --stop-on-failure."
+                            )
+                            return overall_exit_code  # Sai dentro do try
+                    else:
+                        log("Sucesso: Testes Dusk concluídos em todos os shards.")
+                elif not dusk_setup_failed:
                     log("[Dusk] Executando testes Dusk...")
                     dusk_env_vars = os.environ.copy()
                     dusk_env_vars["APP_ENV"] = (
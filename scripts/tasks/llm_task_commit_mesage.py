@@ -305,6 +305,7 @@ def main_commit_mesage():
                 verbose=verbose,
             )
 
+        core_context.close_manifest(manifest_data_for_context_selection)
         if not context_parts and verbose:
             print("Aviso: Nenhuma parte de contexto carregada.", file=sys.stderr)
 
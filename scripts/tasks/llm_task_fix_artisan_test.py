@@ -301,6 +301,7 @@ def main_fix_artisan_test():
                 latest_dir_name_for_essentials=latest_dir_name_for_essentials,
                 verbose=verbose,
             )
+        core_context.close_manifest(manifest_data_for_context_selection)
         if not context_parts and verbose:
             print("Aviso: Nenhuma parte de contexto carregada.", file=sys.stderr)
 
@@ -219,7 +219,8 @@ def main_manifest_summary():
         print(
             f"\nProcessando manifesto: {manifest_to_process_path.relative_to(core_config.PROJECT_ROOT)}"
         )
-        manifest_data = core_context.load_manifest(manifest_to_process_path)
+        # lazy=False: os sumários são gravados de volta nos dicts do manifesto
+        manifest_data = core_context.load_manifest(manifest_to_process_path, lazy=False)
         if not manifest_data or "files" not in manifest_data:
             print(
                 f"Erro: Manifesto inválido ou vazio: {manifest_to_process_path.name}",
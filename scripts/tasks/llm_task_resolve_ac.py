@@ -427,6 +427,7 @@ def main_resolve_ac():
                 verbose=verbose,
             )
 
+        core_context.close_manifest(manifest_data_for_context_selection)
         if not context_parts and verbose:
             print(
                 "Aviso: Nenhuma parte de contexto carregada. A LLM pode não ter informações suficientes.",
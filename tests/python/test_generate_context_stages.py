@@ -6,6 +6,8 @@ from unittest.mock import patch, MagicMock, call
 import sys
 import shutil
 import datetime  # Adicionado para current_run_timestamp
+import json
+import os
 
 # Adiciona o diretório raiz do projeto (PROJECT_ROOT) ao sys.path para importações corretas
 _project_root_dir_for_test = Path(__file__).resolve().parent.parent.parent
@@ -38,7 +40,7 @@ def mock_args(monkeypatch):
     return _mock_args
 
 
-@patch("scripts.generate_context.shutil.which", return_value=True)
+@patch("scripts.generate_context.shutil.which", return_value="/usr/bin/mock_cmd")
 @patch(
     "scripts.generate_context.subprocess.run"
 )  # Este mock não será usado se run_command for mockado
@@ -111,7 +113,7 @@ def test_stages_argument_parsing(
         assert isinstance(config_val["outputs"], list)
 
 
-@patch("scripts.generate_context.shutil.which", return_value=True)
+@patch("scripts.generate_context.shutil.which", return_value="/usr/bin/mock_cmd")
 @patch("scripts.generate_context.run_command")
 @patch("scripts.generate_context.find_second_latest_context_dir")
 @patch("scripts.generate_context.shutil.copy2")
@@ -178,12 +180,12 @@ def test_fallback_logic_for_skipped_stages(
             current_run_dir, current_run_timestamp, args_instance
         )
 
-    mock_shutil_copy2.assert_any_call(
+    # Fallback vincula (hard link) os arquivos do diretório anterior
+    assert (current_run_dir / "git_log.txt").read_text() == "old git log"
+    assert (current_run_dir / "git_status.txt").read_text() == "old git status"
+    assert os.path.samefile(
         previous_context_dir_mock / "git_log.txt", current_run_dir / "git_log.txt"
     )
-    mock_shutil_copy2.assert_any_call(
-        previous_context_dir_mock / "git_status.txt", current_run_dir / "git_status.txt"
-    )
 
     captured = capsys.readouterr()
     assert (
@@ -218,3 +220,556 @@ def test_fallback_logic_for_skipped_stages(
 
     # Restaurar STAGES_CONFIG original para não afetar outros testes
     generate_context.STAGES_CONFIG = original_stages_config
+
+
+def test_stages_config_dependencies_and_resources_are_known():
+    for stage_name, config_val in generate_context.STAGES_CONFIG.items():
+        assert set(config_val["depends_on"]) <= set(generate_context.STAGES_CONFIG)
+        assert stage_name not in config_val["depends_on"]
+        assert set(config_val["resources"]) <= set(
+            generate_context.STAGE_RESOURCE_LIMITS
+        )
+
+
+def test_schedule_stages_respects_dependencies_resources_and_jobs(monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setattr(
+        generate_context, "STAGE_RESOURCE_LIMITS", {"db": 1, "network": 2}
+    )
+    stages = {
+        "a": {"depends_on": [], "resources": ["network"]},
+        "b": {"depends_on": [], "resources": ["network"]},
+        "c": {"depends_on": [], "resources": ["network"]},
+        "db1": {"depends_on": [], "resources": ["db"]},
+        "db2": {"depends_on": ["db1"], "resources": ["db"]},
+        "free": {"depends_on": ["not_selected"], "resources": []},
+    }
+    lock = threading.Lock()
+    running = {"total": 0, "network": 0, "db": 0}
+    peaks = {"total": 0, "network": 0, "db": 0}
+    finished_order = []
+
+    def fake_run_stage(name, config):
+        with lock:
+            for key in ["total"] + config["resources"]:
+                running[key] += 1
+                peaks[key] = max(peaks[key], running[key])
+        time.sleep(0.02)
+        with lock:
+            for key in ["total"] + config["resources"]:
+                running[key] -= 1
+            finished_order.append(name)
+        return name.upper()
+
+    results = generate_context.schedule_stages(stages, 3, fake_run_stage)
+
+    assert results == {name: name.upper() for name in stages}
+    assert peaks["total"] == 3
+    assert peaks["network"] == 2
+    assert peaks["db"] == 1
+    assert finished_order.index("db1") < finished_order.index("db2")
+
+
+@patch("scripts.generate_context.invoke_manifest_generator")
+@patch("scripts.generate_context.copy_latest_manifest_json")
+@patch("scripts.generate_context.generate_manifest_md")
+def test_run_all_collections_parallel_keeps_step_numbers_and_summary(
+    mock_generate_manifest_md,
+    mock_copy_latest,
+    mock_invoke,
+    tmp_path,
+    mock_args,
+    capsys,
+):
+    def make_stage_func(stage_name):
+        def stage_func(output_dir, step_num, total_steps, *rest):
+            print(f"inicio {stage_name}")
+            print(f"fim {stage_name} {step_num}/{total_steps}")
+            if stage_name == "pint":
+                raise RuntimeError("falha simulada")
+
+        return MagicMock(side_effect=stage_func)
+
+    selected = ["git", "github", "phpstan", "pint", "phpunit", "dusk"]
+    mocked_stages_config = {
+        name: {**config, "func": make_stage_func(name)}
+        for name, config in generate_context.STAGES_CONFIG.items()
+    }
+    args_instance = mock_args(stages=selected, output_dir=tmp_path, jobs=4)
+
+    with patch.dict(generate_context.STAGES_CONFIG, mocked_stages_config):
+        generate_context.run_all_collections(
+            tmp_path / "20240101_000000", "20240101_000000", args_instance
+        )
+
+    out = capsys.readouterr().out
+    for step_num, name in enumerate(selected, start=1):
+        mocked_stages_config[name]["func"].assert_called_once()
+        assert mocked_stages_config[name]["func"].call_args.args[1:3] == (
+            step_num,
+            len(selected),
+        )
+        # Log de cada estágio sai em bloco, sem intercalar com outros estágios
+        assert f"inicio {name}\nfim {name} {step_num}/{len(selected)}\n" in out
+    assert "  - Estágio 'phpunit': EXECUTADO" in out
+    assert "  - Estágio 'pint': FALHOU NA EXECUÇÃO" in out
+    assert out.index("fim phpunit") < out.index("fim dusk")
+
+
+def test_download_github_issues_runs_concurrently(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    real_sleep = time.sleep
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fake_run_command(cmd_list, output_file, check=False, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        real_sleep(0.02)
+        issue_number = int(cmd_list[3])
+        output_file.write_text(f'{{"number": {issue_number}}}\n', encoding="utf-8")
+        with lock:
+            state["running"] -= 1
+        return (1 if issue_number == 3 else 0), "", ""
+
+    monkeypatch.setattr(generate_context, "run_command", fake_run_command)
+    monkeypatch.setattr(generate_context.time, "sleep", lambda seconds: None)
+
+    downloaded = generate_context.download_github_issues(
+        list(range(1, 9)), tmp_path, max_workers=4
+    )
+
+    assert downloaded == 7
+    assert state["peak"] > 1
+    for issue_number in range(1, 9):
+        assert (tmp_path / f"github_issue_{issue_number}_details.json").is_file()
+
+
+def test_reuse_unchanged_github_issues_links_matching_updated_at(tmp_path):
+    previous_dir = tmp_path / "20240101_000000"
+    current_dir = tmp_path / "20240102_000000"
+    previous_dir.mkdir()
+    current_dir.mkdir()
+    for number, updated_at in [
+        (1, "2024-01-01T10:00:00Z"),
+        (2, "2024-01-01T10:00:00Z"),
+    ]:
+        (previous_dir / f"github_issue_{number}_details.json").write_text(
+            json.dumps({"number": number, "updatedAt": updated_at}), encoding="utf-8"
+        )
+    (previous_dir / "github_issue_3_details.json").write_text(
+        "\n\n--- COMMAND FAILED (Exit Code: 1) ---\n", encoding="utf-8"
+    )
+
+    reused = generate_context.reuse_unchanged_github_issues(
+        {
+            1: "2024-01-01T10:00:00Z",
+            2: "2024-01-05T08:00:00Z",
+            3: "2024-01-01T10:00:00Z",
+            4: "2024-01-01T10:00:00Z",
+        },
+        previous_dir,
+        current_dir,
+    )
+
+    assert reused == {1}
+    reused_file = current_dir / "github_issue_1_details.json"
+    assert json.loads(reused_file.read_text(encoding="utf-8"))["number"] == 1
+    assert not (current_dir / "github_issue_2_details.json").exists()
+
+
+def test_link_or_copy_file_falls_back_to_copy(tmp_path, monkeypatch):
+    source = tmp_path / "source.json"
+    source.write_text("{}", encoding="utf-8")
+
+    assert generate_context.link_or_copy_file(source, tmp_path / "a.json") == "link"
+    assert (tmp_path / "a.json").stat().st_ino == source.stat().st_ino
+
+    def failing_link(src, dst):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(generate_context.os, "link", failing_link)
+    assert generate_context.link_or_copy_file(source, tmp_path / "b.json") == "copy"
+    assert (tmp_path / "b.json").read_text(encoding="utf-8") == "{}"
+
+
+def test_store_snapshot_in_blob_store_deduplicates_and_prunes(tmp_path):
+    blob_store = tmp_path / generate_context.BLOB_STORE_DIR_NAME
+    first_run = tmp_path / "20240101_000000"
+    second_run = tmp_path / "20240102_000000"
+    for run_dir in (first_run, second_run):
+        run_dir.mkdir()
+        (run_dir / "git_diff_empty_tree_to_head.txt").write_text("diff" * 100)
+    (first_run / "git_status.txt").write_text("old status")
+    (second_run / "git_status.txt").write_text("new status")
+
+    first_stats = generate_context.store_snapshot_in_blob_store(first_run, blob_store)
+    second_stats = generate_context.store_snapshot_in_blob_store(second_run, blob_store)
+
+    assert first_stats["new_blobs"] == 2
+    assert second_stats["new_blobs"] == 1
+    assert second_stats["deduplicated"] == 1
+    assert second_stats["bytes_saved"] == 400
+    assert os.path.samefile(
+        first_run / "git_diff_empty_tree_to_head.txt",
+        second_run / "git_diff_empty_tree_to_head.txt",
+    )
+    assert (second_run / "git_status.txt").read_text() == "new status"
+
+    # Rodar de novo não altera nada; remover um snapshot libera seus blobs exclusivos
+    assert (
+        generate_context.store_snapshot_in_blob_store(second_run, blob_store)[
+            "deduplicated"
+        ]
+        == 2
+    )
+    shutil.rmtree(first_run)
+    third_stats = generate_context.store_snapshot_in_blob_store(second_run, blob_store)
+    assert third_stats["pruned"] == 1
+    assert len([p for p in blob_store.glob("*/*")]) == 2
+
+
+def test_env_stage_fingerprint_runs_no_commands(tmp_path, monkeypatch):
+    fake_php = tmp_path / "php"
+    fake_php.write_text("#!/bin/sh\n")
+    fake_php.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    env_config = generate_context.STAGES_CONFIG["env"]
+
+    with patch.object(generate_context.subprocess, "run") as mock_run:
+        first = generate_context.compute_stage_fingerprint(env_config, None)
+        assert first == generate_context.compute_stage_fingerprint(env_config, None)
+        # Executável atualizado (novo conteúdo/inode) invalida o cache
+        fake_php.unlink()
+        fake_php.write_text("#!/bin/sh\necho 8.3\n")
+        fake_php.chmod(0o755)
+        assert generate_context.compute_stage_fingerprint(env_config, None) != first
+    mock_run.assert_not_called()
+
+
+def test_deduplicated_snapshot_file_can_be_copied_twice(tmp_path):
+    blob_store = tmp_path / generate_context.BLOB_STORE_DIR_NAME
+    snapshot = tmp_path / "20240101_000000"
+    snapshot.mkdir()
+    (snapshot / "git_log.txt").write_text("commit abc")
+    generate_context.store_snapshot_in_blob_store(snapshot, blob_store)
+    destination = tmp_path / "temp" / "git_log.txt"
+    destination.parent.mkdir()
+
+    # Mesmo fluxo de copy_selected_context.py: copy2 sobre o destino existente
+    shutil.copy2(snapshot / "git_log.txt", destination)
+    shutil.copy2(snapshot / "git_log.txt", destination)
+
+    assert destination.read_text() == "commit abc"
+    # Root ignora permissões: verifica o bit de escrita diretamente
+    assert destination.stat().st_mode & 0o200
+
+
+def test_run_command_does_not_write_through_hard_link(tmp_path):
+    previous = tmp_path / "20240101_000000" / "git_log.txt"
+    current = tmp_path / "20240102_000000" / "git_log.txt"
+    previous.parent.mkdir()
+    previous.write_text("OLD\n")
+    assert generate_context.link_or_copy_file(previous, current) == "link"
+
+    generate_context.run_command([sys.executable, "-c", "print('NEW')"], current)
+
+    assert current.read_text() == "NEW\n"
+    assert previous.read_text() == "OLD\n"
+
+
+@patch("scripts.generate_context.invoke_manifest_generator")
+@patch("scripts.generate_context.copy_latest_manifest_json")
+@patch("scripts.generate_context.generate_manifest_md")
+def test_fallback_copies_files_an_active_stage_rewrites(
+    mock_generate_manifest_md, mock_copy_latest, mock_invoke, tmp_path, mock_args
+):
+    output_base = tmp_path / "context"
+    previous_run = output_base / "20240101_000000"
+    current_run = output_base / "20240102_000000"
+    previous_run.mkdir(parents=True)
+    current_run.mkdir()
+    (previous_run / "git_log.txt").write_text("OLD")
+
+    def copy_stage(output_dir, step_num, total_steps):
+        # Escrita no lugar, como os estágios fazem com write_text/open("w")
+        (output_dir / "git_log.txt").write_text("NEW")
+
+    stages_config = {
+        "git": {
+            "func": MagicMock(),
+            "description": "Git",
+            "needs_cli_args": False,
+            "depends_on": [],
+            "resources": [],
+            "outputs": ["git_log.txt"],
+        },
+        "project_files_copy": {
+            "func": MagicMock(side_effect=copy_stage),
+            "description": "Cópia",
+            "needs_cli_args": False,
+            "depends_on": [],
+            "resources": [],
+            "outputs": ["*.txt"],
+        },
+    }
+    args_instance = mock_args(
+        stages=["project_files_copy"], output_dir=output_base, no_blob_store=True
+    )
+
+    with patch.dict(generate_context.STAGES_CONFIG, stages_config, clear=True):
+        generate_context.run_all_collections(
+            current_run, "20240102_000000", args_instance
+        )
+
+    assert (current_run / "git_log.txt").read_text() == "NEW"
+    assert (previous_run / "git_log.txt").read_text() == "OLD"
+
+
+def test_run_command_stream_to_file_matches_buffered_output(tmp_path):
+    script = "import sys; print('linha 1'); print('linha 2')"
+    buffered_file = tmp_path / "buffered.txt"
+    streamed_file = tmp_path / "streamed.txt"
+
+    buffered = generate_context.run_command(
+        [sys.executable, "-c", script], buffered_file, cwd=tmp_path
+    )
+    streamed = generate_context.run_command(
+        [sys.executable, "-c", script], streamed_file, cwd=tmp_path, stream_to_file=True
+    )
+
+    assert streamed == buffered == (0, "linha 1\nlinha 2", "")
+    assert streamed_file.read_text(encoding="utf-8") == buffered_file.read_text(
+        encoding="utf-8"
+    )
+
+
+def test_run_command_stream_to_file_keeps_only_tail_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_context, "RUN_COMMAND_TAIL_BYTES", 100)
+    script = (
+        "import sys\n"
+        "for i in range(5000): print(f'linha {i}')\n"
+        "sys.stderr.write('erro final')\n"
+        "sys.exit(3)\n"
+    )
+    output_file = tmp_path / "big.txt"
+
+    exit_code, stdout_tail, stderr_tail = generate_context.run_command(
+        [sys.executable, "-c", script], output_file, cwd=tmp_path, stream_to_file=True
+    )
+
+    assert exit_code == 3
+    assert len(stdout_tail) <= 100
+    assert stdout_tail.endswith("linha 4999")
+    assert stderr_tail == "erro final"
+    content = output_file.read_text(encoding="utf-8")
+    assert content.startswith("linha 0\n")
+    assert content.endswith(
+        "linha 4999\n\n\n--- COMMAND FAILED (Exit Code: 3) ---\nStderr:\nerro final\n"
+    )
+
+
+def test_run_command_stream_to_file_missing_command(tmp_path):
+    output_file = tmp_path / "missing.txt"
+    exit_code, _, stderr = generate_context.run_command(
+        ["comando-inexistente-xyz"], output_file, cwd=tmp_path, stream_to_file=True
+    )
+    assert exit_code == 1
+    assert "comando-inexistente-xyz" in stderr
+    assert output_file.read_text(encoding="utf-8").startswith("ERRO:")
+
+
+@patch("scripts.generate_context.invoke_manifest_generator")
+@patch("scripts.generate_context.copy_latest_manifest_json")
+@patch("scripts.generate_context.generate_manifest_md")
+def test_run_all_collections_reuses_stage_outputs_when_fingerprint_matches(
+    mock_generate_manifest_md,
+    mock_copy_latest,
+    mock_invoke,
+    tmp_path,
+    mock_args,
+    capsys,
+    monkeypatch,
+):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "composer.lock").write_text('{"packages": []}')
+    monkeypatch.setattr(generate_context, "BASE_DIR", project_dir)
+    output_base = tmp_path / "context"
+
+    def deps_stage(output_dir, step_num, total_steps):
+        (output_dir / "composer_show.txt").write_text(
+            (project_dir / "composer.lock").read_text()
+        )
+
+    stage_func = MagicMock(side_effect=deps_stage)
+    cached_config = {
+        "dependencies": {
+            "func": stage_func,
+            "description": "Project dependencies",
+            "needs_cli_args": False,
+            "depends_on": [],
+            "resources": [],
+            "fingerprint": {"files": ["composer.lock"]},
+            "outputs": ["composer_show.txt"],
+        }
+    }
+    args_instance = mock_args(stages=["dependencies"], output_dir=output_base)
+
+    def run(timestamp):
+        run_dir = output_base / timestamp
+        run_dir.mkdir(parents=True)
+        with patch.dict(generate_context.STAGES_CONFIG, cached_config, clear=True):
+            generate_context.run_all_collections(run_dir, timestamp, args_instance)
+        return run_dir
+
+    run("20240101_000000")
+    second_run = run("20240102_000000")
+    assert stage_func.call_count == 1
+    assert (second_run / "composer_show.txt").read_text() == '{"packages": []}'
+    assert (
+        "Estágio 'dependencies': CACHED (fingerprint inalterado, saídas reutilizadas de '20240101_000000')"
+        in capsys.readouterr().out
+    )
+
+    (project_dir / "composer.lock").write_text('{"packages": ["novo"]}')
+    third_run = run("20240103_000000")
+    assert stage_func.call_count == 2
+    assert (third_run / "composer_show.txt").read_text() == '{"packages": ["novo"]}'
+    assert "Estágio 'dependencies': EXECUTADO" in capsys.readouterr().out
+
+
+PROJECT_ITEMS_WITH_FIELD_VALUES = {
+    "items": [
+        {
+            "type": "ISSUE",
+            "content": {"number": 7, "title": "Corrigir login"},
+            "fieldValues": [
+                {"field": {"name": "Status"}, "value": "In Progress"},
+                {
+                    "field": {"name": "Assignees"},
+                    "users": [{"login": "zeca"}, {"login": "ana"}, {"login": "zeca"}],
+                },
+                {"field": {"name": "Labels"}, "labels": [{"name": "bug"}]},
+                {"field": {"name": "Milestone"}, "milestone": {"title": "v1"}},
+                {
+                    "field": {"name": "Repository"},
+                    "repository": {"nameWithOwner": "org/repo"},
+                },
+            ],
+        },
+        {
+            "type": "DRAFT_ISSUE",
+            "content": {"title": "Rascunho"},
+            "fieldValues": [{"field": {"name": "Status"}, "value": None}],
+        },
+    ]
+}
+
+
+def test_summarize_project_items_matches_jq_schema():
+    summary = generate_context.summarize_project_items(
+        PROJECT_ITEMS_WITH_FIELD_VALUES, "Status"
+    )
+    assert summary == [
+        {
+            "type": "ISSUE",
+            "number": 7,
+            "title": "Corrigir login",
+            "status": "In Progress",
+            "assignees": "ana, zeca",
+            "labels": "bug",
+            "milestone": "v1",
+            "repository": "org/repo",
+        },
+        {
+            "type": "DRAFT_ISSUE",
+            "number": None,
+            "title": "Rascunho",
+            "status": "N/A",
+            "assignees": "",
+            "labels": "",
+            "milestone": "",
+            "repository": "",
+        },
+    ]
+
+
+@pytest.mark.skipif(shutil.which("jq") is None, reason="jq não instalado")
+def test_summarize_project_items_equals_optional_jq_path(tmp_path, mock_args):
+    status_file = tmp_path / "gh_project_items_status.json"
+    summary_file = tmp_path / "gh_project_items_summary.json"
+    status_file.write_text(json.dumps(PROJECT_ITEMS_WITH_FIELD_VALUES))
+
+    generate_context._summarize_project_items_with_jq(
+        status_file, summary_file, mock_args(gh_project_status_field="Status")
+    )
+
+    assert json.loads(summary_file.read_text()) == (
+        generate_context.summarize_project_items(
+            PROJECT_ITEMS_WITH_FIELD_VALUES, "Status"
+        )
+    )
+
+
+def test_summarize_project_items_current_gh_format():
+    project_data = {
+        "items": [
+            {
+                "assignees": ["bob", "ana"],
+                "content": {"number": 3, "title": "Nova tela", "type": "Issue"},
+                "labels": ["ui", "feature"],
+                "milestone": {"title": "Sprint 2"},
+                "repository": "https://github.com/org/repo",
+                "status": "Todo",
+            }
+        ]
+    }
+    assert generate_context.summarize_project_items(project_data, "Status") == [
+        {
+            "type": "Issue",
+            "number": 3,
+            "title": "Nova tela",
+            "status": "Todo",
+            "assignees": "ana, bob",
+            "labels": "feature, ui",
+            "milestone": "Sprint 2",
+            "repository": "https://github.com/org/repo",
+        }
+    ]
+
+
+def test_filter_planned_issues_excludes_not_planned():
+    raw = [
+        {"number": 1, "stateReason": "", "updatedAt": "a"},
+        {"number": 2, "stateReason": "NOT_PLANNED", "updatedAt": "b"},
+        {"number": 3, "stateReason": "COMPLETED", "updatedAt": "c"},
+        {"stateReason": "", "updatedAt": "d"},
+    ]
+    assert generate_context.filter_planned_issues(raw) == {1: "a", 3: "c"}
+
+
+def test_run_tests_passes_parallel_args(tmp_path, monkeypatch):
+    paratest_bin = tmp_path / "paratest"
+    paratest_bin.touch()
+    monkeypatch.setattr(generate_context.core_utils, "PARATEST_BIN", paratest_bin)
+    monkeypatch.setattr(generate_context, "command_exists", lambda cmd: True)
+    with patch.object(
+        generate_context, "run_command", return_value=(0, "", "")
+    ) as mock_run:
+        generate_context.run_tests(
+            tmp_path, 1, 1, argparse.Namespace(phpunit_processes=3)
+        )
+    cmd = mock_run.call_args[0][0]
+    assert cmd[-5:] == [
+        "test",
+        "--env=testing",
+        "--parallel",
+        "--processes=3",
+        "--recreate-databases",
+    ]
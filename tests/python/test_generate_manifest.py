@@ -0,0 +1,742 @@
+# tests/python/test_generate_manifest.py
+import pytest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+import sys
+
+# Adiciona o diretório raiz do projeto (PROJECT_ROOT) ao sys.path para importações corretas
+_project_root_dir_for_test = Path(__file__).resolve().parent.parent.parent
+if str(_project_root_dir_for_test) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_test))
+
+from scripts import generate_manifest
+
+
+@pytest.fixture
+def fake_project_root(tmp_path: Path, monkeypatch) -> Path:
+    """Aponta as constantes de caminho do gerador de manifesto para um projeto temporário."""
+    monkeypatch.setattr(generate_manifest, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(
+        generate_manifest, "CONTEXT_CODE_DIR", tmp_path / "context_llm" / "code"
+    )
+    monkeypatch.setattr(
+        generate_manifest, "CONTEXT_COMMON_DIR", tmp_path / "context_llm" / "common"
+    )
+    monkeypatch.setattr(
+        generate_manifest,
+        "VENDOR_USPDEV_DIRS",
+        [tmp_path / "vendor/uspdev/replicado/src/"],
+    )
+    return tmp_path
+
+
+def _create_files(root: Path, relative_paths) -> None:
+    for rel in relative_paths:
+        file_path = root / rel
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(f"content of {rel}", encoding="utf-8")
+
+
+# --- Testes para o índice de versionamento (git ls-files) ---
+def test_parse_git_ls_files_tagged():
+    stdout = "H app/Models/User.php\0? notes.txt\0S skipped/file.php\0H dir with space/a b.md\0"
+    entries = generate_manifest.parse_git_ls_files_tagged(stdout)
+    assert entries == [
+        ("app/Models/User.php", True),
+        ("notes.txt", False),
+        ("skipped/file.php", True),
+        ("dir with space/a b.md", True),
+    ]
+
+
+def test_scan_project_files_builds_versioned_index(fake_project_root: Path):
+    tracked = ["app/Models/User.php", "routes/web.php"]
+    untracked = ["notes.txt"]
+    _create_files(fake_project_root, tracked + untracked)
+    stdout = "".join(f"H {p}\0" for p in tracked) + "".join(
+        f"? {p}\0" for p in untracked
+    )
+
+    with patch.object(
+        generate_manifest, "run_command", return_value=(0, stdout, "")
+    ) as mock_run:
+        all_files, versioned = generate_manifest.scan_project_files(verbose=False)
+
+    assert mock_run.call_count == 1
+    assert all_files == {Path(p) for p in tracked + untracked}
+    assert versioned == {Path(p) for p in tracked}
+
+
+def test_versioned_status_subprocess_count_drops_from_n_to_one(
+    fake_project_root: Path,
+):
+    """Benchmark: N arquivos custavam N chamadas 'git ls-files'; o índice custa 1."""
+    n_files = 200
+    relative_paths = [f"app/Generated/File{i}.php" for i in range(n_files)]
+    _create_files(fake_project_root, relative_paths)
+    stdout = "".join(f"H {p}\0" for p in relative_paths)
+
+    per_file_mock = MagicMock(return_value=(0, "", ""))
+    with patch.object(generate_manifest, "run_command", per_file_mock):
+        legacy_status = [
+            generate_manifest.get_git_versioned_status(Path(p), verbose=False)
+            for p in relative_paths
+        ]
+
+    indexed_mock = MagicMock(return_value=(0, stdout, ""))
+    with patch.object(generate_manifest, "run_command", indexed_mock):
+        all_files, versioned_index = generate_manifest.scan_project_files(verbose=False)
+        indexed_status = [Path(p) in versioned_index for p in sorted(all_files)]
+
+    assert per_file_mock.call_count == n_files
+    assert indexed_mock.call_count == 1
+    assert all(legacy_status) and all(indexed_status)
+    assert len(indexed_status) == n_files
+
+
+def test_scan_project_files_git_failure_returns_empty_index(fake_project_root: Path):
+    with patch.object(
+        generate_manifest, "run_command", return_value=(128, "", "not a git repo")
+    ):
+        all_files, versioned = generate_manifest.scan_project_files(verbose=False)
+    assert all_files == set()
+    assert versioned == set()
+
+
+# --- Testes para a contagem de tokens concorrente e limitada por taxa ---
+class _FakeClock:
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _fake_client_factory(calls_by_key, fail_first_for=None):
+    """Cria clientes falsos que registram as chamadas por chave e retornam len(contents)."""
+    fail_first_for = set(fail_first_for or [])
+
+    def factory(api_key, http_options=None):
+        client = MagicMock()
+
+        def count_tokens(model, contents):
+            calls_by_key.setdefault(api_key, []).append(contents)
+            if api_key in fail_first_for:
+                fail_first_for.discard(api_key)
+                raise generate_manifest.google_api_core_exceptions.ResourceExhausted(
+                    "quota"
+                )
+            return MagicMock(total_tokens=len(contents))
+
+        client.models.count_tokens.side_effect = count_tokens
+        return client
+
+    return factory
+
+
+def test_token_bucket_refills_at_rate():
+    clock = _FakeClock()
+    bucket = generate_manifest.TokenBucket(rate_per_minute=60, clock=clock)
+    assert bucket.try_consume() is True
+    assert bucket.try_consume() is False
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert bucket.try_consume() is True
+
+
+def test_token_bucket_penalize_blocks_key():
+    clock = _FakeClock()
+    bucket = generate_manifest.TokenBucket(rate_per_minute=600, clock=clock)
+    bucket.penalize(5.0)
+    assert bucket.wait_time() == pytest.approx(5.0)
+    clock.advance(5.0)
+    assert bucket.try_consume() is True
+
+
+def test_resolve_rate_per_minute_uses_model_limits_and_sleep(monkeypatch):
+    monkeypatch.setitem(
+        generate_manifest.core_config.MODEL_RPM_LIMITS,
+        generate_manifest.GEMINI_MODEL_NAME,
+        15,
+    )
+    assert generate_manifest.resolve_rate_per_minute(None, 0) == 15
+    assert generate_manifest.resolve_rate_per_minute(None, 10.0) == 6
+    assert generate_manifest.resolve_rate_per_minute(120, 0) == 120
+
+
+def test_count_tokens_concurrently_spreads_across_keys(tmp_path: Path):
+    jobs = []
+    for i in range(6):
+        file_path = tmp_path / f"file{i}.php"
+        file_path.write_text("x" * (i + 1), encoding="utf-8")
+        jobs.append((f"file{i}.php", file_path, "code_php_model"))
+
+    calls_by_key = {}
+    pool = generate_manifest.ApiKeyPool(
+        ["key-a", "key-b"],
+        rate_per_minute=6000,
+        timeout_seconds=6,
+        client_factory=_fake_client_factory(calls_by_key),
+        sleep=lambda s: None,
+    )
+    results = generate_manifest.count_tokens_concurrently(
+        jobs, pool, max_workers=3, verbose=False
+    )
+
+    assert results == {f"file{i}.php": (i + 1, "api") for i in range(6)}
+    assert sum(len(v) for v in calls_by_key.values()) == 6
+    assert set(calls_by_key) == {"key-a", "key-b"}
+
+
+def test_count_tokens_via_api_rate_limit_moves_to_other_key():
+    calls_by_key = {}
+    pool = generate_manifest.ApiKeyPool(
+        ["key-a", "key-b"],
+        rate_per_minute=6000,
+        timeout_seconds=6,
+        client_factory=_fake_client_factory(calls_by_key, fail_first_for={"key-a"}),
+        sleep=lambda s: None,
+    )
+    result = generate_manifest.count_tokens_via_api(
+        pool, "abcdefgh", "a.php", verbose=False
+    )
+    assert result == (8, "api")
+    assert list(calls_by_key) == ["key-a", "key-b"]
+    assert pool.buckets[0].wait_time() > 0
+
+
+def test_count_tokens_via_api_falls_back_to_estimate_when_all_keys_limited():
+    calls_by_key = {}
+    pool = generate_manifest.ApiKeyPool(
+        ["key-a"],
+        rate_per_minute=6000,
+        timeout_seconds=6,
+        client_factory=_fake_client_factory(calls_by_key, fail_first_for={"key-a"}),
+        sleep=lambda s: None,
+    )
+    content = "y" * 40
+    result = generate_manifest.count_tokens_via_api(
+        pool, content, "b.php", verbose=False
+    )
+    assert result == (generate_manifest.estimate_token_count(content), "estimate")
+    assert result[0] == 10
+
+
+def test_estimate_token_count_matches_context_estimator_for_empty_files():
+    assert generate_manifest.estimate_token_count("", "docs_md") == 0
+    assert generate_manifest.estimate_token_count(
+        "x" * 38, "docs_md"
+    ) == generate_manifest.token_estimator.estimate_tokens("x" * 38, "docs_md")
+
+
+# --- Testes para a unidade de processamento com leitura única ---
+PHP_SAMPLE = "<?php\nnamespace App\\Models;\n\nuse Illuminate\\Support\\Str;\nuse App\\Models\\User;\n\nclass Foo {}\n"
+
+
+def test_process_file_single_read_opens_file_once(tmp_path: Path):
+    php_file = tmp_path / "Foo.php"
+    php_file.write_text(PHP_SAMPLE, encoding="utf-8")
+    real_open = open
+
+    with patch("builtins.open", side_effect=real_open) as mock_open:
+        result = generate_manifest.process_file_single_read(
+            php_file, "code_php_model", verbose=False
+        )
+
+    opened_paths = [c.args[0] for c in mock_open.call_args_list]
+    assert opened_paths.count(php_file) == 1
+    assert result.is_binary is False
+    assert (
+        result.hash == generate_manifest.hashlib.sha1(php_file.read_bytes()).hexdigest()
+    )
+    assert result.text == PHP_SAMPLE
+    assert result.dependencies == ["App\\Models\\User", "Illuminate\\Support\\Str"]
+
+
+def test_process_file_single_read_uses_mmap_for_large_files(
+    tmp_path: Path, monkeypatch
+):
+    monkeypatch.setattr(generate_manifest, "MMAP_THRESHOLD_BYTES", 16)
+    big_file = tmp_path / "big.md"
+    content = "linha de texto\n" * 100
+    big_file.write_text(content, encoding="utf-8")
+
+    with patch.object(
+        generate_manifest.mmap, "mmap", wraps=generate_manifest.mmap.mmap
+    ) as mock_mmap:
+        result = generate_manifest.process_file_single_read(
+            big_file, "docs_md", verbose=False
+        )
+
+    assert mock_mmap.call_count == 1
+    assert result.text == content
+    assert result.hash == generate_manifest.hashlib.sha1(content.encode()).hexdigest()
+    assert result.dependencies == []
+
+
+def test_process_file_single_read_binary_and_env(tmp_path: Path):
+    binary_file = tmp_path / "blob.txt"
+    binary_file.write_bytes(b"\x00\x01\x02binary")
+    env_file = tmp_path / ".env"
+    env_file.write_text("APP_KEY=secret\n", encoding="utf-8")
+
+    binary_result = generate_manifest.process_file_single_read(
+        binary_file, "unknown", verbose=False
+    )
+    env_result = generate_manifest.process_file_single_read(
+        env_file, "environment_env", verbose=False
+    )
+
+    assert binary_result.is_binary is True
+    assert binary_result.hash is None and binary_result.text is None
+    assert env_result.hash is None
+    assert env_result.text == "APP_KEY=secret\n"
+
+
+# --- Testes para o fast path por stat() ---
+def test_can_reuse_previous_entry_when_stat_matches(tmp_path: Path):
+    file_path = tmp_path / "routes" / "web.php"
+    file_path.parent.mkdir(parents=True)
+    file_path.write_text("<?php\n", encoding="utf-8")
+    fingerprint = generate_manifest.get_stat_fingerprint(file_path)
+    previous = {
+        "type": "code_php_route",
+        "hash": "abc",
+        "token_count": 3,
+        **fingerprint,
+    }
+
+    assert set(fingerprint) == set(generate_manifest.STAT_FINGERPRINT_KEYS)
+    assert generate_manifest.can_reuse_previous_entry(
+        previous, "code_php_route", fingerprint
+    )
+
+
+def test_can_reuse_previous_entry_rejects_changes(tmp_path: Path):
+    file_path = tmp_path / "a.md"
+    file_path.write_text("v1", encoding="utf-8")
+    fingerprint = generate_manifest.get_stat_fingerprint(file_path)
+    previous = {"type": "docs_md", "hash": "abc", "token_count": 1, **fingerprint}
+
+    changed_size = dict(fingerprint, size=fingerprint["size"] + 1)
+    changed_mtime = dict(fingerprint, mtime_ns=fingerprint["mtime_ns"] + 1)
+    assert not generate_manifest.can_reuse_previous_entry(
+        previous, "docs_md", changed_size
+    )
+    assert not generate_manifest.can_reuse_previous_entry(
+        previous, "docs_md", changed_mtime
+    )
+    assert not generate_manifest.can_reuse_previous_entry(
+        previous, "docs_other", fingerprint
+    )
+    assert not generate_manifest.can_reuse_previous_entry({}, "docs_md", fingerprint)
+    assert not generate_manifest.can_reuse_previous_entry(previous, "docs_md", None)
+    # Manifestos antigos sem mtime_ns/size/inode nunca usam o fast path
+    legacy = {"type": "docs_md", "hash": "abc", "token_count": 1}
+    assert not generate_manifest.can_reuse_previous_entry(
+        legacy, "docs_md", fingerprint
+    )
+    # Hash presente mas sem contagem: precisa recontar
+    missing_count = dict(previous, token_count=None)
+    assert not generate_manifest.can_reuse_previous_entry(
+        missing_count, "docs_md", fingerprint
+    )
+    # Estimativa local: recontada quando a API está disponível
+    estimated = dict(previous, token_count_source="estimate")
+    assert generate_manifest.can_reuse_previous_entry(estimated, "docs_md", fingerprint)
+    assert not generate_manifest.can_reuse_previous_entry(
+        estimated, "docs_md", fingerprint, api_counting_enabled=True
+    )
+    assert generate_manifest.can_reuse_previous_entry(
+        dict(estimated, type="environment_env"),
+        "environment_env",
+        fingerprint,
+        api_counting_enabled=True,
+    )
+
+
+def test_get_stat_fingerprint_missing_file(tmp_path: Path):
+    assert generate_manifest.get_stat_fingerprint(tmp_path / "missing.txt") is None
+
+
+# --- Testes para o índice reverso 'dependents' (PSR-4) ---
+def test_load_psr4_mappings_reads_composer_autoload(fake_project_root: Path):
+    (fake_project_root / "composer.json").write_text(
+        '{"autoload": {"psr-4": {"App\\\\": "app/", "Database\\\\Seeders\\\\": "database/seeders/"}},'
+        ' "autoload-dev": {"psr-4": {"Tests\\\\": "tests/"}}}',
+        encoding="utf-8",
+    )
+    vendor_pkg = fake_project_root / "vendor/uspdev/replicado"
+    vendor_pkg.mkdir(parents=True)
+    (vendor_pkg / "composer.json").write_text(
+        '{"autoload": {"psr-4": {"Uspdev\\\\Replicado\\\\": "src/"}}}',
+        encoding="utf-8",
+    )
+
+    mappings = generate_manifest.load_psr4_mappings(verbose=False)
+
+    assert ("Uspdev\\Replicado\\", "vendor/uspdev/replicado/src") in mappings
+    assert [len(m[0]) for m in mappings] == sorted(
+        (len(m[0]) for m in mappings), reverse=True
+    )
+    assert ("App\\", "app") in mappings
+    assert ("Tests\\", "tests") in mappings
+    assert generate_manifest.resolve_fqcn_to_path("App\\Models\\User", mappings) == (
+        "app/Models/User.php"
+    )
+    assert (
+        generate_manifest.resolve_fqcn_to_path("Uspdev\\Replicado\\Pessoa", mappings)
+        == "vendor/uspdev/replicado/src/Pessoa.php"
+    )
+    assert (
+        generate_manifest.resolve_fqcn_to_path("Illuminate\\Support\\Str", mappings)
+        is None
+    )
+
+
+def test_load_psr4_mappings_skips_directories_outside_project(
+    fake_project_root: Path,
+):
+    (fake_project_root / "composer.json").write_text(
+        '{"autoload": {"psr-4": {"App\\\\": "app/", "Lib\\\\": "../lib/"}}}',
+        encoding="utf-8",
+    )
+
+    mappings = generate_manifest.load_psr4_mappings(verbose=False)
+
+    assert mappings == [("App\\", "app")]
+
+
+def test_compute_dependents_inverts_dependencies():
+    mappings = [("App\\", "app"), ("Tests\\", "tests")]
+    files_data = {
+        "app/Models/User.php": {
+            "dependencies": ["Illuminate\\Support\\Str"],
+            "dependents": [],
+        },
+        "app/Http/Controllers/UserController.php": {
+            "dependencies": ["App\\Models\\User", "App\\Services\\Missing"],
+            "dependents": [],
+        },
+        "tests/Feature/UserTest.php": {
+            "dependencies": [
+                "App\\Models\\User",
+                "App\\Http\\Controllers\\UserController",
+            ],
+            "dependents": [],
+        },
+        "README.md": {"dependencies": [], "dependents": []},
+    }
+
+    edge_count = generate_manifest.compute_dependents(
+        files_data, mappings, verbose=False
+    )
+
+    assert edge_count == 3
+    assert files_data["app/Models/User.php"]["dependents"] == [
+        "app/Http/Controllers/UserController.php",
+        "tests/Feature/UserTest.php",
+    ]
+    assert files_data["app/Http/Controllers/UserController.php"]["dependents"] == [
+        "tests/Feature/UserTest.php"
+    ]
+    assert files_data["tests/Feature/UserTest.php"]["dependents"] == []
+    assert files_data["README.md"]["dependents"] == []
+
+
+# --- Testes para o índice por basename do manifesto anterior ---
+def _legacy_context_code_lookup(previous_files, file_path_relative: Path):
+    """Busca linear original (O(entradas anteriores) por arquivo)."""
+    for prev_path_str in previous_files.keys():
+        if prev_path_str.startswith("context_llm/code/") and prev_path_str.endswith(
+            f"/{file_path_relative.name}"
+        ):
+            if Path(prev_path_str).parent.name != file_path_relative.parent.name:
+                return prev_path_str
+    return None
+
+
+def test_context_code_index_latest_timestamp_wins():
+    previous_files = {
+        "context_llm/code/20240101_000000/git_log.txt": {"summary": "old"},
+        "context_llm/code/20240301_000000/git_log.txt": {"summary": "newest"},
+        "context_llm/code/20240201_000000/git_log.txt": {"summary": "middle"},
+        "app/git_log.txt": {"summary": "not context"},
+    }
+    index = generate_manifest.build_context_code_basename_index(previous_files)
+
+    assert index["git_log.txt"] == [
+        "context_llm/code/20240301_000000/git_log.txt",
+        "context_llm/code/20240201_000000/git_log.txt",
+    ]
+    new_snapshot = Path("context_llm/code/20240401_000000/git_log.txt")
+    rerun_snapshot = Path("context_llm/code/20240301_000000/git_log.txt")
+    assert (
+        generate_manifest.find_previous_context_code_path(index, new_snapshot)
+        == "context_llm/code/20240301_000000/git_log.txt"
+    )
+    assert (
+        generate_manifest.find_previous_context_code_path(index, rerun_snapshot)
+        == "context_llm/code/20240201_000000/git_log.txt"
+    )
+    assert (
+        generate_manifest.find_previous_context_code_path(
+            index, Path("context_llm/code/20240401_000000/unknown.txt")
+        )
+        is None
+    )
+
+
+def test_load_previous_manifest_returns_basename_index(fake_project_root: Path):
+    data_dir = fake_project_root / "scripts" / "data"
+    data_dir.mkdir(parents=True)
+    (data_dir / "20240101_000000_manifest.json").write_text(
+        '{"files": {"context_llm/code/20231231_000000/a.txt": {}, "README.md": {}}}',
+        encoding="utf-8",
+    )
+
+    files_data, index, metadata = generate_manifest.load_previous_manifest(
+        data_dir, False
+    )
+
+    assert set(files_data) == {"context_llm/code/20231231_000000/a.txt", "README.md"}
+    assert index == {"a.txt": ["context_llm/code/20231231_000000/a.txt"]}
+    assert metadata == {}
+
+
+def test_context_code_lookup_micro_benchmark_20k_entries():
+    """Micro-benchmark: 20k entradas anteriores; o índice deve superar a busca linear."""
+    import time
+
+    n_snapshots, n_basenames = 40, 500
+    previous_files = {
+        f"context_llm/code/2024{s:04d}_000000/file_{b}.txt": {"summary": f"{s}-{b}"}
+        for s in range(n_snapshots)
+        for b in range(n_basenames)
+    }
+    assert len(previous_files) == 20_000
+    # Metade dos arquivos atuais já existia; a outra metade é nova (busca linear completa)
+    current_paths = [
+        Path(f"context_llm/code/20990101_000000/file_{b}.txt")
+        for b in range(n_basenames // 2, n_basenames + n_basenames // 2)
+    ]
+
+    start = time.perf_counter()
+    index = generate_manifest.build_context_code_basename_index(previous_files)
+    indexed = [
+        generate_manifest.find_previous_context_code_path(index, p)
+        for p in current_paths
+    ]
+    indexed_seconds = time.perf_counter() - start
+
+    sample_step = 10
+    start = time.perf_counter()
+    legacy = [
+        _legacy_context_code_lookup(previous_files, p)
+        for p in current_paths[::sample_step]
+    ]
+    legacy_seconds = (time.perf_counter() - start) * sample_step
+
+    assert sum(path is not None for path in indexed) == n_basenames // 2
+    assert all(
+        Path(path).parent.name == f"2024{n_snapshots - 1:04d}_000000"
+        for path in indexed
+        if path is not None
+    )
+    assert [path is None for path in legacy] == [
+        path is None for path in indexed[::sample_step]
+    ]
+    assert indexed_seconds < legacy_seconds
+
+
+# --- Testes para o estágio de metadados em paralelo (--jobs) ---
+def test_process_files_parallel_matches_serial(tmp_path: Path):
+    jobs = []
+    for i in range(12):
+        php_file = tmp_path / f"app/Models/Model{i}.php"
+        php_file.parent.mkdir(parents=True, exist_ok=True)
+        php_file.write_text(
+            f"<?php\nnamespace App\\Models;\nuse App\\Models\\Model{(i + 1) % 12};\nclass Model{i} {{}}\n",
+            encoding="utf-8",
+        )
+        jobs.append((f"app/Models/Model{i}.php", php_file, "code_php_model"))
+    binary_file = tmp_path / "public/logo.png"
+    binary_file.parent.mkdir(parents=True)
+    binary_file.write_bytes(b"\x89PNG\x00\x00")
+    jobs.append(("public/logo.png", binary_file, "asset_image"))
+
+    serial = generate_manifest.process_files(jobs, max_jobs=1, verbose=False)
+    parallel = generate_manifest.process_files(jobs, max_jobs=2, verbose=False)
+
+    assert serial == parallel
+    assert list(serial) == [job[0] for job in jobs]
+    assert serial["public/logo.png"].is_binary is True
+    model0 = serial["app/Models/Model0.php"]
+    assert model0.dependencies == ["App\\Models\\Model1"]
+    assert model0.text is None
+    assert model0.estimated_token_count == generate_manifest.estimate_token_count(
+        jobs[0][1].read_text(encoding="utf-8"), jobs[0][2]
+    )
+
+
+# --- Testes para o modo --incremental ---
+def test_parse_git_diff_name_status():
+    stdout = "M\0app/Models/User.php\0A\0routes/api.php\0D\0old file.txt\0T\0link\0"
+    assert generate_manifest.parse_git_diff_name_status(stdout) == [
+        ("M", "app/Models/User.php"),
+        ("A", "routes/api.php"),
+        ("D", "old file.txt"),
+        ("T", "link"),
+    ]
+
+
+def _fake_git(responses):
+    def fake_run_command(cmd_list, *args, **kwargs):
+        for prefix, result in responses.items():
+            if cmd_list[: len(prefix)] == list(prefix):
+                return result
+        raise AssertionError(f"Comando inesperado: {cmd_list}")
+
+    return fake_run_command
+
+
+@pytest.mark.parametrize("manifest_format", ["json", "sqlite"])
+def test_scan_project_files_incremental_uses_git_diff(
+    fake_project_root: Path, tmp_path: Path, manifest_format: str
+):
+    _create_files(
+        fake_project_root,
+        [
+            "app/Models/User.php",
+            "routes/web.php",
+            "routes/api.php",
+            "notes.txt",
+            "context_llm/common/info.md",
+        ],
+    )
+    previous_files = {
+        "app/Models/User.php": {"versioned": True},
+        "routes/web.php": {"versioned": True},
+        "app/Removed.php": {"versioned": True},
+        "context_llm/common/stale.md": {"versioned": False},
+    }
+    previous_metadata = {"git_commit": "abc123", "git_dirty_paths": ["routes/web.php"]}
+    if manifest_format == "sqlite":
+        sqlite_path = generate_manifest.manifest_store.write_manifest_sqlite(
+            {"_metadata": previous_metadata, "files": previous_files},
+            tmp_path / "previous_manifest.sqlite",
+        )
+        previous_files = generate_manifest.manifest_store.open_manifest_sqlite(
+            sqlite_path
+        )["files"]
+    responses = {
+        ("git", "cat-file"): (0, "", ""),
+        ("git", "diff"): (
+            0,
+            "M\0app/Models/User.php\0A\0routes/api.php\0D\0app/Removed.php\0",
+            "",
+        ),
+        ("git", "ls-files"): (0, "notes.txt\0", ""),
+    }
+
+    with patch.object(
+        generate_manifest, "run_command", side_effect=_fake_git(responses)
+    ), patch.object(
+        generate_manifest.manifest_store.SqliteManifestFiles,
+        "__getitem__",
+        side_effect=AssertionError("consulta por caminho"),
+    ):
+        result = generate_manifest.scan_project_files_incremental(
+            previous_files, previous_metadata, verbose=False
+        )
+    if manifest_format == "sqlite":
+        previous_files.close()
+
+    all_files, versioned, dirty = result
+    assert all_files == {
+        Path("app/Models/User.php"),
+        Path("routes/web.php"),
+        Path("routes/api.php"),
+        Path("notes.txt"),
+        Path("context_llm/common/info.md"),
+    }
+    assert versioned == {
+        Path("app/Models/User.php"),
+        Path("routes/web.php"),
+        Path("routes/api.php"),
+    }
+    assert dirty == {
+        "app/Models/User.php",
+        "routes/api.php",
+        "routes/web.php",
+        "notes.txt",
+        "context_llm/common/info.md",
+    }
+
+
+def test_scan_project_files_incremental_falls_back_without_base(
+    fake_project_root: Path,
+):
+    assert (
+        generate_manifest.scan_project_files_incremental(
+            {"a.php": {"versioned": True}}, {}, verbose=False
+        )
+        is None
+    )
+    with patch.object(
+        generate_manifest, "run_command", return_value=(128, "", "bad object")
+    ):
+        assert (
+            generate_manifest.scan_project_files_incremental(
+                {"a.php": {"versioned": True}},
+                {"git_commit": "deadbeef"},
+                verbose=False,
+            )
+            is None
+        )
+
+
+def test_stored_stat_fingerprint():
+    entry = {"type": "docs_md", "mtime_ns": 1, "size": 2, "inode": 3}
+    assert generate_manifest.stored_stat_fingerprint(entry) == {
+        "mtime_ns": 1,
+        "size": 2,
+        "inode": 3,
+    }
+    assert generate_manifest.stored_stat_fingerprint({"type": "docs_md"}) is None
+
+
+def test_update_token_cache_stores_only_api_counts_by_hash(tmp_path: Path):
+    cache = generate_manifest.token_cache.TokenCountCache(tmp_path / "cache.sqlite")
+    files_data = {
+        "app/A.php": {"hash": "h1", "token_count": 50, "token_count_source": "api"},
+        "app/B.php": {
+            "hash": "h2",
+            "token_count": 60,
+            "token_count_source": "estimate",
+        },
+        "docs/C.md": {
+            "hash": "h3",
+            "token_count": 70,
+            "token_count_source": "api",
+            "summary_token_count": 9,
+        },
+        "img.png": {"hash": None, "token_count": None},
+    }
+
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "A.php").write_text("<?php")
+    stat_result = (tmp_path / "app" / "A.php").stat()
+    files_data["app/A.php"].update(
+        size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns
+    )
+
+    assert generate_manifest.update_token_cache(cache, files_data, tmp_path) == (2, 1)
+    assert cache.lookup_file(tmp_path / "app" / "A.php") == (50, None)
+    assert cache.get("h1") == (50, None)
+    assert cache.get("h2") == (None, None)
+    assert cache.get("h3") == (70, 9)
+    cache.close()
@@ -0,0 +1,99 @@
+# tests/python/test_llm_core_budget.py
+import random
+import time
+
+from scripts.llm_core import budget
+
+
+def _total(choices):
+    return sum(choice.token_count for choice in choices)
+
+
+def test_prefers_summaries_over_truncating_large_essential():
+    items = [
+        budget.BudgetItem(
+            token_count=6000,
+            file_type="context_code_git_diff_cached",
+            is_essential=True,
+        )
+    ] + [
+        budget.BudgetItem(
+            token_count=1500, file_type="code_php_model", summary_token_count=100
+        )
+        for _ in range(4)
+    ]
+
+    choices = budget.allocate_context_budget(items, 8000)
+
+    assert choices[0] == budget.BudgetChoice(budget.CHOICE_FULL, 6000)
+    assert [c.kind for c in choices[1:]].count(budget.CHOICE_SUMMARY) >= 3
+    assert _total(choices) <= 8000
+
+
+def test_fills_remaining_budget_with_exact_truncation():
+    items = [budget.BudgetItem(token_count=1000, file_type="docs_md")]
+
+    choices = budget.allocate_context_budget(items, 620)
+
+    assert choices == [budget.BudgetChoice(budget.CHOICE_TRUNCATED, 620)]
+
+
+def test_minimum_options_when_budget_is_too_small():
+    items = [
+        budget.BudgetItem(token_count=5000, is_essential=True, summary_token_count=10),
+        budget.BudgetItem(token_count=80, is_essential=True),
+        budget.BudgetItem(token_count=3000, summary_token_count=20),
+    ]
+
+    choices = budget.allocate_context_budget(items, 50)
+
+    # Essenciais nunca são omitidos nem trocados por sumário
+    assert choices == [
+        budget.BudgetChoice(
+            budget.CHOICE_TRUNCATED, budget.MIN_TRUNCATED_TOKENS_ESSENTIAL
+        ),
+        budget.BudgetChoice(budget.CHOICE_FULL, 80),
+        budget.BudgetChoice(budget.CHOICE_DROPPED, 0),
+    ]
+
+
+def test_file_weight_by_category_and_essential_flag():
+    assert budget.file_weight("code_php_controller") == 1.0
+    assert budget.file_weight("dependency_composer") == 0.3
+    assert budget.file_weight("unknown_type") == budget.DEFAULT_FILE_WEIGHT
+    assert budget.file_weight(None, is_essential=True) == (
+        budget.DEFAULT_FILE_WEIGHT * budget.ESSENTIAL_WEIGHT_MULTIPLIER
+    )
+
+
+def test_benchmark_synthetic_5k_file_context():
+    rng = random.Random(42)
+    file_types = ["code_php_model", "docs_md", "context_code_git_log", "config_laravel"]
+    items = []
+    for i in range(5000):
+        token_count = rng.randint(20, 20000)
+        items.append(
+            budget.BudgetItem(
+                token_count=token_count,
+                file_type=rng.choice(file_types),
+                is_essential=i % 250 == 0,
+                summary_token_count=(
+                    rng.randint(10, 300) if rng.random() < 0.7 else None
+                ),
+            )
+        )
+    max_tokens = sum(item.token_count for item in items) // 10
+
+    start = time.perf_counter()
+    choices = budget.allocate_context_budget(items, max_tokens)
+    elapsed = time.perf_counter() - start
+
+    assert len(choices) == len(items)
+    assert _total(choices) <= max_tokens
+    assert max_tokens - _total(choices) < 20000  # orçamento praticamente todo usado
+    assert all(
+        c.kind != budget.CHOICE_DROPPED
+        for c, item in zip(choices, items)
+        if item.is_essential
+    )
+    assert elapsed < 2.0
@@ -1041,3 +1041,188 @@ def test_confirm_and_modify_selection_logs(mock_input, capsys, tmp_path: Path):
     assert final_selection == ["fileB.md", "fileC.js"]
 
     monkeypatch.undo()
+
+
+# --- Testes de carregamento preguiçoso (FileProcessUnit.source_path) ---
+def test_prepare_context_parts_reads_only_included_content(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(core_config, "PROJECT_ROOT", tmp_path)
+    context_dir = tmp_path / "context_llm" / "code" / "20240101_000000"
+    manifest_files = {}
+    for i in range(3):
+        rel = f"context_llm/code/20240101_000000/big_{i}.txt"
+        _create_tmp_file_rel_to_project_root(tmp_path, rel, f"{i}" * 40000)
+        manifest_files[rel] = {
+            "type": "docs_md",
+            "token_count": 10000,
+            "summary": f"Resumo {i}",
+            "summary_token_count": 5,
+        }
+
+    read_paths: List[str] = []
+    original_read_text = Path.read_text
+
+    def tracking_read_text(self, *args, **kwargs):
+        read_paths.append(self.name)
+        return original_read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", tracking_read_text)
+    parts = core_context.prepare_context_parts(
+        context_dir,
+        manifest_data={"files": manifest_files},
+        max_input_tokens_for_call=10100,
+    )
+
+    assert len(parts) == 3
+    # Um arquivo cabe integral; os outros dois viram sumário sem serem lidos
+    assert len(read_paths) == 1
+    assert sum("Resumo" in part.text for part in parts) == 3
+
+
+def test_truncate_unit_reads_head_and_tail_slices(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(core_config, "PROJECT_ROOT", tmp_path)
+    content = "".join(f"linha {i:05d} ação\n" for i in range(20000))
+    file_path = _create_tmp_file_rel_to_project_root(tmp_path, "big.log", content)
+    unit = core_context._build_file_unit("big.log", file_path, None, False)
+
+    assert unit.content is None
+    assert unit.load_content() == content
+    assert core_context._truncate_unit(unit, 300) == core_context._truncate_content(
+        content, 300
+    )
+    head, tail = core_context._read_head_tail(file_path, 1000)
+    data = content.encode("utf-8")
+    assert head == data[:1000].decode("utf-8", errors="ignore")
+    assert tail == data[-1000:].decode("utf-8", errors="ignore")
+    assert content.startswith(head) and content.endswith(tail)
+
+
+def test_truncate_content_keeps_whole_lines_for_multibyte_text():
+    content = "".join(f"{i:04d} " + "日本語のテキスト" * 4 + "\n" for i in range(2000))
+
+    truncated, token_count = core_context._truncate_content(content, 300)
+    head, tail = truncated.split(core_context.TRUNCATION_SEPARATOR)
+
+    assert token_count <= 300
+    # O orçamento é medido em bytes: linhas multibyte não caem no corte por
+    # caractere
+    assert head.endswith("\n") and re.match(r"\d{4} ", tail)
+    assert content.startswith(head) and content.endswith(tail)
+
+
+def test_file_process_unit_uses_slots():
+    unit = FileProcessUnit(relative_path="a.txt", token_count=1, original_token_count=1)
+    assert not hasattr(unit, "__dict__")
+    with pytest.raises(AttributeError):
+        unit.unknown_attribute = True
+
+
+def test_build_part_text_matches_delimited_layout():
+    unit = FileProcessUnit(
+        relative_path="docs/a.md",
+        token_count=1,
+        original_token_count=1,
+        summary="Resumo",
+        is_essential_from_map=True,
+    )
+    text = core_context._build_part_text(unit, "Corpo")
+    assert text == "\n".join(
+        [
+            f"{core_config.ESSENTIAL_CONTENT_DELIMITER_START}docs/a.md ---",
+            "--- SUMMARY ---\nResumo\n--- END SUMMARY ---",
+            "Corpo",
+            f"{core_config.ESSENTIAL_CONTENT_DELIMITER_END}docs/a.md ---",
+        ]
+    )
+    unit.is_essential_from_map = False
+    assert core_context._build_part_text(unit, "Corpo", include_summary=False) == (
+        f"{core_config.SUMMARY_CONTENT_DELIMITER_START}docs/a.md ---\nCorpo\n"
+        f"{core_config.SUMMARY_CONTENT_DELIMITER_END}docs/a.md ---"
+    )
+
+
+def test_prepare_context_parts_peak_allocation_on_200k_token_context(
+    tmp_path: Path, monkeypatch
+):
+    import tracemalloc
+
+    monkeypatch.setattr(core_config, "PROJECT_ROOT", tmp_path)
+    context_dir = tmp_path / "context_llm" / "code" / "20240101_000000"
+    file_chars = 38_000  # ~10k tokens por arquivo, ~200k tokens no total
+    for i in range(20):
+        _create_tmp_file_rel_to_project_root(
+            tmp_path,
+            f"context_llm/code/20240101_000000/f{i:02d}.txt",
+            chr(ord("a") + i) * file_chars,
+        )
+    total_chars = 20 * file_chars
+
+    tracemalloc.start()
+    try:
+        parts = core_context.prepare_context_parts(context_dir)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(parts) == 20
+    assert sum(len(part.text) for part in parts) > total_chars
+    # O texto final das partes (~1x) mais um arquivo em leitura por vez; a
+    # montagem antiga mantinha todo o conteúdo carregado além das partes (~2x).
+    assert peak < total_chars * 1.4
+
+
+# --- Testes de truncamento exato (_truncate_content) ---
+def _count(text: str, file_type: Optional[str] = None) -> int:
+    return core_context.token_estimator.estimate_tokens(text, file_type)
+
+
+def test_truncate_content_exact_count_on_line_boundaries():
+    content = "".join(f"linha {i:04d} com algum texto\n" for i in range(2000))
+    for target in (60, 137, 500, 1999):
+        truncated, tokens = core_context._truncate_content(content, target)
+        head, tail = truncated.split(core_context.TRUNCATION_SEPARATOR)
+        assert tokens == _count(truncated)
+        assert target - 10 <= tokens <= target
+        assert content.startswith(head) and content.endswith(tail)
+        assert head == "" or head.endswith("\n")
+        assert tail == "" or content[: len(content) - len(tail)].endswith("\n")
+
+
+def test_truncate_content_head_tail_weighting_by_type():
+    log = "".join(f"PASS Tests\\Feature\\T{i}\n" for i in range(3000)) + (
+        "FAILED Tests\\Feature\\Ultimo\nTests: 1 failed, 2999 passed\n"
+    )
+    truncated, tokens = core_context._truncate_content(
+        log,
+        300,
+        head_ratio=core_context._truncation_head_ratio(
+            None, "context_llm/code/20240101_000000/phpunit_test_results.txt"
+        ),
+    )
+    head, tail = truncated.split(core_context.TRUNCATION_SEPARATOR)
+    assert tokens <= 300
+    assert "Tests: 1 failed, 2999 passed" in tail
+    assert len(tail) > 4 * len(head)
+
+    assert core_context._truncation_head_ratio("code_php_model") == 0.8
+    assert core_context._truncation_head_ratio("context_code_phpunit") == 0.15
+    assert (
+        core_context._truncation_head_ratio(None, "x/y.txt")
+        == core_context.DEFAULT_TRUNCATION_HEAD_RATIO
+    )
+
+
+def test_truncate_content_long_lines_fall_back_to_characters():
+    content = "A" * 20000 + "\n" + "B" * 20000
+    truncated, tokens = core_context._truncate_content(content, 1000, head_ratio=0.5)
+    head, tail = truncated.split(core_context.TRUNCATION_SEPARATOR)
+    assert tokens <= 1000 and tokens >= 990
+    assert set(head) == {"A"} and set(tail) == {"B"}
+
+
+def test_truncate_content_small_targets():
+    content = "x" * 4000
+    truncated, tokens = core_context._truncate_content(content, 20)
+    assert core_context.TRUNCATION_SHORT_MARKER in truncated
+    assert tokens == _count(truncated) <= 20
+    assert core_context._truncate_content(content, 1) == ("", 0)
+    assert core_context._truncate_content("curto", 100) == ("curto", _count("curto"))
@@ -0,0 +1,196 @@
+# tests/python/test_llm_core_manifest_store.py
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from scripts.llm_core import context as core_context
+from scripts.llm_core import io_utils
+from scripts.llm_core import manifest_store
+
+SAMPLE_MANIFEST = {
+    "_metadata": {"timestamp": "2024-01-01T00:00:00", "files_after_filter": 3},
+    "files": {
+        "app/Models/User.php": {
+            "type": "code_php_model",
+            "versioned": True,
+            "hash": "abc",
+            "token_count": 120,
+            "dependencies": ["Illuminate\\Support\\Str"],
+            "dependents": ["tests/Feature/UserTest.php"],
+            "summary": "Modelo de usuário.",
+            "mtime_ns": 1,
+            "size": 10,
+            "inode": 42,
+        },
+        "README.md": {
+            "type": "docs_md",
+            "versioned": True,
+            "hash": "def",
+            "token_count": 50,
+            "dependencies": [],
+            "dependents": [],
+            "summary": None,
+        },
+        "tests/Feature/UserTest.php": {
+            "type": "test_php_feature",
+            "versioned": True,
+            "hash": "123",
+            "token_count": 80,
+            "dependencies": ["App\\Models\\User"],
+            "dependents": [],
+            "summary": "Testes do usuário.",
+        },
+    },
+}
+
+
+def _write_json_manifest(tmp_path: Path, data=SAMPLE_MANIFEST) -> Path:
+    manifest_path = tmp_path / "20240101_000000_manifest.json"
+    manifest_path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+    return manifest_path
+
+
+def test_convert_json_to_sqlite_and_lazy_lookup(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+
+    assert sqlite_path == tmp_path / "20240101_000000_manifest.sqlite"
+    manifest = manifest_store.open_manifest_sqlite(sqlite_path, json_path)
+    files = manifest["files"]
+
+    assert manifest["_metadata"] == SAMPLE_MANIFEST["_metadata"]
+    assert len(files) == 3
+    assert "README.md" in files and "missing.md" not in files
+    assert (
+        files["app/Models/User.php"] == SAMPLE_MANIFEST["files"]["app/Models/User.php"]
+    )
+    assert list(files["app/Models/User.php"]) == list(
+        SAMPLE_MANIFEST["files"]["app/Models/User.php"]
+    )
+    assert files.get("missing.md") is None
+    files.close()
+
+
+def test_iter_entries_skips_summaries_by_default(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+    files = manifest_store.open_manifest_sqlite(sqlite_path)["files"]
+
+    entries = list(files.iter_entries())
+    with_summaries = dict(files.iter_entries(include_summary=True))
+
+    assert [path for path, _ in entries] == sorted(SAMPLE_MANIFEST["files"])
+    assert all("summary" not in metadata for _, metadata in entries)
+    assert with_summaries == SAMPLE_MANIFEST["files"]
+    files.close()
+
+
+def test_sqlite_is_ignored_when_json_changes(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+    assert manifest_store.open_manifest_sqlite(sqlite_path, json_path) is not None
+
+    json_path.write_text(json.dumps({"files": {}}), encoding="utf-8")
+    os.utime(json_path, ns=(1, 1))
+
+    assert manifest_store.open_manifest_sqlite(sqlite_path, json_path) is None
+    assert manifest_store.open_manifest_sqlite(tmp_path / "missing.sqlite") is None
+
+
+def test_convert_sqlite_to_json_round_trip(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+    restored_path = tmp_path / "restored_manifest.json"
+
+    manifest_store.convert_sqlite_to_json(sqlite_path, restored_path)
+
+    restored = json.loads(restored_path.read_text(encoding="utf-8"))
+    assert restored == SAMPLE_MANIFEST
+
+
+def test_load_manifest_prefers_fresh_sqlite(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    manifest_store.convert_json_to_sqlite(json_path)
+
+    lazy = core_context.load_manifest(json_path)
+    eager = core_context.load_manifest(json_path, lazy=False)
+
+    assert isinstance(lazy["files"], manifest_store.SqliteManifestFiles)
+    assert isinstance(eager["files"], dict)
+    assert dict(lazy["files"].items()) == eager["files"]
+    lazy["files"].close()
+
+
+def test_update_manifest_file_refreshes_sqlite_sibling(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+    updated = json.loads(json.dumps(SAMPLE_MANIFEST))
+    updated["files"]["README.md"]["summary"] = "Novo sumário."
+
+    assert io_utils.update_manifest_file(json_path, updated)
+
+    files = manifest_store.open_manifest_sqlite(sqlite_path, json_path)["files"]
+    assert files["README.md"]["summary"] == "Novo sumário."
+    files.close()
+
+
+def test_selector_payload_reads_sqlite_manifest_in_one_query(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    manifest_store.convert_json_to_sqlite(json_path)
+    manifest = core_context.load_manifest(json_path)
+    statements = []
+    manifest["files"]._conn.set_trace_callback(statements.append)
+
+    payload = core_context.prepare_payload_for_selector_llm(
+        "tarefa-sem-essenciais",
+        argparse.Namespace(),
+        None,
+        manifest,
+        "{{ESSENTIAL_FILES_CONTENT}}{{REMAINING_MANIFEST_JSON}}",
+        1000,
+    )
+
+    assert "Modelo de usuário." in payload
+    assert len([s for s in statements if "manifest_files" in s]) == 1
+    core_context.close_manifest(manifest)
+
+
+def test_close_manifest_and_context_manager_close_connection(tmp_path: Path):
+    json_path = _write_json_manifest(tmp_path)
+    sqlite_path = manifest_store.convert_json_to_sqlite(json_path)
+
+    manifest = core_context.load_manifest(json_path)
+    core_context.close_manifest(manifest)
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(manifest["files"])
+
+    with manifest_store.open_manifest_sqlite(sqlite_path)["files"] as files:
+        assert "README.md" in files
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(files)
+    core_context.close_manifest(core_context.load_manifest(json_path, lazy=False))
+    core_context.close_manifest(None)
+
+
+def test_open_manifest_sqlite_closes_connection_on_invalid_file(
+    tmp_path: Path, monkeypatch
+):
+    sqlite_path = tmp_path / "not_a_manifest.sqlite"
+    sqlite3.connect(sqlite_path).close()  # banco vazio, sem manifest_meta
+    opened = []
+    original_connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(original_connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(manifest_store.sqlite3, "connect", tracking_connect)
+
+    assert manifest_store.open_manifest_sqlite(sqlite_path) is None
+    assert len(opened) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
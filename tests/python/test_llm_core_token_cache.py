@@ -0,0 +1,132 @@
+# tests/python/test_llm_core_token_cache.py
+import os
+from pathlib import Path
+
+from scripts.llm_core import config as core_config
+from scripts.llm_core import context as core_context
+from scripts.llm_core import token_cache
+
+
+def _index_entry(file_path: Path, content_hash: str):
+    stat_result = file_path.stat()
+    return (
+        os.path.abspath(file_path),
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+        content_hash,
+    )
+
+
+def test_put_and_get_keep_existing_counts_on_partial_update(tmp_path: Path):
+    cache = token_cache.TokenCountCache(tmp_path / "token_cache.sqlite")
+
+    cache.put("abc", token_count=120)
+    cache.put("abc", summary_token_count=15)
+
+    assert cache.get("abc") == (120, 15)
+    assert cache.get("missing") == (None, None)
+    assert cache.put_many([("", 1, None), ("def", None, None)]) == 0
+    cache.close()
+
+
+def test_lookup_file_uses_index_and_ignores_modified_files(tmp_path: Path):
+    cache_path = tmp_path / "token_cache.sqlite"
+    source = tmp_path / "Model.php"
+    source.write_text("<?php class Model {}", encoding="utf-8")
+    writer = token_cache.TokenCountCache(cache_path)
+    writer.put("h1", token_count=42)
+    assert writer.replace_file_index([_index_entry(source, "h1")]) == 1
+    writer.close()
+
+    reader = token_cache.TokenCountCache(cache_path, read_only=True)
+    assert reader.lookup_file(source) == (42, None)
+
+    source.write_text("<?php class Model { public $x; }", encoding="utf-8")
+    assert reader.lookup_file(source) == (None, None)
+    assert reader.lookup_file(tmp_path / "missing.php") == (None, None)
+    reader.close()
+
+
+def test_replace_file_index_drops_paths_no_longer_in_manifest(tmp_path: Path):
+    cache = token_cache.TokenCountCache(tmp_path / "token_cache.sqlite")
+    files = []
+    for name in ("a.txt", "b.txt"):
+        files.append(tmp_path / name)
+        files[-1].write_text(name, encoding="utf-8")
+    cache.put_many([("ha", 1, None), ("hb", 2, None)])
+
+    cache.replace_file_index(
+        [_index_entry(files[0], "ha"), _index_entry(files[1], "hb")]
+    )
+    cache.replace_file_index([_index_entry(files[1], "hb")])
+
+    assert cache.lookup_file(files[0]) == (None, None)
+    assert cache.lookup_file(files[1]) == (2, None)
+    cache.close()
+
+
+def test_read_only_cache_never_writes(tmp_path: Path):
+    cache_path = tmp_path / "data" / "token_cache.sqlite"
+    source = tmp_path / "a.txt"
+    source.write_text("abc", encoding="utf-8")
+
+    missing = token_cache.TokenCountCache(cache_path, read_only=True)
+    assert missing.lookup_file(source) == (None, None)
+    assert not cache_path.exists()
+
+    token_cache.TokenCountCache(cache_path).replace_file_index([])
+    mtime_before = cache_path.stat().st_mtime_ns
+    reader = token_cache.TokenCountCache(cache_path, read_only=True)
+    assert reader.lookup_file(source) == (None, None)
+    reader.put("abc", token_count=3)  # rejeitado pela conexão somente leitura
+    reader.close()
+
+    assert cache_path.stat().st_mtime_ns == mtime_before
+    assert token_cache.TokenCountCache(cache_path).get("abc") == (None, None)
+
+
+def test_build_file_unit_uses_cached_count_when_manifest_has_none(
+    tmp_path: Path, monkeypatch
+):
+    cache_path = tmp_path / "token_cache.sqlite"
+    monkeypatch.setattr(core_config, "TOKEN_CACHE_FILE", cache_path)
+    source = tmp_path / "app" / "Model.php"
+    source.parent.mkdir()
+    source.write_text("<?php class Model {}\n" * 100, encoding="utf-8")
+    writer = token_cache.TokenCountCache(cache_path)
+    writer.put("h1", token_count=77)
+    writer.replace_file_index([_index_entry(source, "h1")])
+    writer.close()
+
+    unit = core_context._build_file_unit("app/Model.php", source, None, False)
+    uncached = source.parent / "other.txt"
+    uncached.write_text("y" * 380, encoding="utf-8")
+    fallback_unit = core_context._build_file_unit(
+        "app/other.txt", uncached, None, False
+    )
+
+    assert unit.token_count == unit.original_token_count == 77
+    assert fallback_unit.token_count == 100
+    token_cache.get_default_cache().close()
+
+
+def test_manifest_and_context_estimates_agree_for_non_ascii_files(
+    tmp_path: Path, monkeypatch
+):
+    from scripts import generate_manifest
+    from scripts.llm_core import token_estimator
+
+    monkeypatch.setattr(core_config, "TOKEN_CACHE_FILE", tmp_path / "cache.sqlite")
+    source = tmp_path / "docs" / "guia.md"
+    source.parent.mkdir()
+    content = "A configuração da aplicação define as opções de execução.\n" * 40
+    source.write_text(content, encoding="utf-8")
+
+    result = generate_manifest.process_file_single_read(source, "docs_md", False)
+    manifest_data = {"files": {"docs/guia.md": {"type": "docs_md"}}}
+    unit = core_context._build_file_unit("docs/guia.md", source, manifest_data, False)
+
+    assert len(content.encode("utf-8")) > len(content)
+    assert result.estimated_token_count == unit.token_count
+    assert unit.token_count == token_estimator.estimate_tokens(content, "docs_md")
+    token_cache.get_default_cache().close()
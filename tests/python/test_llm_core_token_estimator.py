@@ -0,0 +1,70 @@
+# tests/python/test_llm_core_token_estimator.py
+import json
+from pathlib import Path
+
+from scripts.llm_core import token_estimator
+
+
+def _entry(file_type, size, token_count, source="api"):
+    return {
+        "type": file_type,
+        "size": size,
+        "token_count": token_count,
+        "token_count_source": source,
+    }
+
+
+def test_fit_calibration_per_type_and_category():
+    entries = {
+        f"app/Models/M{i}.php": _entry("code_php_model", 300, 100) for i in range(3)
+    }
+    entries.update({f"docs/d{i}.md": _entry("docs_md", 500, 100) for i in range(3)})
+    # Estimativas e tipos com poucas amostras não entram na calibração
+    entries["app/Models/Est.php"] = _entry("code_php_model", 9000, 10, "estimate")
+    entries["config/app.php"] = _entry("config_php", 700, 100)
+
+    calibration = token_estimator.fit_calibration(entries.items())
+
+    assert calibration["samples"] == 7
+    assert calibration["types"] == {"code_php_model": 3.0, "docs_md": 5.0}
+    assert calibration["categories"]["code"] == 3.0
+    assert "config" not in calibration["categories"]
+
+
+def test_is_api_token_count_legacy_entries_exclude_len_over_4_fallback():
+    assert token_estimator.is_api_token_count(
+        {"type": "docs_md", "size": 400, "token_count": 90}
+    )
+    assert not token_estimator.is_api_token_count(
+        {"type": "docs_md", "size": 400, "token_count": 100}
+    )
+    assert not token_estimator.is_api_token_count(
+        {"type": "environment_env", "size": 400, "token_count": 90}
+    )
+
+
+def test_estimate_tokens_uses_type_then_category_then_default():
+    calibration = {"types": {"code_php_model": 2.0}, "categories": {"code": 4.0}}
+    content = "x" * 40
+
+    assert token_estimator.estimate_tokens(content, "code_php_model", calibration) == 20
+    assert token_estimator.estimate_tokens(content, "code_php_job", calibration) == 10
+    assert token_estimator.estimate_tokens(content, "docs_md", calibration) == int(
+        40 / 3.8
+    )
+    assert token_estimator.estimate_tokens(content, None, calibration) == int(40 / 3.8)
+    assert token_estimator.estimate_tokens("", "code_php_model", calibration) == 0
+
+
+def test_save_and_load_calibration_roundtrip(tmp_path: Path):
+    calibration_path = tmp_path / "token_calibration.json"
+    calibration = token_estimator.fit_calibration(
+        (f"f{i}.md", _entry("docs_md", 450, 100)) for i in range(3)
+    )
+
+    token_estimator.save_calibration(calibration, calibration_path)
+
+    assert token_estimator.load_calibration(calibration_path) == calibration
+    calibration_path.write_text(json.dumps({"version": 0}), encoding="utf-8")
+    assert token_estimator.load_calibration(calibration_path) == {}
+    assert token_estimator.load_calibration(tmp_path / "missing.json") == {}
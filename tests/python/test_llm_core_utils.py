@@ -117,3 +117,21 @@ def test_run_command_timeout(mock_subprocess_run):
     assert stdout == ""
     # Correção: Verifica a mensagem de erro em português gerada pela função
     assert "Comando excedeu o tempo limite de 10 segundos: timeout_cmd" in stderr
+
+
+def test_phpunit_parallel_args(tmp_path, monkeypatch):
+    paratest_bin = tmp_path / "paratest"
+    monkeypatch.setattr(core_utils, "PARATEST_BIN", paratest_bin)
+    monkeypatch.setattr(core_utils.os, "cpu_count", lambda: 6)
+
+    # Padrão serial; sem paratest, execução serial mesmo com vários processos
+    assert core_utils.phpunit_parallel_args() == ([], 1)
+    assert core_utils.phpunit_parallel_args(4) == ([], 1)
+
+    paratest_bin.touch()
+    assert core_utils.phpunit_parallel_args(1) == ([], 1)
+    assert core_utils.phpunit_parallel_args(4) == (
+        ["--parallel", "--processes=4", "--recreate-databases"],
+        4,
+    )
+    assert core_utils.phpunit_parallel_args(0)[1] == 6
@@ -0,0 +1,248 @@
+# tests/python/test_run_tests.py
+import sys
+from pathlib import Path
+
+_project_root_dir_for_test = Path(__file__).resolve().parent.parent.parent
+if str(_project_root_dir_for_test) not in sys.path:
+    sys.path.insert(0, str(_project_root_dir_for_test))
+
+from scripts import run_tests
+
+
+def test_assign_dusk_shards_balances_by_history():
+    timings = {
+        "tests/Browser/ATest.php": 60.0,
+        "tests/Browser/BTest.php": 40.0,
+        "tests/Browser/CTest.php": 30.0,
+        "tests/Browser/DTest.php": 20.0,
+        "tests/Browser/ETest.php": 10.0,
+    }
+    shards = run_tests.assign_dusk_shards(sorted(timings), timings, 2)
+
+    assert sorted(f for shard in shards for f in shard) == sorted(timings)
+    loads = sorted(sum(timings[f] for f in shard) for shard in shards)
+    assert loads == [80.0, 80.0]
+
+
+def test_assign_dusk_shards_unknown_files_and_empty_shards():
+    timings = {"tests/Browser/ATest.php": 10.0}
+    files = ["tests/Browser/ATest.php", "tests/Browser/NewTest.php"]
+
+    shards = run_tests.assign_dusk_shards(files, timings, 4)
+
+    # Arquivo sem histórico usa a média; shards vazios são descartados
+    assert shards == [["tests/Browser/ATest.php"], ["tests/Browser/NewTest.php"]]
+    assert run_tests.assign_dusk_shards([], timings, 4) == []
+
+
+def test_parse_junit_report_totals_and_durations(tmp_path):
+    test_file = run_tests.BASE_DIR / "tests" / "Browser" / "LoginTest.php"
+    junit_file = tmp_path / "junit.xml"
+    junit_file.write_text(
+        f"""<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="Tests\\Browser\\LoginTest" file="{test_file}">
+    <testcase name="a" file="{test_file}" time="1.5"/>
+    <testcase name="b" file="{test_file}" time="2.0"><failure>x</failure></testcase>
+    <testcase name="c" file="{test_file}" time="0.5"><skipped/></testcase>
+    <testcase name="d" file="/outside/OtherTest.php" time="1"><error>y</error></testcase>
+  </testsuite>
+</testsuites>
+""",
+        encoding="utf-8",
+    )
+
+    totals, durations = run_tests.parse_junit_report(junit_file)
+
+    assert totals == {"tests": 4, "failures": 1, "errors": 1, "skipped": 1}
+    assert durations == {
+        "tests/Browser/LoginTest.php": 4.0,
+        "/outside/OtherTest.php": 1.0,
+    }
+    assert run_tests.parse_junit_report(tmp_path / "missing.xml")[0]["tests"] == 0
+
+
+def test_save_and_load_dusk_timings_merge(tmp_path):
+    timings_file = tmp_path / "dusk_timings.json"
+    run_tests.save_dusk_timings({"a": 1.0, "b": 2.0}, timings_file)
+    run_tests.save_dusk_timings({"b": 3.25}, timings_file)
+
+    assert run_tests.load_dusk_timings(timings_file) == {"a": 1.0, "b": 3.25}
+    assert run_tests.load_dusk_timings(tmp_path / "missing.json") == {}
+
+
+def test_write_dusk_shard_env_overrides(tmp_path, monkeypatch):
+    base_env = tmp_path / ".env.dusk.local"
+    base_env.write_text(
+        'APP_NAME="8th BCSMIF"\nAPP_URL=http://localhost\nDB_CONNECTION=mysql\nDB_DATABASE=bcsmif\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(run_tests, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(run_tests, "DUSK_ENV_FILE", base_env)
+
+    env_name, env_file, sqlite_file = run_tests.write_dusk_shard_env(2, 8001, 9516)
+
+    assert env_name == "dusk.shard2"
+    assert env_file == tmp_path / ".env.dusk.shard2"
+    assert sqlite_file is None
+    values = run_tests.read_env_file(env_file)
+    assert values["APP_NAME"] == "8th BCSMIF"
+    assert 'APP_NAME="8th BCSMIF"' in env_file.read_text(encoding="utf-8").splitlines()
+    assert values["APP_URL"] == "http://127.0.0.1:8001"
+    assert values["DUSK_DRIVER_URL"] == "http://localhost:9516"
+    assert values["DB_DATABASE"] == "bcsmif_dusk_2"
+
+
+def test_manage_dusk_shard_database_uses_shard_settings(tmp_path, monkeypatch, capsys):
+    env_file = tmp_path / ".env.dusk.shard1"
+    env_file.write_text(
+        'DB_CONNECTION=mysql\nDB_PASSWORD="p w"\nDB_DATABASE="bcsmif_dusk_1"\n',
+        encoding="utf-8",
+    )
+    calls = []
+    results = iter([(0, "", ""), (1, "", "SQLSTATE[HY000] [1045] Access denied")])
+
+    def fake_run_command(cmd_list, env=None, **kwargs):
+        calls.append(env)
+        return next(results)
+
+    monkeypatch.setattr(run_tests, "run_command", fake_run_command)
+
+    assert run_tests.manage_dusk_shard_database(env_file, "create") is True
+    assert calls[0]["SHARD_DB_ACTION"] == "create"
+    assert calls[0]["SHARD_DB_NAME"] == "bcsmif_dusk_1"
+    assert calls[0]["SHARD_DB_PASSWORD"] == "p w"
+    assert calls[0]["SHARD_DB_PORT"] == "3306"
+    assert run_tests.manage_dusk_shard_database(env_file, "drop") is False
+    assert "Access denied" in capsys.readouterr().out
+
+    env_file.write_text("DB_CONNECTION=sqlsrv\n", encoding="utf-8")
+    assert run_tests.manage_dusk_shard_database(env_file, "create") is False
+    assert len(calls) == 2
+
+
+def test_run_dusk_sharded_creates_and_drops_shard_databases(tmp_path, monkeypatch):
+    base_env = tmp_path / ".env.dusk.local"
+    base_env.write_text("DB_CONNECTION=mysql\nDB_DATABASE=bcsmif\n", encoding="utf-8")
+    monkeypatch.setattr(run_tests, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(run_tests, "DUSK_ENV_FILE", base_env)
+    monkeypatch.setattr(run_tests, "DUSK_SHARD_LOG_DIR", tmp_path / "shards")
+    monkeypatch.setattr(
+        run_tests, "discover_dusk_test_files", lambda: ["tests/Browser/ATest.php"] * 2
+    )
+    monkeypatch.setattr(run_tests, "load_dusk_timings", lambda: {})
+    events = []
+
+    def fake_manage(env_file, action):
+        events.append((action, env_file.name))
+        return env_file.name != ".env.dusk.shard2"
+
+    def fake_start(cmd_list, log_file, env=None):
+        events.append(("start", log_file.name))
+        return None
+
+    monkeypatch.setattr(run_tests, "manage_dusk_shard_database", fake_manage)
+    monkeypatch.setattr(run_tests, "start_background_process", fake_start)
+
+    assert run_tests.run_dusk_sharded(tmp_path / "chromedriver", 2) == 1
+    # O shard 2 não tem banco: nada do shard 2 sobe e o banco do shard 1 é removido
+    assert events == [
+        ("create", ".env.dusk.shard1"),
+        ("start", "chromedriver_1.log"),
+        ("start", "serve_1.log"),
+        ("create", ".env.dusk.shard2"),
+        ("drop", ".env.dusk.shard1"),
+    ]
+    assert not list(tmp_path.glob(".env.dusk.shard*"))
+
+
+class _FakeProcess:
+    def __init__(self, exit_after_polls=None):
+        self.pid = 4242
+        self.returncode = None
+        self._polls = 0
+        self._exit_after_polls = exit_after_polls
+
+    def poll(self):
+        self._polls += 1
+        if self._exit_after_polls is not None and self._polls > self._exit_after_polls:
+            self.returncode = 1
+        return self.returncode
+
+
+def test_wait_until_ready_polls_with_exponential_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(run_tests.time, "sleep", sleeps.append)
+    answers = iter([False, False, False, True])
+
+    ready = run_tests.wait_until_ready(
+        "Servidor App", _FakeProcess(), lambda: next(answers), timeout=60
+    )
+
+    assert ready is True
+    assert sleeps == [0.1, 0.2, 0.4]
+
+
+def test_wait_until_ready_fails_fast_when_process_exits(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(run_tests.time, "sleep", lambda _: None)
+    log_file = tmp_path / "serve.log"
+    log_file.write_text("Failed to listen on 127.0.0.1:8000\n", encoding="utf-8")
+
+    ready = run_tests.wait_until_ready(
+        "Servidor App",
+        _FakeProcess(exit_after_polls=2),
+        lambda: False,
+        timeout=60,
+        log_file=log_file,
+    )
+
+    assert ready is False
+    output = capsys.readouterr().out
+    assert "terminou antes de ficar pronto" in output
+    assert "Failed to listen on 127.0.0.1:8000" in output
+
+
+def test_wait_until_ready_times_out(monkeypatch, capsys):
+    clock = [0.0]
+    monkeypatch.setattr(run_tests.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(
+        run_tests.time,
+        "sleep",
+        lambda seconds: clock.__setitem__(0, clock[0] + seconds),
+    )
+
+    ready = run_tests.wait_until_ready(
+        "ChromeDriver", _FakeProcess(), lambda: False, timeout=5
+    )
+
+    assert ready is False
+    assert clock[0] == 5
+    assert "não ficou pronto em 5s" in capsys.readouterr().out
+
+
+def test_http_probe_and_vite_hot_file_probe(tmp_path):
+    import http.server
+    import threading
+    import time
+
+    server = http.server.HTTPServer(
+        ("127.0.0.1", 0), http.server.SimpleHTTPRequestHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        port = server.server_address[1]
+        # Respostas de erro (404) também indicam que o servidor já atende
+        assert run_tests.http_probe(f"http://127.0.0.1:{port}/missing")() is True
+
+        hot_file = tmp_path / "hot"
+        probe = run_tests.vite_hot_file_probe(time.time(), hot_file)
+        assert probe() is False
+        hot_file.write_text(f"http://127.0.0.1:{port}", encoding="utf-8")
+        assert probe() is True
+        # 'hot' de uma execução anterior é ignorado
+        assert run_tests.vite_hot_file_probe(time.time() + 60, hot_file)() is False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert run_tests.http_probe(f"http://127.0.0.1:{port}/")() is False